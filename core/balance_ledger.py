@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from core.logger_setup import setup_logger
+from core.order_tracker import order_tracker
+
+logger = setup_logger(__name__)
+
+# Abgleich mit den Börsen-Balances (Sekunden)
+BALANCE_LEDGER_SYNC_SEC = float(os.getenv("BALANCE_LEDGER_SYNC_SEC", "30"))
+# Ohne Abgleich seit dieser Zeit wird vor dem nächsten Lesen synchron nachgeladen
+BALANCE_LEDGER_MAX_AGE_SEC = float(os.getenv("BALANCE_LEDGER_MAX_AGE_SEC", "300"))
+# Reservierungen ohne Endzustand werden nach dieser Zeit beim Abgleich verworfen
+BALANCE_RESERVATION_TTL_SEC = float(os.getenv("BALANCE_RESERVATION_TTL_SEC", "900"))
+# Gebührenpuffer auf BUY-Reservierungen
+TRADING_FEE_RATE = float(os.getenv("TRADING_FEE_RATE", "0.001"))
+
+
+@dataclass
+class Reservation:
+    client_oid: str
+    currency: str
+    amount: float
+    created: float = field(default_factory=time.time)
+    # True = im letzten Börsen-Snapshot bereits enthalten (gehalten oder verbraucht)
+    reflected: bool = False
+
+
+def split_symbol(symbol: str):
+    try:
+        base, quote = symbol.split("-")
+    except ValueError:
+        base, quote = symbol, "USDT"
+    return base.upper(), quote.upper()
+
+
+def reservation_for(symbol: str, side: str, price, qty):
+    """(Währung, Menge), die eine Order bis zum Endzustand bindet: BUY = Notional inkl. Gebühr, SELL = Basismenge."""
+    base, quote = split_symbol(symbol)
+    if str(side).lower() == "buy":
+        return quote, float(price) * float(qty) * (1 + TRADING_FEE_RATE)
+    return base, float(qty)
+
+
+class BalanceLedger:
+    """
+    Lokales Abbild der verfügbaren Trade-Balances plus Reservierungen für laufende Orders.
+    - reserve(): beim Erzeugen eines Intents (O(1)); schlägt fehl, wenn lokal nicht genug frei ist
+    - Endzustände aus dem OrderTracker buchen Fills (settle) bzw. geben die Reservierung frei
+    - sync(): periodischer Abgleich mit get_account_list(); Reservierungen, deren Order die Börse
+      bereits angenommen hat, sind ab dann im Snapshot enthalten und zählen nicht doppelt
+    So sehen gleichzeitige Entries auf verschiedenen Symbolen nicht dieselbe Balance.
+    """
+
+    def __init__(self):
+        self._balances: Dict[str, float] = {}
+        self._reserved: Dict[str, float] = {}
+        self._reservations: Dict[str, Reservation] = {}
+        self._lock = threading.RLock()
+        self._fetcher: Optional[Callable[[], list]] = None
+        self._synced_at: Optional[float] = None
+        self._sync_due = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Abgleich ---
+    def set_fetcher(self, fetcher: Callable[[], list]) -> None:
+        """Registriert die REST-Funktion (z.B. api.get_account_list) für den Abgleich."""
+        self._fetcher = fetcher
+
+    def sync(self, accounts: list = None) -> bool:
+        fetch_started = time.time()
+        if accounts is None:
+            if self._fetcher is None:
+                return False
+            try:
+                accounts = self._fetcher()
+            except Exception as e:
+                logger.warning(f"⚠️ Balance-Abgleich fehlgeschlagen: {e}")
+                return False
+        if accounts is None:
+            return False
+        balances: Dict[str, float] = {}
+        for acc in accounts:
+            if str(acc.get("type", "")).lower() != "trade":
+                continue
+            try:
+                balances[str(acc.get("currency")).upper()] = float(acc.get("available", 0.0))
+            except (TypeError, ValueError):
+                continue
+        with self._lock:
+            self._balances = balances
+            for oid, res in list(self._reservations.items()):
+                if fetch_started - res.created > BALANCE_RESERVATION_TTL_SEC:
+                    self._drop(oid)
+                    continue
+                # Nur Orders, die die Börse schon vor Beginn des Abrufs angenommen hat, sind sicher
+                # im Snapshot enthalten; ein Ack während des Abrufs zählt erst beim nächsten Abgleich
+                tracked = order_tracker.get(oid)
+                acked_at = tracked.acked_at if tracked is not None else None
+                if not res.reflected and acked_at is not None and acked_at < fetch_started:
+                    res.reflected = True
+                    self._reserved[res.currency] = self._reserved.get(res.currency, 0.0) - res.amount
+            self._synced_at = time.time()
+        self._sync_due.clear()
+        return True
+
+    def ensure_synced(self, api=None, max_age: float = BALANCE_LEDGER_MAX_AGE_SEC) -> None:
+        if self._fetcher is None and api is not None and hasattr(api, "get_account_list"):
+            self.set_fetcher(api.get_account_list)
+        if self._synced_at is None or time.time() - self._synced_at > max_age:
+            self.sync()
+
+    # --- Lesen ---
+    def available(self, currency: str, api=None) -> Optional[float]:
+        """Frei verfügbare Menge (Börsen-Snapshot minus offene Reservierungen). None ohne Snapshot."""
+        self.ensure_synced(api)
+        currency = currency.upper()
+        with self._lock:
+            if self._synced_at is None:
+                return None
+            return max(0.0, self._balances.get(currency, 0.0) - self._reserved.get(currency, 0.0))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "balances": dict(self._balances),
+                "reserved": {k: v for k, v in self._reserved.items() if v > 0},
+                "reservations": len(self._reservations),
+                "synced_at": self._synced_at,
+            }
+
+    # --- Reservierungen ---
+    def reserve(self, client_oid: str, currency: str, amount: float) -> bool:
+        """Reserviert `amount` für eine Order. False, wenn lokal nicht genug frei ist."""
+        currency = currency.upper()
+        amount = max(0.0, float(amount))
+        with self._lock:
+            if client_oid in self._reservations:
+                return True
+            if self._synced_at is not None:
+                free = self._balances.get(currency, 0.0) - self._reserved.get(currency, 0.0)
+                if amount > free:
+                    return False
+            self._reservations[client_oid] = Reservation(client_oid, currency, amount)
+            self._reserved[currency] = self._reserved.get(currency, 0.0) + amount
+            return True
+
+    def _drop(self, client_oid: str) -> Optional[Reservation]:
+        res = self._reservations.pop(client_oid, None)
+        if res is not None and not res.reflected:
+            self._reserved[res.currency] = max(0.0, self._reserved.get(res.currency, 0.0) - res.amount)
+        return res
+
+    def release(self, client_oid: str) -> None:
+        """Gibt eine Reservierung ohne Fill frei (Storno, Ablehnung, Fehler)."""
+        with self._lock:
+            res = self._drop(client_oid)
+        if res is not None and res.reflected:
+            # Gehaltene Mittel kommen erst laut Börse zurück → bald neu abgleichen
+            self._sync_due.set()
+
+    def settle(self, order) -> None:
+        """Bucht den Endstand einer Order (TrackedOrder) und gibt die Reservierung frei."""
+        with self._lock:
+            res = self._drop(order.client_oid)
+            if res is None:
+                return
+            if res.reflected:
+                self._sync_due.set()
+                return
+            if order.filled_size > 0:
+                base, quote = split_symbol(order.symbol)
+                fee = float(order.fee or 0.0)
+                if order.side == "buy":
+                    self._balances[quote] = self._balances.get(quote, 0.0) - order.filled_funds - fee
+                    self._balances[base] = self._balances.get(base, 0.0) + order.filled_size
+                else:
+                    self._balances[base] = self._balances.get(base, 0.0) - order.filled_size
+                    self._balances[quote] = self._balances.get(quote, 0.0) + order.filled_funds - fee
+
+    def on_order_terminal(self, order) -> None:
+        """Listener für den OrderTracker (filled/cancelled/failed)."""
+        if order.state == "filled" or order.filled_size > 0:
+            self.settle(order)
+        else:
+            self.release(order.client_oid)
+
+    # --- Hintergrund-Abgleich ---
+    def start_reconciler(self, api=None, interval: float = BALANCE_LEDGER_SYNC_SEC) -> None:
+        if api is not None and hasattr(api, "get_account_list"):
+            self.set_fetcher(api.get_account_list)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.is_set():
+                self.sync()
+                # Früher abgleichen, wenn gehaltene Mittel freigegeben wurden
+                self._sync_due.wait(interval)
+                if self._sync_due.is_set():
+                    self._stop.wait(1.0)
+
+        self._thread = threading.Thread(target=_loop, daemon=True, name="balance-ledger")
+        self._thread.start()
+        logger.info(f"💳 Balance-Ledger gestartet (Abgleich alle {interval:.0f}s)")
+
+    def stop_reconciler(self) -> None:
+        self._stop.set()
+        self._sync_due.set()
+
+
+balance_ledger = BalanceLedger()
+order_tracker.add_listener(balance_ledger.on_order_terminal)
@@ -0,0 +1,208 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.logger_setup import setup_logger
+from core.rate_limiter import market_data_limiter
+
+logger = setup_logger(__name__)
+
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", "data/candles")
+CANDLE_DOWNLOAD_WORKERS = int(os.getenv("CANDLE_DOWNLOAD_WORKERS", "4"))
+BATCH_LIMIT = 1500  # KuCoin max candles per request
+
+INTERVAL_SECONDS = {
+    "1min": 60, "3min": 180, "5min": 300, "15min": 900, "30min": 1800,
+    "1hour": 3600, "2hour": 7200, "4hour": 14400, "6hour": 21600,
+    "8hour": 28800, "12hour": 43200, "1day": 86400, "1week": 604800,
+}
+
+# Spalten wie von KuCoin geliefert; timestamp = Candle-Start in Sekunden
+COLUMNS = ["timestamp", "open", "close", "high", "low", "volume", "turnover"]
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]], step: int) -> List[Tuple[int, int]]:
+    """Fasst überlappende bzw. direkt angrenzende [start, end]-Bereiche zusammen."""
+    merged: List[List[int]] = []
+    for s, e in sorted(ranges):
+        if merged and s <= merged[-1][1] + step:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return [(s, e) for s, e in merged]
+
+
+class CandleStore:
+    """
+    Lokaler Candle-Cache: eine CSV-Datei pro Symbol und Intervall plus Meta-Datei
+    mit den bereits vollständig geladenen Zeitbereichen (Lücken ohne Trades bleiben so erkennbar).
+    """
+
+    def __init__(self, base_dir: str = CANDLE_CACHE_DIR):
+        self.base_dir = base_dir
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _paths(self, symbol: str, interval: str) -> Tuple[str, str]:
+        folder = os.path.join(self.base_dir, symbol.upper())
+        return os.path.join(folder, f"{interval}.csv"), os.path.join(folder, f"{interval}.meta.json")
+
+    def coverage(self, symbol: str, interval: str) -> List[Tuple[int, int]]:
+        _, meta_path = self._paths(symbol, interval)
+        try:
+            with open(meta_path, "r") as f:
+                return [tuple(r) for r in json.load(f).get("ranges", [])]
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def missing_ranges(self, symbol: str, interval: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Teilbereiche von [start, end], die noch nicht lokal vorliegen."""
+        step = INTERVAL_SECONDS[interval]
+        missing = []
+        cursor = start
+        for s, e in self.coverage(symbol, interval):
+            if e < cursor:
+                continue
+            if s > end:
+                break
+            if s > cursor:
+                missing.append((cursor, min(end, s - step)))
+            cursor = max(cursor, e + step)
+            if cursor > end:
+                break
+        if cursor <= end:
+            missing.append((cursor, end))
+        return [(s, e) for s, e in missing if s <= e]
+
+    def _read_rows(self, csv_path: str) -> Dict[int, list]:
+        rows: Dict[int, list] = {}
+        if not os.path.exists(csv_path):
+            return rows
+        with open(csv_path, "r", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if row:
+                    rows[int(row[0])] = row
+        return rows
+
+    def load(self, symbol: str, interval: str, start: int, end: int) -> List[list]:
+        csv_path, _ = self._paths(symbol, interval)
+        with self._lock(symbol, interval):
+            rows = self._read_rows(csv_path)
+        return [rows[ts] for ts in sorted(rows) if start <= ts <= end]
+
+    def merge(self, symbol: str, interval: str, new_rows: List[list], fetched: List[Tuple[int, int]]) -> None:
+        """Übernimmt neue Candles (neuere Werte gewinnen) und markiert `fetched` als abgedeckt."""
+        step = INTERVAL_SECONDS[interval]
+        csv_path, meta_path = self._paths(symbol, interval)
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        with self._lock(symbol, interval):
+            rows = self._read_rows(csv_path)
+            for row in new_rows:
+                rows[int(row[0])] = [str(v) for v in row[:len(COLUMNS)]]
+            tmp_path = csv_path + ".tmp"
+            with open(tmp_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                for ts in sorted(rows):
+                    writer.writerow(rows[ts])
+            os.replace(tmp_path, csv_path)
+
+            ranges = _merge_ranges(self.coverage(symbol, interval) + list(fetched), step)
+            tmp_meta = meta_path + ".tmp"
+            with open(tmp_meta, "w") as f:
+                json.dump({"ranges": ranges}, f, separators=(",", ":"))
+            os.replace(tmp_meta, meta_path)
+
+
+class CandleDownloader:
+    """
+    Lädt historische Candles in Fenstern zu je BATCH_LIMIT Kerzen parallel (unter dem
+    gemeinsamen Rate-Limiter) und holt bei Folgeaufrufen nur fehlende Bereiche nach.
+    """
+
+    def __init__(self, client=None, store: CandleStore = None, workers: int = CANDLE_DOWNLOAD_WORKERS, limiter=market_data_limiter):
+        self._client = client
+        self.store = store or CandleStore()
+        self.workers = max(1, workers)
+        self.limiter = limiter
+
+    @property
+    def client(self):
+        if self._client is None:
+            from core.kucoin_api import kucoin_client
+            self._client = kucoin_client
+        return self._client
+
+    def _windows(self, start: int, end: int, step: int) -> List[Tuple[int, int]]:
+        span = BATCH_LIMIT * step
+        windows = []
+        cursor = start
+        while cursor <= end:
+            w_end = min(end, cursor + span - step)
+            windows.append((cursor, w_end))
+            cursor = w_end + step
+        return windows
+
+    def _fetch_window(self, symbol: str, interval: str, start: int, end: int) -> Optional[list]:
+        from core.kucoin_api import safe_api_call
+        self.limiter.acquire()
+        try:
+            # KuCoin endAt ist exklusiv bezogen auf den Candle-Start → +step
+            raw = safe_api_call(
+                self.client.market.get_kline,
+                symbol=symbol,
+                kline_type=interval,
+                startAt=start,
+                endAt=end + INTERVAL_SECONDS[interval],
+            )
+            return [row for row in (raw or []) if start <= int(row[0]) <= end]
+        except Exception as e:
+            logger.warning(f"⚠️ Candle-Fenster {symbol} {interval} [{start}, {end}] fehlgeschlagen: {e}")
+            return None
+
+    def fetch(self, symbol: str, interval: str = "1min", start: int = None, end: int = None) -> List[list]:
+        """
+        Gibt Candles für [start, end] (UNIX-Sekunden) aufsteigend sortiert zurück.
+        Nur fehlende Bereiche werden bei KuCoin angefragt; Ergebnisse landen im lokalen Cache.
+        """
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Unbekanntes Candle-Intervall: {interval}")
+        step = INTERVAL_SECONDS[interval]
+        now = int(time.time())
+        end = int(end or now)
+        start = int(start or end - 30 * 24 * 60 * 60)
+        start -= start % step
+        end -= end % step
+        # Die laufende (unvollständige) Kerze wird geladen, aber nicht als abgedeckt markiert
+        last_closed = now - now % step - step
+
+        missing = self.store.missing_ranges(symbol, interval, start, end)
+        windows = [w for s, e in missing for w in self._windows(s, e, step)]
+        if windows:
+            logger.info(f"📥 Lade {len(windows)} Candle-Fenster für {symbol} {interval} ({self.workers} parallel)")
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(windows))) as pool:
+                results = list(pool.map(lambda w: self._fetch_window(symbol, interval, *w), windows))
+            rows = []
+            fetched = []
+            for (w_start, w_end), data in zip(windows, results):
+                if data is None:
+                    continue
+                rows.extend(data)
+                if w_start <= last_closed:
+                    fetched.append((w_start, min(w_end, last_closed)))
+            if rows or fetched:
+                self.store.merge(symbol, interval, rows, fetched)
+        return self.store.load(symbol, interval, start, end)
+
+
+candle_downloader = CandleDownloader()
@@ -1,16 +1,12 @@
-import os
-import json
 from datetime import datetime
 from core.logger import log_info, log_error
 from core.telegram_utils import send_telegram_message
-
-ORDER_HISTORY_FILE = "data/order_history.json"
+from core.order_journal import order_journal
 
 def clear_order_history():
     try:
-        # Clear the order_history.json by overwriting with empty list
-        with open(ORDER_HISTORY_FILE, "w") as f:
-            json.dump([], f)
+        # Order-Journal und Index leeren
+        order_journal.clear()
         log_info(f"Order history cleared at {datetime.now().isoformat()}")
         # Telegram message senden
         send_telegram_message("Order history wurde erfolgreich geleert.")
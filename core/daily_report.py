@@ -8,6 +8,8 @@ from datetime import datetime
 load_dotenv()
 
 DAILY_REPORT_TIME = os.getenv("DAILY_REPORT_TIME", "23:59")
+# Höchstalter (Sekunden) der Preise für die Portfolio-Bewertung im Report
+REPORT_PRICE_MAX_AGE_SEC = float(os.getenv("REPORT_PRICE_MAX_AGE_SEC", "60"))
 
 def clean_markdown(text):
     # Entfernt Markdown-Symbole aus dem Text
@@ -84,13 +86,16 @@ def run_daily_report():
     # Kontostand Übersicht ebenfalls in MarkdownV2 formatieren
     balance_msg = "*📋 Kontostand Übersicht:*\n"
 
-    from core.kucoin_api import get_symbol_price
+    from core.kucoin_api import get_symbol_price, get_price_snapshot
+
+    # Portfolio-Bewertung: ein allTickers-Request statt eines Ticker-Abrufs pro Asset
+    price_snapshot = get_price_snapshot()
 
     def convert_to_usdt(asset: str, amount: float) -> float:
         if asset.upper() == "USDT":
             return amount
         try:
-            price = get_symbol_price(f"{asset}-USDT")
+            price = price_snapshot.get(f"{asset.upper()}-USDT") or get_symbol_price(f"{asset}-USDT", max_age=REPORT_PRICE_MAX_AGE_SEC)
             return amount * float(price)
         except Exception:
             return 0.0
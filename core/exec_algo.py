@@ -0,0 +1,426 @@
+import collections
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from config.config import get_config
+from core.balance_ledger import balance_ledger, reservation_for
+from core.filters import prepare_order
+from core.ids import make_client_oid
+from core.logger_setup import setup_logger
+from core.order_tracker import order_tracker, TERMINAL_STATES
+from core.orders_db import get_db
+
+logger = setup_logger(__name__)
+
+# "none" = Einzelorder wie bisher, "twap" = zeitgesteuerte Slices, "pov" = Anteil am gehandelten Volumen
+EXEC_ALGO = os.getenv("EXEC_ALGO", "none").lower()
+# Erst ab diesem Notional (USDT) wird eine Parent-Order gesliced
+EXEC_ALGO_MIN_NOTIONAL = float(os.getenv("EXEC_ALGO_MIN_NOTIONAL", "200"))
+EXEC_TWAP_DURATION_SEC = float(os.getenv("EXEC_TWAP_DURATION_SEC", "60"))
+EXEC_TWAP_SLICES = int(os.getenv("EXEC_TWAP_SLICES", "6"))
+# POV: Zielanteil am Marktvolumen (0.1 = 10 %) und Prüfintervall
+EXEC_POV_RATE = float(os.getenv("EXEC_POV_RATE", "0.1"))
+EXEC_POV_INTERVAL_SEC = float(os.getenv("EXEC_POV_INTERVAL_SEC", "2"))
+# Spätestens danach wird der Rest in einer Order ausgeführt
+EXEC_MAX_DURATION_SEC = float(os.getenv("EXEC_MAX_DURATION_SEC", "300"))
+# Warten auf Fill-Events einer Kind-Order, bevor per REST abgeglichen wird
+EXEC_CHILD_WAIT_SEC = float(os.getenv("EXEC_CHILD_WAIT_SEC", "1.5"))
+
+
+@dataclass
+class ParentOrder:
+    """Aggregierter Ausführungsstand über alle Kind-Orders (VWAP, Gebühren, Latenz)."""
+    symbol: str
+    qty: Decimal
+    arrival_price: float
+    side: str = "buy"
+    strategy: str = "default"
+    algo: str = "market"
+    parent_id: str = field(default_factory=lambda: uuid.uuid4().hex[:24])
+    started: float = field(default_factory=time.time)
+    filled_size: float = 0.0
+    filled_funds: float = 0.0
+    maker_size: float = 0.0
+    fee: float = 0.0
+    first_fill_ts: Optional[float] = None
+    last_fill_ts: Optional[float] = None
+    order_ids: list = field(default_factory=list)
+
+    @property
+    def remaining(self) -> Decimal:
+        return max(Decimal("0"), self.qty - Decimal(str(self.filled_size)))
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        if self.filled_size > 0 and self.filled_funds > 0:
+            return round(self.filled_funds / self.filled_size, 8)
+        return None
+
+    @property
+    def slippage_bps(self) -> Optional[float]:
+        """VWAP gegenüber Arrival-Preis; positiv = besser als Arrival (BUY günstiger, SELL teurer)."""
+        avg = self.avg_price
+        if avg is None or not self.arrival_price:
+            return None
+        diff = (self.arrival_price - avg) if self.side == "buy" else (avg - self.arrival_price)
+        return round(diff / self.arrival_price * 10_000, 2)
+
+    def metrics(self) -> dict:
+        return {
+            "arrival_price": self.arrival_price,
+            "vwap": self.avg_price,
+            "slippage_bps": self.slippage_bps,
+            "maker_qty": round(self.maker_size, 8),
+            "taker_qty": round(self.filled_size - self.maker_size, 8),
+            "children": len(self.order_ids),
+            "first_fill_ms": int((self.first_fill_ts - self.started) * 1000) if self.first_fill_ts else None,
+            "fill_latency_ms": int((self.last_fill_ts - self.started) * 1000) if self.last_fill_ts else None,
+        }
+
+
+class VolumeTracker:
+    """
+    Gehandeltes Fremdvolumen je Symbol aus dem Match-Stream (/market/match), für POV-Slicing.
+    Eigene Fills (maker-/takerOrderId bekannt im OrderTracker) zählen nicht mit, sonst würde
+    POV seinem eigenen Volumen hinterherlaufen. Zeitstempel = lokale Empfangszeit (time.time()),
+    dieselbe Uhr wie in volume_since() – Börsenzeit und lokale Uhr werden nicht gemischt.
+    """
+
+    def __init__(self, window_sec: float = 900):
+        self.window_sec = window_sec
+        self._trades: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def on_match(self, symbol: str, data: dict) -> None:
+        try:
+            size = float(data.get("size") or 0)
+        except (TypeError, ValueError):
+            return
+        if size <= 0:
+            return
+        # Der öffentliche Stream kennt keine clientOid, nur die Börsen-orderIds beider Seiten
+        if order_tracker.is_own(data.get("makerOrderId")) or order_tracker.is_own(data.get("takerOrderId")):
+            return
+        ts = time.time()
+        with self._lock:
+            trades = self._trades.setdefault(symbol, collections.deque())
+            trades.append((ts, size))
+            cutoff = ts - self.window_sec
+            while trades and trades[0][0] < cutoff:
+                trades.popleft()
+
+    def volume_since(self, symbol: str, since: float) -> float:
+        with self._lock:
+            return sum(size for ts, size in self._trades.get(symbol, ()) if ts >= since)
+
+    def has_data(self, symbol: str) -> bool:
+        return bool(self._trades.get(symbol))
+
+
+volume_tracker = VolumeTracker()
+
+_working = set()
+_working_lock = threading.Lock()
+
+
+def symbol_busy(symbol: str) -> bool:
+    """True, solange für das Symbol eine Parent-Order (Slicing oder passiver Entry) läuft."""
+    return symbol in _working
+
+
+def run_in_background(symbol: str, fn: Callable[[], dict], on_done: Callable[[dict], None] = None,
+                      name: str = "exec") -> Optional[threading.Thread]:
+    """Führt fn() in einem Thread aus (ein laufender Auftrag je Symbol). None, wenn das Symbol belegt ist."""
+    with _working_lock:
+        if symbol in _working:
+            return None
+        _working.add(symbol)
+
+    def _run():
+        try:
+            try:
+                result = fn()
+            except Exception as e:
+                logger.error(f"❌ Ausführung {name} {symbol} abgebrochen: {e}")
+                result = {"status": "failed", "symbol": symbol, "reason": str(e)}
+            # on_done läuft, bevor das Symbol freigegeben wird: wer symbol_busy() == False sieht,
+            # sieht auch das Ergebnis (z.B. in der Entry-Queue der Engine)
+            if on_done is not None:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    logger.error(f"❌ Nachbearbeitung {name} {symbol} fehlgeschlagen: {e}")
+        finally:
+            with _working_lock:
+                _working.discard(symbol)
+
+    thread = threading.Thread(target=_run, daemon=True, name=f"{name}-{symbol}")
+    thread.start()
+    return thread
+
+
+class ChildOrderExecutor:
+    """
+    Gemeinsame Bausteine für Parent-Orders: Kind-Order senden (Rundung, clientOid, Balance-Reservierung,
+    OrdersDB, OrderTracker), stornieren, Endstand übernehmen und das Ergebnis als eine Order verbuchen.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    @property
+    def trade_client(self):
+        return getattr(self.api, "trade", None)
+
+    def place(self, parent: ParentOrder, price, qty, post_only: bool = False, tag: str = "child") -> Optional[str]:
+        side = parent.side
+        qpx, qqty, err, _ = prepare_order(parent.symbol, side, price, qty)
+        if err:
+            logger.info(f"ℹ️ {parent.symbol} {side}: Kind-Order nicht handelbar ({err})")
+            return None
+        oid = make_client_oid(parent.symbol, side, str(qpx), str(qqty), strategy=f"{parent.strategy}~{tag}{len(parent.order_ids)}")
+        res_ccy, res_amount = reservation_for(parent.symbol, side, qpx, qqty)
+        if not balance_ledger.reserve(oid, res_ccy, res_amount):
+            logger.info(f"ℹ️ {parent.symbol} {side}: nicht genug {res_ccy} frei ({res_amount:.8f})")
+            return None
+        try:
+            get_db().upsert_sent(oid, parent.symbol, side, str(qpx), str(qqty))
+        except Exception as e:
+            balance_ledger.release(oid)
+            logger.warning(f"⚠️ {parent.symbol} {side}: OrdersDB-Reservierung fehlgeschlagen: {e}")
+            return None
+        order_tracker.register(oid, parent.symbol, side, qqty)
+        try:
+            if post_only:
+                resp = self.api.create_limit_order(parent.symbol, side, price=str(qpx), size=str(qqty), client_oid=oid, post_only=True)
+            else:
+                resp = self.api.create_market_order(parent.symbol, side, size=str(qqty), client_oid=oid)
+        except Exception as e:
+            order_tracker.fail(oid, str(e))
+            logger.warning(f"⚠️ {parent.symbol} {side}: Kind-Order fehlgeschlagen: {e}")
+            return None
+        exch_id = None
+        if isinstance(resp, dict):
+            exch_id = resp.get("orderId") or resp.get("order_id") or resp.get("id")
+        order_tracker.ack(oid, exch_id)
+        parent.order_ids.append(oid)
+        return oid
+
+    def cancel(self, oid: str) -> None:
+        tracked = order_tracker.get(oid)
+        if tracked is None or tracked.state in TERMINAL_STATES or not tracked.order_id:
+            return
+        try:
+            self.api.cancel_order(tracked.order_id)
+        except Exception as e:
+            # Meist bereits gefüllt/storniert – der Abgleich in settle() klärt den Stand
+            logger.info(f"ℹ️ Storno {oid} fehlgeschlagen: {e}")
+
+    def settle(self, parent: ParentOrder, oid: str, maker: bool = False, wait: float = EXEC_CHILD_WAIT_SEC) -> None:
+        """Übernimmt den Endstand einer Kind-Order (nach Fill oder Storno) in die Parent-Order."""
+        tracked = order_tracker.wait_for_fill(oid, timeout=wait) if order_tracker.feed_active else None
+        if tracked is None:
+            tracked = order_tracker.reconcile(oid, self.trade_client, attempts=3)
+        if tracked is None or tracked.filled_size <= 0:
+            return
+        now = time.time()
+        parent.filled_size += tracked.filled_size
+        parent.filled_funds += tracked.filled_funds
+        parent.fee += float(tracked.fee or 0.0)
+        if maker:
+            parent.maker_size += tracked.filled_size
+        parent.first_fill_ts = parent.first_fill_ts or now
+        parent.last_fill_ts = now
+
+    def record(self, parent: ParentOrder, sender: str, order_type: str, extra_tags: dict = None) -> dict:
+        """Schreibt die Parent-Order als eine Order (VWAP) in die Historie; BUY öffnet die LIVE-Position."""
+        metrics = parent.metrics()
+        avg = parent.avg_price
+        if parent.filled_size <= 0 or avg is None:
+            return {"status": "cancelled", "symbol": parent.symbol, "side": parent.side,
+                    "clientOid": parent.order_ids[-1] if parent.order_ids else None, **metrics, **(extra_tags or {})}
+        fee = round(parent.fee, 8)
+        side_up = parent.side.upper()
+        order_local = {
+            "id": parent.order_ids[0],
+            "timestamp": int(time.time()),
+            "mode": "LIVE",
+            "symbol": parent.symbol,
+            "side": side_up,
+            "quantity": round(parent.filled_size, 8),
+            "price": avg,
+            "fee": fee,
+            "entry_price": avg if side_up == "BUY" else None,
+            "sl": None,
+            "tp": None,
+            "pnl": 0.0,
+            "reason": parent.strategy,
+            "trade_tags": {"sender": sender, "order_type": order_type, "parent_id": parent.parent_id,
+                           "client_oids": parent.order_ids, **metrics, **(extra_tags or {})},
+        }
+        if side_up == "BUY":
+            try:
+                min_sl_offset = float(get_config("MIN_SL_OFFSET", 0.01))
+                min_tp_offset = float(get_config("MIN_TP_OFFSET", 0.03))
+                order_local["sl"] = round(avg * (1 - min_sl_offset), 6)
+                order_local["tp"] = round(avg * (1 + min_tp_offset), 6)
+            except Exception:
+                pass
+        try:
+            from core.order import record_order
+            record_order(order_local)
+            if side_up == "BUY":
+                from core.position import PositionManager
+                PositionManager(mode="LIVE").open(parent.symbol, order_local["quantity"], avg, fee=fee, entry_fee=fee)
+        except Exception as e:
+            logger.warning(f"⚠️ {parent.symbol}: Persistenz der Parent-Order fehlgeschlagen: {e}")
+        status = "filled" if parent.remaining <= 0 else "partial"
+        return {"status": status, "symbol": parent.symbol, "side": parent.side, "id": order_local["id"],
+                "clientOid": parent.order_ids[0], "parent_id": parent.parent_id, "price": avg,
+                "quantity": order_local["quantity"], "fee": fee, **metrics, **(extra_tags or {})}
+
+
+class ExecutionScheduler(ChildOrderExecutor):
+    """
+    Zerlegt größere Parent-Orders in Market-Kind-Orders:
+      - twap: gleich große Slices über EXEC_TWAP_DURATION_SEC
+      - pov:  je Intervall EXEC_POV_RATE × Marktvolumen seit dem letzten Slice (Match-Stream)
+    Kind-Orders unter minFunds/minQty werden zusammengelegt; nach EXEC_MAX_DURATION_SEC wird der Rest
+    in einer Order ausgeführt. Der Parent-Stand liegt im OrdersDB (parent_orders), das Ergebnis
+    enthält VWAP gegenüber Arrival-Preis.
+    """
+
+    def _child_qty(self, parent: ParentOrder, want: Decimal, price: float) -> Optional[Decimal]:
+        """Rundet die gewünschte Slice-Größe; zu kleine Slices → None, zu kleiner Rest → ganzer Rest."""
+        remaining = parent.remaining
+        want = min(want, remaining)
+        _, qqty, err, _ = prepare_order(parent.symbol, parent.side, price, want)
+        if err or qqty <= 0:
+            return None
+        rest = remaining - qqty
+        if rest > 0 and prepare_order(parent.symbol, parent.side, price, rest)[2]:
+            # Rest wäre allein nicht handelbar → mit dieser Slice mitnehmen
+            return remaining
+        return qqty
+
+    def _slice(self, parent: ParentOrder, qty: Decimal, price: float) -> None:
+        oid = self.place(parent, price, qty, tag="slice")
+        if oid is not None:
+            self.settle(parent, oid)
+        get_db().update_parent(parent.parent_id, parent.filled_size, parent.filled_funds, "working", len(parent.order_ids))
+
+    def _reference_price(self, parent: ParentOrder) -> float:
+        from core.price_service import price_service
+        price, _ = price_service.get_with_age(parent.symbol)
+        return price or parent.arrival_price
+
+    def _run_twap(self, parent: ParentOrder, duration: float, slices: int) -> None:
+        slices = max(1, slices)
+        interval = duration / slices
+        for k in range(slices):
+            if parent.remaining <= 0:
+                break
+            price = self._reference_price(parent)
+            want = parent.remaining / (slices - k)
+            qty = self._child_qty(parent, want, price)
+            if qty is None and k == slices - 1:
+                qty = parent.remaining
+            if qty is not None:
+                self._slice(parent, qty, price)
+            if k < slices - 1 and parent.remaining > 0:
+                time.sleep(interval)
+
+    def _run_pov(self, parent: ParentOrder, rate: float, deadline: float) -> None:
+        owed = Decimal("0")
+        last = time.time()
+        while parent.remaining > 0 and time.time() < deadline:
+            time.sleep(EXEC_POV_INTERVAL_SEC)
+            now = time.time()
+            owed += Decimal(str(volume_tracker.volume_since(parent.symbol, last) * rate))
+            last = now
+            if owed <= 0:
+                continue
+            price = self._reference_price(parent)
+            qty = self._child_qty(parent, owed, price)
+            if qty is None:
+                continue  # Anteil noch unter minFunds/minQty → weiter ansammeln
+            filled_before = parent.filled_size
+            self._slice(parent, qty, price)
+            owed = max(Decimal("0"), owed - Decimal(str(parent.filled_size - filled_before)))
+
+    def execute(self, symbol: str, side: str, qty, arrival_price: float, strategy: str = "default",
+                algo: str = None) -> dict:
+        algo = (algo or EXEC_ALGO).lower()
+        side = str(side).lower()
+        _, qqty, err, notional = prepare_order(symbol, side, arrival_price, qty)
+        if err:
+            logger.info(f"Local reject {symbol} {side}: {err} (qty={qqty}, notional={notional})")
+            return {"status": "rejected_local", "reason": err, "symbol": symbol, "side": side}
+        if algo == "pov" and not volume_tracker.has_data(symbol):
+            logger.warning(f"⚠️ POV für {symbol} ohne Match-Daten – weiche auf TWAP aus")
+            algo = "twap"
+        parent = ParentOrder(symbol=symbol, side=side, qty=qqty, arrival_price=float(arrival_price),
+                             strategy=strategy, algo=algo)
+        db = get_db()
+        db.upsert_parent(parent.parent_id, symbol, side, algo, str(qqty), parent.arrival_price)
+        logger.info(f"🧩 Parent {parent.parent_id} {algo.upper()} {side.upper()} {qqty} {symbol} @ Arrival {arrival_price}")
+        deadline = parent.started + EXEC_MAX_DURATION_SEC
+        try:
+            if algo == "pov":
+                self._run_pov(parent, EXEC_POV_RATE, deadline)
+            else:
+                self._run_twap(parent, min(EXEC_TWAP_DURATION_SEC, EXEC_MAX_DURATION_SEC), EXEC_TWAP_SLICES)
+            if parent.remaining > 0:
+                qty_rest = self._child_qty(parent, parent.remaining, self._reference_price(parent))
+                if qty_rest is not None:
+                    logger.info(f"⏱️ Parent {parent.parent_id}: Rest {parent.remaining} in einer Order")
+                    self._slice(parent, qty_rest, self._reference_price(parent))
+        finally:
+            state = "filled" if parent.remaining <= 0 else ("partial" if parent.filled_size > 0 else "cancelled")
+            db.update_parent(parent.parent_id, parent.filled_size, parent.filled_funds, state, len(parent.order_ids))
+        result = self.record(parent, sender="exec_algo", order_type=algo)
+        logger.info(
+            f"📊 Parent {parent.parent_id} {symbol}: {parent.filled_size}/{parent.qty} in {len(parent.order_ids)} Slices, "
+            f"VWAP {parent.avg_price} vs Arrival {parent.arrival_price} → {parent.slippage_bps} bps"
+        )
+        return result
+
+
+def should_slice(symbol: str, price: float, qty) -> bool:
+    """Parent-Order lohnt sich erst ab EXEC_ALGO_MIN_NOTIONAL (und nur mit aktivem Algo)."""
+    try:
+        return EXEC_ALGO in ("twap", "pov") and float(price) * float(qty) >= EXEC_ALGO_MIN_NOTIONAL
+    except (TypeError, ValueError):
+        return False
+
+
+def submit_parent_order(api, symbol: str, side: str, qty, arrival_price: float, strategy: str = "default",
+                        algo: str = None, on_done: Callable[[dict], None] = None) -> Optional[threading.Thread]:
+    """Startet eine gesliced Parent-Order im Hintergrund; on_done erhält das Ergebnis-Dict."""
+    return run_in_background(
+        symbol,
+        lambda: ExecutionScheduler(api).execute(symbol, side, qty, arrival_price, strategy=strategy, algo=algo),
+        on_done=on_done,
+        name="parent",
+    )
+
+
+def parent_report(limit: int = 50) -> dict:
+    """Kennzahlen der letzten Parent-Orders: Anzahl, Füllgrad und mittlere Slippage (bps) gegenüber Arrival."""
+    rows = get_db().list_parents(limit=limit)
+    slippages = []
+    for row in rows:
+        if row["filled_qty"] and row["filled_funds"] and row["arrival_price"]:
+            vwap = row["filled_funds"] / row["filled_qty"]
+            diff = (row["arrival_price"] - vwap) if row["side"] == "buy" else (vwap - row["arrival_price"])
+            slippages.append(diff / row["arrival_price"] * 10_000)
+    return {
+        "parents": len(rows),
+        "filled": sum(1 for r in rows if r["state"] == "filled"),
+        "avg_slippage_bps": round(sum(slippages) / len(slippages), 2) if slippages else None,
+    }
@@ -1,8 +1,7 @@
 
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_DOWN
-from typing import Optional, Dict
-import threading
+from typing import Optional, Dict, Iterable, List, Tuple
 
 @dataclass(frozen=True)
 class SymbolFilters:
@@ -12,50 +11,76 @@ class SymbolFilters:
     min_qty: Optional[Decimal] = None
     max_qty: Optional[Decimal] = None
 
+def _quantize(value, inc: Decimal) -> Decimal:
+    return (Decimal(str(value)) / inc).to_integral_value(rounding=ROUND_DOWN) * inc
+
+def _check(f: SymbolFilters, price: Decimal, qty: Decimal):
+    notional = price * qty
+    if f.min_funds and notional < f.min_funds:
+        return f"below_min_funds: {notional} < {f.min_funds}", notional
+    if f.min_qty and qty < f.min_qty:
+        return f"below_min_qty: {qty} < {f.min_qty}", notional
+    if f.max_qty and qty > f.max_qty:
+        return f"above_max_qty: {qty} > {f.max_qty}", notional
+    return None, notional
+
 class FilterBook:
+    """
+    Rundungs-/Validierungsregeln je Symbol. Der Bestand ist ein unveränderlicher Snapshot,
+    den set_all() in einem Schritt austauscht – Leser brauchen kein Lock.
+    """
+
     def __init__(self):
         self._by_symbol: Dict[str, SymbolFilters] = {}
-        self._lock = threading.RLock()
 
     def set_all(self, mapping: Dict[str, SymbolFilters]):
-        with self._lock:
-            self._by_symbol = dict(mapping)
+        # Neues dict bauen, dann Referenz tauschen (atomar); der alte Snapshot wird nie verändert
+        self._by_symbol = dict(mapping)
 
     def get(self, symbol: str) -> Optional[SymbolFilters]:
-        with self._lock:
-            return self._by_symbol.get(symbol)
+        return self._by_symbol.get(symbol)
 
     def quantize_price(self, symbol: str, price) -> Decimal:
-        f = self.get(symbol)
+        f = self._by_symbol.get(symbol)
         if not f: return Decimal(str(price))
-        inc = f.price_increment
-        q = (Decimal(str(price)) / inc).to_integral_value(rounding=ROUND_DOWN) * inc
-        return q
+        return _quantize(price, f.price_increment)
 
     def quantize_qty(self, symbol: str, qty) -> Decimal:
-        f = self.get(symbol)
+        f = self._by_symbol.get(symbol)
         if not f: return Decimal(str(qty))
-        inc = f.base_increment
-        q = (Decimal(str(qty)) / inc).to_integral_value(rounding=ROUND_DOWN) * inc
-        return q
+        return _quantize(qty, f.base_increment)
 
     def validate(self, symbol: str, side: str, price: Decimal, qty: Decimal):
-        f = self.get(symbol)
+        f = self._by_symbol.get(symbol)
         if not f:
             return None, (price * qty)
-        notional = price * qty
-        if f.min_funds and notional < f.min_funds:
-            return f"below_min_funds: {notional} < {f.min_funds}", notional
-        if f.min_qty and qty < f.min_qty:
-            return f"below_min_qty: {qty} < {f.min_qty}", notional
-        if f.max_qty and qty > f.max_qty:
-            return f"above_max_qty: {qty} > {f.max_qty}", notional
-        return None, notional
+        return _check(f, price, qty)
+
+    @staticmethod
+    def _prepare(f: Optional[SymbolFilters], px, qty):
+        if not f:
+            qpx, qqty = Decimal(str(px)), Decimal(str(qty))
+            return qpx, qqty, None, qpx * qqty
+        qpx = _quantize(px, f.price_increment)
+        qqty = _quantize(qty, f.base_increment)
+        err, notional = _check(f, qpx, qqty)
+        return qpx, qqty, err, notional
+
+    def prepare(self, symbol: str, px, qty):
+        """Runden + Validieren mit einer einzigen Snapshot-Abfrage."""
+        return self._prepare(self._by_symbol.get(symbol), px, qty)
+
+    def prepare_many(self, orders: Iterable[Tuple[str, str, object, object]]) -> List[tuple]:
+        """
+        Mehrere Intents [(symbol, side, px, qty), ...] auf einem gemeinsamen Snapshot (z.B. für
+        send_orders_batch). Je Intent derselbe Decimal-Pfad wie prepare(), nur ohne erneute Snapshot-Abfrage.
+        Rückgabe in Eingabereihenfolge: [(qpx, qqty, err, notional), ...]
+        """
+        snapshot = self._by_symbol
+        prepare = self._prepare
+        return [prepare(snapshot.get(symbol), px, qty) for symbol, _side, px, qty in orders]
 
 filter_book = FilterBook()
 
 def prepare_order(symbol: str, side: str, px, qty):
-    qpx = filter_book.quantize_price(symbol, px)
-    qqty = filter_book.quantize_qty(symbol, qty)
-    err, notional = filter_book.validate(symbol, side, qpx, qqty)
-    return qpx, qqty, err, notional
+    return filter_book.prepare(symbol, px, qty)
@@ -1,13 +1,12 @@
 import os
 PRICE_LOG_LEVEL = os.getenv("PRICE_LOG_LEVEL", "WARNING").upper()
+# Höchstalter (Sekunden) der Preise für Positions-Restore
+POSITION_PRICE_MAX_AGE_SEC = float(os.getenv("POSITION_PRICE_MAX_AGE_SEC", "30"))
 
 def clear_api_caches():
     """Invalidiert alle lru_caches (z.B. nach Neustart)."""
     try:
-        KuCoinClientWrapper.get_symbol_price.cache_clear()
-        KuCoinClientWrapper.get_symbol_min_order_size.cache_clear()
         KuCoinClientWrapper.get_candles.cache_clear()
-        KuCoinClientWrapper.get_historical_candles.cache_clear()
         logger.info("✅ API-Caches wurden invalidiert.")
     except Exception as e:
         logger.warning(f"⚠️ Fehler beim Invalidieren der API-Caches: {e}")
@@ -18,10 +17,14 @@ import time
 from core.logger_setup import setup_logger
 from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
-from decimal import Decimal
-from core.filters import filter_book, SymbolFilters
+from core.price_service import price_service
+from core.symbol_catalog import symbol_catalog
+from core.single_flight import SingleFlight
 logger = setup_logger(__name__)
 
+# Ein gemeinsamer Coalescer für alle Wrapper-Instanzen (Wallet, Order, ATR, ... erzeugen eigene Wrapper)
+api_single_flight = SingleFlight()
+
 # Runtime Mode Resolution
 from config.config import MODE as CONFIG_MODE
 RUNTIME_MODE = os.getenv("MODE", CONFIG_MODE).upper()
@@ -73,12 +76,18 @@ class KuCoinClientWrapper:
             KUCOIN_API_PASSPHRASE,
             KUCOIN_SANDBOX
         )
+        # Gleichzeitige identische Lese-Requests (Balances, Ticker-Snapshot) teilen sich einen Aufruf
+        self._single_flight = api_single_flight
 
     def get_account_list(self):
         if RUNTIME_MODE != "LIVE":
             logger.info("ℹ️ PAPER-Mode: get_account_list übersprungen – gebe leere Liste zurück.")
             return []
-        return safe_api_call(self.user.get_account_list)
+        return self._single_flight.do("accounts", lambda: safe_api_call(self.user.get_account_list))
+
+    def get_coalescing_stats(self) -> dict:
+        """Zähler des Request-Coalescings (wie viele REST-Aufrufe eingespart wurden)."""
+        return self._single_flight.stats()
 
     def get_open_positions(self, symbols: list = None):
         """
@@ -87,6 +96,10 @@ class KuCoinClientWrapper:
         try:
             accounts = self.get_account_list()
             positions = []
+            # Ein einziger Bulk-Request statt eines Ticker-Abrufs pro Währung
+            snapshot = self.get_all_tickers() if any(
+                acc.get('currency') != "USDT" and float(acc.get('balance', 0)) > 0 for acc in accounts
+            ) else {}
             for acc in accounts:
                 if acc['type'] == 'trade' and float(acc['balance']) > 0:
                     symbol_currency = acc['currency']
@@ -97,7 +110,7 @@ class KuCoinClientWrapper:
                     amount = float(acc['balance'])
                     # Hole den aktuellen Preis (gegen USDT)
                     market_symbol = f"{symbol_currency}-USDT"
-                    price = self.get_symbol_price(market_symbol)
+                    price = snapshot.get(market_symbol) or self.get_symbol_price(market_symbol, max_age=POSITION_PRICE_MAX_AGE_SEC)
                     positions.append({
                         "symbol": market_symbol,
                         "amount": amount,
@@ -144,14 +157,52 @@ class KuCoinClientWrapper:
             logger.info(f"⚠️ Fehler beim Abrufen der Kontoübersicht: {e}")
             return {}
 
-    @lru_cache(maxsize=128)
-    def get_symbol_price(self, symbol: str):
-        """Returns latest market price for the trading pair with WebSocket fallback (cached)."""
+    def get_symbol_price(self, symbol: str, max_age: float = None):
+        """
+        Returns latest market price for the trading pair via the central PriceService:
+        WebSocket price if younger than `max_age` seconds, otherwise a (coalesced) REST call.
+        """
+        return price_service.get_price(symbol, max_age=max_age)
+
+    def get_all_tickers(self) -> dict:
+        """
+        Holt alle Ticker mit einem einzigen Aufruf von /api/v1/market/allTickers.
+        Gibt {symbol: letzter Preis} zurück und aktualisiert dabei den PriceService.
+        """
+        try:
+            from core.rate_limiter import market_data_limiter
+
+            def _fetch():
+                market_data_limiter.acquire()
+                return safe_api_call(self.market.get_all_tickers)
+
+            raw = self._single_flight.do("allTickers", _fetch)
+            tickers = raw.get("ticker", []) if isinstance(raw, dict) else (raw or [])
+            ts = None
+            if isinstance(raw, dict) and raw.get("time"):
+                ts = float(raw["time"]) / 1000.0
+            prices = {}
+            for t in tickers:
+                try:
+                    price = float(t.get("last") or 0)
+                except (TypeError, ValueError):
+                    continue
+                if price > 0:
+                    prices[t.get("symbol")] = price
+                    price_service.update(t.get("symbol"), price, ts)
+            logger.info(f"📊 allTickers-Snapshot: {len(prices)} Preise geladen")
+            return prices
+        except Exception as e:
+            logger.warning(f"⚠️ Fehler beim Abrufen des allTickers-Snapshots: {e}")
+            return {}
+
+    def _fetch_rest_price(self, symbol: str):
+        """Holt den Ticker-Preis per REST (ohne Cache). Gibt None zurück, wenn alle Versuche scheitern."""
         if PRICE_LOG_LEVEL == "DEBUG":
             logger.debug(f"Abrufen des aktuellen Preises für {symbol} (REST).")
         elif PRICE_LOG_LEVEL == "INFO":
             logger.info(f"Abrufen des aktuellen Preises für {symbol} (REST).")
-        for _ in range(3):
+        for attempt in range(3):
             try:
                 ticker = self.market.get_ticker(symbol=symbol)
                 if PRICE_LOG_LEVEL == "DEBUG":
@@ -162,25 +213,19 @@ class KuCoinClientWrapper:
             except Exception as e:
                 if PRICE_LOG_LEVEL in ("DEBUG", "INFO"):
                     logger.info(f"⚠️ Fehler beim Abrufen des Preises für {symbol} (REST): {e}")
-                # Versuche Fallback: Hole letzten bekannten WebSocket-Preis
-                try:
-                    from core.kucoin_api import get_last_ws_price as ws_fallback_price
-                    ws_price = ws_fallback_price(symbol)
-                    if ws_price:
-                        if PRICE_LOG_LEVEL == "DEBUG":
-                            logger.info(f"⚠️ Verwende WebSocket-Fallback-Preis für {symbol}: {ws_price}")
-                        return ws_price
-                except Exception as we:
-                    if PRICE_LOG_LEVEL == "DEBUG":
-                        logger.warning(f"⚠️ WebSocket-Fallback nicht verfügbar für {symbol}: {we}")
-                time.sleep(1)
-        return 0.0
+                if attempt < 2:
+                    time.sleep(1)
+        return None
 
-    def create_market_order(self, symbol, side, size, funds=None):
+    def create_market_order(self, symbol, side, size, funds=None, client_oid: str = None):
         if RUNTIME_MODE != "LIVE":
             logger.info(f"ℹ️ PAPER-Mode: create_market_order({symbol}, {side}, size={size}, funds={funds}) übersprungen – kein Live-Call.")
-            return {"orderId": "paper-skip", "symbol": symbol, "side": side, "size": size, "funds": funds}
-        return safe_api_call(self.trade.create_market_order, symbol=symbol, side=side, size=size, funds=funds)
+            return {"orderId": "paper-skip", "symbol": symbol, "side": side, "size": size, "funds": funds, "clientOid": client_oid}
+        try:
+            # clientOid mitsenden, damit Order-Events (privater WS) der eigenen Order zugeordnet werden können
+            return safe_api_call(self.trade.create_market_order, symbol=symbol, side=side, clientOid=client_oid or "", size=size, funds=funds)
+        finally:
+            self._single_flight.invalidate("accounts")
 
     def create_limit_order(self, symbol, side, price, size, client_oid: str = None,
                            time_in_force: str = "GTC", post_only: bool = False,
@@ -192,29 +237,58 @@ class KuCoinClientWrapper:
         if RUNTIME_MODE != "LIVE":
             logger.info(f"ℹ️ PAPER-Mode: create_limit_order({symbol}, {side}, price={price}, size={size}) übersprungen – kein Live-Call.")
             return {"orderId": "paper-skip", "symbol": symbol, "side": side, "price": price, "size": size, "clientOid": client_oid}
-        # Ensure strings for price/size to avoid Decimal serialization quirks
-        return safe_api_call(
-            self.trade.create_limit_order,
-            symbol=symbol,
-            side=side,
-            price=str(price),
-            size=str(size),
-            clientOid=client_oid,
-            timeInForce=time_in_force,
-            postOnly=post_only,
-            hidden=hidden,
-            iceberg=iceberg,
-            remark=remark,
-            cancelAfter=cancel_after,
-        )
+        try:
+            # Ensure strings for price/size to avoid Decimal serialization quirks
+            return safe_api_call(
+                self.trade.create_limit_order,
+                symbol=symbol,
+                side=side,
+                price=str(price),
+                size=str(size),
+                clientOid=client_oid,
+                timeInForce=time_in_force,
+                postOnly=post_only,
+                hidden=hidden,
+                iceberg=iceberg,
+                remark=remark,
+                cancelAfter=cancel_after,
+            )
+        finally:
+            # Nach einer Order sind gecachte Balances veraltet
+            self._single_flight.invalidate("accounts")
+
+    def create_bulk_orders(self, symbol: str, order_list: list):
+        """
+        Mehrere Limit-Orders eines Symbols in einem Request (/api/v1/orders/multi, max. 5 pro Request).
+        Jede Order trägt ihre eigene clientOid. Gibt die Ergebnisliste (status success/fail je Order) zurück.
+        """
+        if RUNTIME_MODE != "LIVE":
+            logger.info(f"ℹ️ PAPER-Mode: create_bulk_orders({symbol}, {len(order_list)} Orders) übersprungen – kein Live-Call.")
+            return [{"id": "paper-skip", "clientOid": o.get("clientOid"), "status": "success", **o} for o in order_list]
+        try:
+            resp = safe_api_call(self.trade.create_bulk_orders, symbol, order_list)
+        finally:
+            self._single_flight.invalidate("accounts")
+        if isinstance(resp, dict):
+            resp = resp.get("data", resp.get("items", []))
+        return resp or []
+
+    def cancel_order(self, order_id: str):
+        """Storniert eine offene Order per KuCoin orderId. Gibt die Liste der stornierten IDs zurück."""
+        if RUNTIME_MODE != "LIVE":
+            logger.info(f"ℹ️ PAPER-Mode: cancel_order({order_id}) übersprungen – kein Live-Call.")
+            return {"cancelledOrderIds": [order_id]}
+        try:
+            return safe_api_call(self.trade.cancel_order, order_id)
+        finally:
+            self._single_flight.invalidate("accounts")
 
-    @lru_cache(maxsize=128)
     def get_symbol_min_order_size(self, symbol: str):
+        """Mindestbestellmenge (baseMinSize) aus dem SymbolCatalog."""
         try:
-            symbol_data = safe_api_call(Market().get_symbol_list)
-            for item in symbol_data:
-                if item["symbol"] == symbol:
-                    return float(item["baseMinSize"])
+            info = _catalog_entry(symbol)
+            if info and info.base_min_size is not None:
+                return float(info.base_min_size)
             return None
         except Exception as e:
             logger.info(f"⚠️ Fehler beim Abrufen der Mindestbestellmenge für {symbol}: {e}")
@@ -369,45 +443,20 @@ class KuCoinClientWrapper:
             logger.warning(f"⚠️ Fehler beim Abrufen der Candle-Daten für {symbol}: {e}")
             return pd.DataFrame()
 
-    @lru_cache(maxsize=32)
     def get_historical_candles(self, symbol: str, interval: str = "1min", start: int = None, end: int = None) -> pd.DataFrame:
         """
-        Holt historische OHLCV-Daten in Batches (z.B. 30 Tage 1min) und gibt einen DataFrame zurück.
-        start und end sind UNIX-Timestamps in Sekunden.
+        Holt historische OHLCV-Daten (z.B. 30 Tage 1min) über den CandleDownloader und gibt einen DataFrame zurück.
+        start und end sind UNIX-Timestamps in Sekunden. Bereits lokal vorhandene Zeiträume werden nicht erneut geladen.
         """
         try:
-            all_data = []
-            batch_limit = 1500  # KuCoin max candles per request
-            if not end:
-                end = int(time.time())
-            if not start:
-                # Standard: 30 Tage zurück
-                start = end - 30 * 24 * 60 * 60
-
-            current_end = end
-            while current_end > start:
-                current_start = max(start, current_end - batch_limit * 60)  # Schrittgröße
-                raw = safe_api_call(
-                    self.market.get_kline,
-                    symbol=symbol,
-                    kline_type=interval,
-                    startAt=current_start,
-                    endAt=current_end
-                )
-                if not raw:
-                    break
-                all_data.extend(raw)
-                current_end = current_start - 1
-                time.sleep(0.2)  # Rate-Limit-Schonung
-
-            if not all_data:
+            from core.candle_store import candle_downloader, COLUMNS
+            rows = candle_downloader.fetch(symbol, interval, start=start, end=end)
+            if not rows:
                 logger.warning(f"⚠️ Keine historischen Candle-Daten für {symbol}.")
                 return pd.DataFrame()
 
-            df = pd.DataFrame(all_data, columns=[
-                "timestamp", "open", "close", "high", "low", "volume", "turnover"
-            ])
-            df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"]), unit='ms')
+            df = pd.DataFrame(rows, columns=COLUMNS)
+            df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"]), unit='s')
             df = df.astype({
                 "open": float,
                 "close": float,
@@ -416,7 +465,7 @@ class KuCoinClientWrapper:
                 "volume": float
             })
             df = df.sort_values("timestamp").reset_index(drop=True)
-            return df.copy()
+            return df
         except Exception as e:
             logger.error(f"❌ Fehler beim Abrufen historischer Candles für {symbol}: {e}")
             return pd.DataFrame()
@@ -443,41 +492,22 @@ class KuCoinClientWrapper:
 
 # --- Filters-Helper für Phase 1 ---
 
-def _kucoin_symbol_to_filters(symbol_info: dict) -> SymbolFilters:
-    # KuCoin liefert priceIncrement/baseIncrement und bei Spot minFunds
-    price_inc = Decimal(str(symbol_info.get("priceIncrement") or symbol_info.get("tickSize") or "0.00000001"))
-    base_inc  = Decimal(str(symbol_info.get("baseIncrement") or symbol_info.get("lotSize") or "0.00000001"))
-    min_funds = symbol_info.get("minFunds")
-    try:
-        min_funds = Decimal(str(min_funds)) if min_funds is not None else None
-    except Exception:
-        min_funds = None
-    return SymbolFilters(price_increment=price_inc, base_increment=base_inc, min_funds=min_funds)
+def _catalog_entry(symbol: str):
+    """Symbol aus dem Katalog; lädt Snapshot bzw. REST nur, solange der Katalog leer ist."""
+    if not len(symbol_catalog):
+        symbol_catalog.ensure_loaded()
+    return symbol_catalog.get(symbol)
 
 
 def refresh_symbol_filters(api_client=None) -> None:
     """
-    Lädt die KuCoin-Symbolliste und füllt den globalen FilterBook-Cache.
-    Wenn `api_client` nicht angegeben ist, wird temporär ein KuCoinClientWrapper instanziiert.
+    Lädt die KuCoin-Symbolliste in den SymbolCatalog und füllt damit den globalen FilterBook-Cache.
+    Wenn `api_client` nicht angegeben ist, wird der Modul-Client verwendet.
     """
-    client = api_client or KuCoinClientWrapper()
-    try:
-        data = client.get_symbols()
-        mapping = {}
-        for s in data or []:
-            sym = (s.get("symbol") or s.get("symbolName") or s.get("name") or "").upper()
-            if not sym:
-                continue
-            mapping[sym] = _kucoin_symbol_to_filters(s)
-        if mapping:
-            filter_book.set_all(mapping)
-            logger.info(f"Loaded {len(mapping)} KuCoin symbol filters into FilterBook")
-        else:
-            logger.warning("No KuCoin symbols returned; FilterBook not updated.")
-    except Exception as e:
-        logger.warning(f"Could not refresh KuCoin symbol filters: {e}")
+    symbol_catalog.refresh(api_client)
 
 kucoin_client = KuCoinClientWrapper()
+price_service.set_rest_fetcher(kucoin_client._fetch_rest_price)
 
 # Direkter Export der Funktion
 def get_open_positions(symbols: list = None):
@@ -486,6 +516,10 @@ def get_open_positions(symbols: list = None):
 def get_live_account_balances():
     return kucoin_client.get_live_account_balances()
 
+def get_price_snapshot() -> dict:
+    """Bulk-Preise aller Symbole ({symbol: preis}) mit einem einzigen REST-Aufruf."""
+    return kucoin_client.get_all_tickers()
+
 # Convenience helpers for fills and order details
 def get_fills(order_id: str = None, symbol: str = None):
     return kucoin_client.get_fills(order_id=order_id, symbol=symbol)
@@ -494,18 +528,18 @@ def get_order(order_id: str = None, client_oid: str = None):
     return kucoin_client.get_order(order_id=order_id, client_oid=client_oid)
 
 # Utility-Funktion für aktuellen Preis
-def get_price(symbol: str) -> float:
+def get_price(symbol: str, max_age: float = None) -> float:
     """
-    Holt den aktuellen Marktpreis für ein Symbol.
+    Holt den aktuellen Marktpreis für ein Symbol (WS-Preis, REST nur wenn älter als `max_age`).
     """
-    return kucoin_client.get_symbol_price(symbol)
+    return kucoin_client.get_symbol_price(symbol, max_age=max_age)
 
 # Neue Utility-Funktion: get_symbol_price
-def get_symbol_price(symbol: str) -> float:
+def get_symbol_price(symbol: str, max_age: float = None) -> float:
     """
     Liefert den aktuellen Preis für ein Symbol (z.B. ADA-USDT).
     """
-    return kucoin_client.get_symbol_price(symbol)
+    return kucoin_client.get_symbol_price(symbol, max_age=max_age)
 
 # Utility: Zugriff auf letzten WebSocket-Preis
 def get_last_ws_price(symbol: str) -> float:
@@ -521,7 +555,7 @@ def get_last_ws_price(symbol: str) -> float:
 # --- Utility: Get symbol filters for a specific symbol ---
 def get_symbol_filters(symbol: str):
     """
-    Returns a dict of filter values for the given symbol from KuCoin, or empty dict if not found.
+    Returns a dict of filter values for the given symbol from the SymbolCatalog, or empty dict if not found.
     {
       "baseMinSize": float or None,
       "baseIncrement": float or None,
@@ -530,22 +564,8 @@ def get_symbol_filters(symbol: str):
     }
     """
     try:
-        all_symbols = kucoin_client.get_symbols()
-        for entry in all_symbols or []:
-            sym = (entry.get("symbol") or "").upper()
-            if sym == symbol.upper():
-                def safe_float(val):
-                    try:
-                        return float(val)
-                    except Exception:
-                        return None
-                return {
-                    "baseMinSize": safe_float(entry.get("baseMinSize")),
-                    "baseIncrement": safe_float(entry.get("baseIncrement")),
-                    "priceIncrement": safe_float(entry.get("priceIncrement")),
-                    "minFunds": safe_float(entry.get("minFunds")),
-                }
-        return {}
+        info = _catalog_entry(symbol)
+        return info.as_legacy_dict() if info else {}
     except Exception as e:
         logger.warning(f"Fehler beim Abrufen von Symbol-Filtern für {symbol}: {e}")
         return {}
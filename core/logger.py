@@ -4,7 +4,6 @@ import os
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 from config.config import get_config
-import json
 from datetime import datetime
 import threading
 
@@ -92,22 +91,17 @@ if LOG_TO_TELEGRAM:
 
 def log_trade_to_json(order):
     """
-    Speichert einen Trade als JSON-Zeile in data/order_history.json.
+    Speichert einen Trade als Zeile im Order-Journal (data/order_history.jsonl).
     """
     if not order:
         return
 
     from config.config import MODE
-    json_log_path = "data/order_history.json"
-    os.makedirs(os.path.dirname(json_log_path), exist_ok=True)
-
-    # Duplikatprüfung: nicht erneut speichern, wenn identische Order bereits existiert
-    if os.path.exists(json_log_path):
-        with open(json_log_path, "r") as f:
-            if any(order.get("info") and order.get("info") in line for line in f):
-                return
+    from core.order_journal import order_journal
 
     entry = {
+        # Duplikatprüfung über den Journal-Index: info (falls vorhanden) dient als id
+        "id": order.get("id") or order.get("info"),
         "timestamp": datetime.utcnow().isoformat(),
         "pair": order.get("symbol"),
         "side": order.get("side"),
@@ -118,9 +112,7 @@ def log_trade_to_json(order):
         "info": order.get("info", ""),
     }
 
-    with open(json_log_path, "a") as f:
-        json.dump(entry, f)
-        f.write("\n")
+    order_journal.append(entry)
 
 
 # Loggt eine Info-Nachricht
@@ -17,6 +17,8 @@ from core.utils import load_json_file
 from core.logger import log_info, log_error, log_debug
 from core.recovery import auto_backup
 from core.wallet import get_dynamic_position_size, calculate_position_size
+from core.order_tracker import order_tracker, ORDER_FILL_TIMEOUT_SEC
+from core.balance_ledger import balance_ledger, reservation_for
 SILENT_MODE = get_config("SILENT_MODE") == "true"
 LOG_TO_TELEGRAM = get_config("LOG_TO_TELEGRAM") == "true"
 
@@ -49,13 +51,12 @@ def run_with_timeout(func, args=(), kwargs={}, timeout=10):
     return result[0]
 from core.wallet import Wallet, notify_live_balance, wallet_instance, safe_update_balance
 from core.wallet import get_live_balance
-from core.filters import prepare_order
+from core.filters import filter_book, prepare_order
 from core.ids import make_client_oid
 from core.orders_db import get_db
+from core.order_journal import order_journal, ORDER_JOURNAL_FILE
 
-import uuid
-
-ORDER_HISTORY_FILE = "data/order_history.json"
+ORDER_HISTORY_FILE = ORDER_JOURNAL_FILE
 
 order_history_lock = threading.Lock()
 
@@ -106,14 +107,11 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
 
     qty_mode = (os.getenv("QTY_MODE") or "auto").lower()  # "auto" | "base" | "quote"
 
+    # Verfügbares USDT aus dem lokalen Balance-Ledger (Börsen-Snapshot minus laufende Reservierungen)
     avail_usdt = None
-    if is_live and side.lower() == "buy" and hasattr(api, "get_account_list"):
+    if is_live and side.lower() == "buy":
         try:
-            bals = api.get_account_list()
-            for b in bals:
-                if str(b.get("currency")).upper() == "USDT" and str(b.get("type", "")).lower() == "trade":
-                    avail_usdt = float(b.get("available", 0.0))
-                    break
+            avail_usdt = balance_ledger.available("USDT", api)
         except Exception:
             avail_usdt = None
 
@@ -157,17 +155,7 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
     if is_live and str(side).lower() == "sell":
         try:
             base_ccy = symbol.split('-')[0]
-            avail_base = None
-            if hasattr(api, "get_account_list"):
-                try:
-                    bals = api.get_account_list()
-                except Exception:
-                    bals = None
-                if bals:
-                    for b in bals:
-                        if str(b.get("currency")).upper() == base_ccy.upper() and str(b.get("type", "")).lower() == "trade":
-                            avail_base = float(b.get("available", 0.0))
-                            break
+            avail_base = balance_ledger.available(base_ccy, api)
             if avail_base is not None:
                 sell_margin = float(os.getenv("KUCOIN_SELL_SAFETY_MARGIN", "0.999"))
                 max_sell = avail_base * sell_margin
@@ -278,8 +266,21 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
         log_info(f"idempotent-skip {symbol} {side} oid={oid} state={existing_state}")
         return {"status": "duplicate", "clientOid": oid}
 
-    # Reservierung: markiere diese OID als gesendet
-    odb.upsert_sent(oid, symbol, side, str(qpx), str(qqty))
+    # Mittel im Balance-Ledger reservieren (gleichzeitige Entries sehen die Reservierung sofort)
+    if is_live:
+        res_ccy, res_amount = reservation_for(symbol, side, qpx, qqty)
+        if not balance_ledger.reserve(oid, res_ccy, res_amount):
+            log_info(f"Local reject {symbol} {side}: insufficient_balance ({res_amount:.8f} {res_ccy} > {balance_ledger.available(res_ccy)})")
+            return {"status": "rejected_local", "reason": "insufficient_balance", "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+
+    # Reservierung: markiere diese OID als gesendet – ohne gespeicherte Reservierung kein Versand
+    try:
+        odb.upsert_sent(oid, symbol, side, str(qpx), str(qqty))
+    except Exception as e:
+        balance_ledger.release(oid)
+        log_info(f"Local reject {symbol} {side}: orders_db_error ({e}) oid={oid}")
+        return {"status": "rejected_local", "reason": "orders_db_error", "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+    order_tracker.register(oid, symbol, side, qqty)
 
     # 3) Senden mit clientOid und State pflegen
     try:
@@ -315,7 +316,7 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
             # 1) Wrapper method
             if hasattr(api, "create_market_order"):
                 try:
-                    return api.create_market_order(symbol, side, size=str(use_size))
+                    return api.create_market_order(symbol, side, size=str(use_size), client_oid=oid)
                 except TypeError:
                     return api.create_market_order(symbol=symbol, side=side, size=str(use_size))
             # 2) Generic place_order on wrapper
@@ -355,17 +356,14 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
         else:
             resp = _submit_limit()
 
-        new_state = "open"
-        if isinstance(resp, dict) and resp.get("status") in ("done", "filled", "success"):
-            new_state = "filled"
-
         exch_id = None
         if isinstance(resp, dict):
             exch_id = resp.get("orderId") or resp.get("order_id") or resp.get("data") or resp.get("id")
             resp["clientOid"] = oid
             resp.setdefault("id", exch_id or oid)
 
-        odb.set_state(oid, new_state, exch_id)
+        # Zustand sent → ack; weitere Übergänge (partial/filled/cancelled) kommen aus dem Order-Feed
+        order_tracker.ack(oid, exch_id)
 
         # --- Enrich + persist order locally (history + positions) ---
         try:
@@ -380,22 +378,19 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
             qpx_final = float(qpx)
             qqty_final = float(qqty)
 
-            # Try to fetch order details to obtain dealSize/dealFunds/fee
+            # Fill aus dem Order-Feed abwarten (dealSize/dealFunds); REST nur zum Abgleich
             order_details = {}
             trade_client = getattr(api, "trade", None)
-            if trade_client and exch_id:
-                for _i in range(3):
-                    try:
-                        od = trade_client.get_order_details(exch_id)
-                        if isinstance(od, dict):
-                            order_details = od
-                        deal_size_tmp = float((order_details.get("dealSize") or 0) or 0)
-                        status_tmp = str(order_details.get("status") or "").lower()
-                        if deal_size_tmp > 0 or status_tmp in ("done", "filled", "success", "finished"):
-                            break
-                    except Exception:
-                        pass
-                    time.sleep(0.35)
+            if exch_id:
+                tracked = None
+                if order_tracker.feed_active:
+                    tracked = order_tracker.wait_for_fill(oid, timeout=ORDER_FILL_TIMEOUT_SEC)
+                if tracked is None or tracked.filled_size <= 0:
+                    # Ohne Feed wie bisher bis zu 3 Abfragen, mit Feed genügt ein Abgleich
+                    attempts = 1 if order_tracker.feed_active else 3
+                    tracked = order_tracker.reconcile(oid, trade_client, attempts=attempts)
+                if tracked is not None:
+                    order_details = tracked.as_details()
 
             # Build order dict with fallbacks
             now_ts = int(time.time())
@@ -656,60 +651,206 @@ def send_order_prepared(api, symbol: str, side: str, price, qty, strategy: str =
             if getter is not None:
                 q = getter(oid)
                 if q:
-                    odb.set_state(oid, "open", q.get("orderId") or q.get("id"))
+                    order_tracker.ack(oid, q.get("orderId") or q.get("id"))
                     q["clientOid"] = oid
                     q.setdefault("id", q.get("orderId") or q.get("id") or oid)
                     return q
         except Exception:
             pass
-        odb.set_state(oid, "failed", last_error=str(e))
+        order_tracker.fail(oid, str(e))
         raise e
 
-def load_order_history():
-    if not os.path.exists(ORDER_HISTORY_FILE):
-        try:
-            with open(ORDER_HISTORY_FILE, "w") as f:
-                json.dump([], f, indent=4)
-        except Exception as e:
-            log_error(f"❌ Fehler beim Erstellen von order_history.json: {e}")
-        return []
+# KuCoin /api/v1/orders/multi: nur Limit-Orders, max. 5 pro Request
+BULK_ORDER_CHUNK = 5
+# Market-Intents werden im Batch als marktfähige IOC-Limit-Orders mit dieser Preisgrenze gesendet
+BATCH_MARKET_SLIPPAGE = float(os.getenv("BATCH_MARKET_SLIPPAGE", "0.005"))
+
 
+def send_orders_batch(api, intents: list, strategy: str = "default"):
+    """
+    Batch-Variante von send_order_prepared für mehrere gleichzeitige Orders (z.B. Exits mehrerer Positionen).
+    intents: [{"symbol", "side", "price", "qty", "order_type"}, ...]
+      - Runden/Validieren aller Intents auf einem FilterBook-Snapshot (prepare_many)
+      - clientOid je Intent aus dem Intent selbst (wie send_order_prepared) – ein Retry in anderer
+        Reihenfolge ergibt dieselben OIDs; identische Intents im selben Batch gelten als Duplikat
+      - Duplicate-Check und Reservierung im OrdersDB, ein Multi-Order-Request pro Symbol (max. 5 je Request)
+      - Fills gemeinsam über den OrderTracker abwarten, REST nur zum Abgleich; verbucht wird nur,
+        was tatsächlich gefüllt wurde (IOC-Orders ohne Fill erscheinen nicht in der Historie)
+    Rückgabe: Liste von Responses in der Reihenfolge der Intents; gesendete Orders mit filledSize/avgPrice.
+    """
+    try:
+        runtime_mode = (os.getenv("RUNTIME_MODE") or get_config("MODE") or "PAPER").upper()
+    except Exception:
+        runtime_mode = "PAPER"
+    is_live = runtime_mode == "LIVE"
+
+    results = [None] * len(intents)
+    prepared = []
+    odb = get_db()
+    ttl_sec = int(os.getenv("IDEMPOTENCY_TTL_SEC", "5"))
     try:
-        with open(ORDER_HISTORY_FILE, "r") as f:
-            content = f.read().strip()
-            if not content:
-                return []
+        odb.purge_stale(ttl_sec=ttl_sec)
+    except Exception:
+        pass
 
+    # 1) Runden (ein FilterBook-Snapshot für den ganzen Batch), clientOid, Duplicate-Check
+    raw = []
+    for intent in intents:
+        symbol = intent["symbol"]
+        side = str(intent["side"]).lower()
+        price = float(intent["price"])
+        qty = float(intent["qty"])
+        if intent.get("order_type", "market") == "market":
+            # Marktfähige Limit-Order: Preisgrenze jenseits des aktuellen Kurses, IOC
+            price = price * (1 - BATCH_MARKET_SLIPPAGE) if side == "sell" else price * (1 + BATCH_MARKET_SLIPPAGE)
+        if is_live and side == "sell":
+            # Wie send_order_prepared: SELL auf verfügbare Basis-Balance kappen (vermeidet 200004)
             try:
-                result = json.loads(content)
-                return result
-            except json.JSONDecodeError as e:
-                log_error(f"❌ JSONDecodeError beim Parsen als Array: {e}")
-                orders = []
-                f.seek(0)
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                        orders.append(obj)
-                    except json.JSONDecodeError as e2:
-                        log_error(f"⚠️ Ungültige JSON-Zeile: {e2} | Inhalt: {line[:80]}")
-                        continue
-                return orders
+                avail_base = balance_ledger.available(symbol.split('-')[0], api)
+                if avail_base is not None:
+                    qty = min(qty, max(0.0, avail_base * float(os.getenv("KUCOIN_SELL_SAFETY_MARGIN", "0.999"))))
+            except Exception:
+                pass
+        raw.append((symbol, side, price, qty))
+    seen = set()
+    for idx, ((symbol, side, _, _), (qpx, qqty, err, notional)) in enumerate(zip(raw, filter_book.prepare_many(raw))):
+        order_type = intents[idx].get("order_type", "market")
+        if err:
+            log_info(f"Local reject {symbol} {side}: {err} (px={qpx}, qty={qqty}, notional={notional})")
+            results[idx] = {"status": "rejected_local", "reason": err, "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+            continue
+        oid = make_client_oid(symbol, side, str(qpx), str(qqty), strategy=strategy)
+        if oid in seen or odb.exists_active(oid, ttl_sec=ttl_sec):
+            log_info(f"idempotent-skip {symbol} {side} oid={oid}")
+            results[idx] = {"status": "duplicate", "clientOid": oid}
+            continue
+        seen.add(oid)
+        if is_live:
+            res_ccy, res_amount = reservation_for(symbol, side, qpx, qqty)
+            if not balance_ledger.reserve(oid, res_ccy, res_amount):
+                log_info(f"Local reject {symbol} {side}: insufficient_balance ({res_amount:.8f} {res_ccy})")
+                results[idx] = {"status": "rejected_local", "reason": "insufficient_balance", "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+                continue
+        prepared.append((idx, symbol, side, qpx, qqty, oid, order_type))
+
+    # 2) Reservierung im OrdersDB – ohne gespeicherte Reservierung kein Versand
+    failed = odb.upsert_sent_many([(oid, symbol, side, str(qpx), str(qqty)) for _, symbol, side, qpx, qqty, oid, _ in prepared]) if prepared else {}
+    for idx, symbol, side, qpx, qqty, oid, _ in prepared:
+        if oid in failed:
+            balance_ledger.release(oid)
+            log_info(f"Local reject {symbol} {side}: orders_db_error ({failed[oid]}) oid={oid}")
+            results[idx] = {"status": "rejected_local", "reason": "orders_db_error", "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+        else:
+            order_tracker.register(oid, symbol, side, qqty)
+    prepared = [item for item in prepared if item[5] not in failed]
+    if not prepared:
+        return results
+
+    # 3) Ein Multi-Order-Request pro Symbol (in Blöcken)
+    by_symbol = {}
+    for item in prepared:
+        by_symbol.setdefault(item[1], []).append(item)
+    acked = []
+    for symbol, items in by_symbol.items():
+        for start in range(0, len(items), BULK_ORDER_CHUNK):
+            chunk = items[start:start + BULK_ORDER_CHUNK]
+            order_list = [{
+                "clientOid": oid,
+                "side": side,
+                "type": "limit",
+                "price": str(qpx),
+                "size": str(qqty),
+                "timeInForce": "IOC" if order_type == "market" else "GTC",
+            } for _, _, side, qpx, qqty, oid, order_type in chunk]
+            try:
+                resp_list = api.create_bulk_orders(symbol, order_list)
+            except Exception as e:
+                log_error(f"❌ Multi-Order für {symbol} fehlgeschlagen: {e}")
+                for idx, _, side, qpx, qqty, oid, _ in chunk:
+                    order_tracker.fail(oid, str(e))
+                    results[idx] = {"status": "failed", "reason": str(e), "clientOid": oid, "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+                continue
+            by_oid = {r.get("clientOid"): r for r in resp_list if isinstance(r, dict)}
+            for idx, _, side, qpx, qqty, oid, order_type in chunk:
+                r = by_oid.get(oid) or {}
+                if str(r.get("status", "")).lower() == "success" and (r.get("id") or r.get("orderId")):
+                    exch_id = r.get("id") or r.get("orderId")
+                    order_tracker.ack(oid, exch_id)
+                    results[idx] = {"orderId": exch_id, "id": exch_id, "clientOid": oid, "status": "ack",
+                                    "symbol": symbol, "side": side, "price": str(qpx), "size": str(qqty)}
+                    acked.append((idx, symbol, side, qpx, qqty, oid, order_type))
+                else:
+                    reason = r.get("failMsg") or "no result"
+                    order_tracker.fail(oid, reason)
+                    results[idx] = {"status": "failed", "reason": reason, "clientOid": oid, "symbol": symbol, "side": side, "price": str(qpx), "qty": str(qqty)}
+
+    # 4) Fills gemeinsam abwarten (eine Frist für den ganzen Batch), danach Abgleich + lokale Historie
+    deadline = time.time() + ORDER_FILL_TIMEOUT_SEC
+    trade_client = getattr(api, "trade", None)
+    filled = []
+    for idx, symbol, side, qpx, qqty, oid, order_type in acked:
+        tracked = None
+        if order_tracker.feed_active:
+            tracked = order_tracker.wait_for_fill(oid, timeout=max(0.0, deadline - time.time()))
+        if tracked is None:
+            tracked = order_tracker.reconcile(oid, trade_client, attempts=1 if order_tracker.feed_active else 3)
+        filled_qty = tracked.filled_size if tracked is not None else 0.0
+        results[idx]["filledSize"] = filled_qty
+        results[idx]["avgPrice"] = tracked.avg_price if tracked is not None else None
+        if tracked is not None:
+            results[idx]["status"] = tracked.state
+        if filled_qty <= 0:
+            # IOC ohne Fill (oder Stand unbekannt): nichts verbuchen
+            log_info(f"ℹ️ Batch-Order {oid} {side.upper()} {symbol}: kein Fill ({results[idx]['status']})")
+            continue
+        filled.append((symbol, side, filled_qty))
+        eff_price = tracked.avg_price or float(qpx)
+        try:
+            record_order({
+                "id": results[idx]["id"],
+                "timestamp": int(time.time()),
+                "mode": "LIVE" if is_live else "PAPER",
+                "symbol": symbol,
+                "side": side.upper(),
+                "quantity": filled_qty,
+                "price": eff_price,
+                "fee": round(float(tracked.fee), 8) if tracked.fee is not None else 0.0,
+                "entry_price": eff_price if side == "buy" else None,
+                "sl": None,
+                "tp": None,
+                "pnl": 0.0,
+                "reason": strategy or "default",
+                "trade_tags": {"sender": "send_orders_batch", "order_type": order_type, "clientOid": oid},
+            })
+        except Exception as e:
+            log_error(f"⚠️ Batch-Order {oid} konnte nicht gespeichert werden: {e}")
 
+    if filled and is_live:
+        try:
+            lines = [f"{side.upper()} {symbol} {qty:.6f}" for symbol, side, qty in filled]
+            send_telegram_message("📦 LIVE-BATCH\n" + "\n".join(lines), to_channel=True, to_private=True)
+        except Exception as _te:
+            log_error(f"⚠️ Telegram-Benachrichtigung in send_orders_batch fehlgeschlagen: {_te}")
+    return results
+
+
+def load_order_history():
+    """Gesamte Order-Historie als Liste (für große Historien besser order_journal.iter_orders() streamen)."""
+    try:
+        return order_journal.load_all()
     except Exception as e:
-        log_error(f"❌ Allgemeiner Fehler beim Laden von order_history.json: {e}")
+        log_error(f"❌ Allgemeiner Fehler beim Laden der Order-Historie: {e}")
         return []
 
 def save_order_history(data: list):
+    """Übernimmt die Einträge ins Order-Journal (neue ids anhängen, bestehende als neue Version)."""
     try:
         with order_history_lock:
-            with open(ORDER_HISTORY_FILE, "w") as f:
-                json.dump(data, f, indent=4, cls=DecimalEncoder)
+            for entry in data:
+                if isinstance(entry, dict):
+                    order_journal.upsert(entry)
     except Exception as e:
-        log_error(f"❌ s_o_h: Fehler beim Speichern von order_history.json: {e}")
+        log_error(f"❌ s_o_h: Fehler beim Speichern der Order-Historie: {e}")
         import traceback
         log_error(traceback.format_exc())
 
@@ -784,9 +925,8 @@ def record_order(order, position=None):
                     entry_fee_val = float(position.get("entry_fee", position.get("fee", 0.0)) or 0.0)
                 if not entry_price:
                     # Fallback: letzte passende BUY Order laden
-                    from core.utils import load_json_file
-                    history = load_json_file("data/order_history.json")
-                    from core.order import find_last_matching_buy
+                    # Nur die Einträge des Symbols streamen (Sekundärindex) statt der ganzen Historie
+                    history = list(order_journal.iter_orders(symbol=trade["symbol"]))
                     buy_entry = find_last_matching_buy(trade["symbol"], trade["quantity"], history)
                     if buy_entry:
                         entry_price = buy_entry.get("price", 0)
@@ -837,8 +977,7 @@ def round_down_quantity(quantity, step_size):
     return (quantity // step_size) * step_size
 
 def log_trade_to_json(trade_data):
-    # Ensures trade_data has the required fields and appends to JSON list file, preventing duplicates.
-    from core.utils import load_json_file, save_json_file
+    # Ensures trade_data has the required fields and appends to the order journal, preventing duplicates.
     # Only include required fields for the trade log
     trade_id = trade_data.get("id")
     if not trade_id:
@@ -865,15 +1004,11 @@ def log_trade_to_json(trade_data):
         "pnl_usdt": trade_data.get("pnl_usdt"),
         "reason": trade_data.get("reason"),
     }
-    # Load current order history
-    order_history = load_json_file("data/order_history.json")
-    existing_ids = {t["id"] for t in order_history if isinstance(t, dict) and "id" in t}
+    # Duplikatprüfung über den Journal-Index (O(1))
     from core.logger import log_info
-    if trade["id"] in existing_ids:
+    if not order_journal.append(trade):
         log_info(f"⚠️ Duplikat mit ID {trade['id']} erkannt – wird nicht gespeichert.")
         return
-    from core.utils import append_to_json_file
-    append_to_json_file("data/order_history.json", trade)
     log_info(f"💾 Trade gespeichert (keine Duplikate): {trade['id']}")
 
 def place_market_order_live(pair, side, quantity=None, price=None, position_manager=None, entry_reason: str = None):
@@ -0,0 +1,314 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+ORDER_JOURNAL_FILE = os.getenv("ORDER_JOURNAL_FILE", "data/order_history.jsonl")
+ORDER_JOURNAL_INDEX = os.getenv("ORDER_JOURNAL_INDEX", "data/db/order_journal.db")
+# Altes Format (JSON-Array bzw. gemischt mit JSON-Zeilen); wird beim ersten Start einmalig übernommen
+LEGACY_ORDER_HISTORY_FILE = "data/order_history.json"
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+
+def _ts_seconds(value) -> Optional[int]:
+    """Normalisiert Zeitstempel (Sekunden, Millisekunden oder ISO-String) auf UNIX-Sekunden."""
+    if value is None:
+        return None
+    try:
+        ts = float(value)
+        return int(ts / 1000) if ts > 1e12 else int(ts)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+class OrderJournal:
+    """
+    Append-only Order-Historie: eine JSON-Zeile pro Eintrag, nie komplett neu geschrieben.
+    Ein SQLite-Index (id → Offset, plus symbol/Zeit) erlaubt O(1)-Duplikatprüfung,
+    Einzelabfragen und gefiltertes Streamen. Updates hängen eine neue Version an;
+    der Index zeigt immer auf die jüngste Version einer id.
+    Mehrere Prozesse (Bot, Cronjobs) synchronisieren sich über ein flock auf der Journal-Datei.
+    """
+
+    def __init__(self, path: str = ORDER_JOURNAL_FILE, index_path: str = ORDER_JOURNAL_INDEX,
+                 migrate_legacy: bool = True):
+        self.path = path
+        self.index_path = index_path
+        # Nur das Bot-Journal übernimmt die alte order_history.json (nicht z.B. Backtest-Journale)
+        self.migrate_legacy = migrate_legacy
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._ids = {}
+        self._end = 0
+        self._ready = False
+
+    # --- Index ---
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            con = sqlite3.connect(self.index_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries("
+                " id TEXT PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL,"
+                " symbol TEXT, side TEXT, ts INTEGER)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_entries_symbol_ts ON entries(symbol, ts)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries(ts)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_entries_offset ON entries(offset)")
+            self._local.con = con
+        return con
+
+    def _index_rows(self, rows: list) -> None:
+        if rows:
+            self._conn().executemany(
+                "INSERT OR REPLACE INTO entries(id, offset, length, symbol, side, ts) VALUES(?,?,?,?,?,?)", rows
+            )
+
+    def _ensure_ready(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if not os.path.exists(self.path):
+                open(self.path, "a").close()
+            with open(self.path, "rb") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    self._reload_ids()
+                    self._sync_tail(f)
+                    if self.migrate_legacy and os.path.getsize(self.path) == 0:
+                        self._migrate_legacy()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            self._ready = True
+
+    def _reload_ids(self) -> None:
+        con = self._conn()
+        self._ids = dict(con.execute("SELECT id, offset FROM entries").fetchall())
+        row = con.execute("SELECT MAX(offset + length) FROM entries").fetchone()
+        self._end = int(row[0] or 0)
+
+    def _sync_tail(self, f) -> None:
+        """Indiziert Zeilen hinter dem bekannten Ende (Absturz zwischen Append und Index oder anderer Prozess)."""
+        size = os.fstat(f.fileno()).st_size
+        if size < self._end:
+            # Journal wurde geleert/ersetzt → Index neu aufbauen
+            self._conn().execute("DELETE FROM entries")
+            self._ids, self._end = {}, 0
+        if size == self._end:
+            return
+        f.seek(self._end)
+        rows = []
+        offset = self._end
+        for raw in f:
+            length = len(raw)
+            if not raw.endswith(b"\n"):
+                break  # unvollständige letzte Zeile (Schreibvorgang läuft/abgebrochen)
+            try:
+                entry = json.loads(raw)
+                rows.append(self._row(entry, offset, length))
+                self._ids[entry["id"]] = offset
+            except (ValueError, KeyError, TypeError):
+                pass
+            offset += length
+        self._index_rows(rows)
+        self._end = offset
+
+    @staticmethod
+    def _row(entry: dict, offset: int, length: int) -> tuple:
+        return (entry["id"], offset, length, entry.get("symbol") or entry.get("pair"),
+                str(entry.get("side") or "").upper() or None, _ts_seconds(entry.get("timestamp")))
+
+    def _migrate_legacy(self) -> None:
+        if not os.path.exists(LEGACY_ORDER_HISTORY_FILE) or os.path.abspath(LEGACY_ORDER_HISTORY_FILE) == os.path.abspath(self.path):
+            return
+        entries = []
+        try:
+            with open(LEGACY_ORDER_HISTORY_FILE, "r") as f:
+                content = f.read().strip()
+            if content:
+                try:
+                    data = json.loads(content)
+                    entries = data if isinstance(data, list) else []
+                except json.JSONDecodeError:
+                    # Gemischtes Format (Array + JSON-Zeilen aus core.logger) zeilenweise retten
+                    for line in content.splitlines():
+                        try:
+                            obj = json.loads(line.strip().rstrip(","))
+                            if isinstance(obj, dict):
+                                entries.append(obj)
+                        except json.JSONDecodeError:
+                            continue
+        except Exception as e:
+            logger.warning(f"⚠️ Alte Order-Historie konnte nicht gelesen werden: {e}")
+            return
+        count = 0
+        for entry in entries:
+            if isinstance(entry, dict) and self._append_locked(entry):
+                count += 1
+        os.replace(LEGACY_ORDER_HISTORY_FILE, LEGACY_ORDER_HISTORY_FILE + ".migrated")
+        logger.info(f"📦 {count} Einträge aus {LEGACY_ORDER_HISTORY_FILE} ins Order-Journal übernommen")
+
+    # --- Schreiben ---
+    def _append_locked(self, entry: dict, replace: bool = False) -> bool:
+        if not entry.get("id"):
+            entry["id"] = entry.get("clientOid") or entry.get("info") or uuid.uuid4().hex
+        if entry["id"] in self._ids and not replace:
+            return False
+        line = (json.dumps(entry, default=_json_default, separators=(",", ":")) + "\n").encode()
+        with open(self.path, "ab") as f:
+            f.write(line)
+            f.flush()
+        offset = self._end
+        self._index_rows([self._row(entry, offset, len(line))])
+        self._ids[entry["id"]] = offset
+        self._end = offset + len(line)
+        return True
+
+    def _locked(self, fn):
+        self._ensure_ready()
+        with self._lock, open(self.path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._sync_tail(f)
+                return fn()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, entry: dict) -> bool:
+        """Hängt einen Eintrag an. False, wenn die id bereits existiert (O(1))."""
+        return self._locked(lambda: self._append_locked(dict(entry)))
+
+    def append_many(self, entries) -> int:
+        """Hängt mehrere Einträge unter einem Lock an; gibt die Anzahl neuer Einträge zurück."""
+        return self._locked(lambda: sum(1 for e in entries if self._append_locked(dict(e))))
+
+    def upsert(self, entry: dict) -> bool:
+        """Schreibt eine neue Version des Eintrags (ersetzt eine bestehende id)."""
+        return self._locked(lambda: self._append_locked(dict(entry), replace=True))
+
+    def update(self, entry_id: str, fields: dict) -> bool:
+        """Ergänzt/ändert Felder eines bestehenden Eintrags (neue Version am Ende)."""
+        def _do():
+            current = self._read_at(self._ids[entry_id]) if entry_id in self._ids else None
+            if current is None:
+                return False
+            current.update(fields)
+            return self._append_locked(current, replace=True)
+        return self._locked(_do)
+
+    def clear(self) -> None:
+        """Leert Journal und Index (z.B. tägliches Zurücksetzen)."""
+        def _do():
+            with open(self.path, "wb"):
+                pass
+            self._conn().execute("DELETE FROM entries")
+            self._ids, self._end = {}, 0
+        self._locked(_do)
+
+    def compact(self) -> None:
+        """Schreibt nur die jeweils jüngste Version jeder id neu (entfernt überholte Versionen)."""
+        def _do():
+            tmp_path = self.path + ".tmp"
+            rows = []
+            offset = 0
+            with open(tmp_path, "wb") as out:
+                for entry in self._iter_locked():
+                    line = (json.dumps(entry, default=_json_default, separators=(",", ":")) + "\n").encode()
+                    out.write(line)
+                    rows.append(self._row(entry, offset, len(line)))
+                    offset += len(line)
+            os.replace(tmp_path, self.path)
+            con = self._conn()
+            con.execute("BEGIN")
+            con.execute("DELETE FROM entries")
+            self._index_rows(rows)
+            con.execute("COMMIT")
+            self._reload_ids()
+        self._locked(_do)
+
+    # --- Lesen ---
+    def _read_at(self, offset: int) -> Optional[dict]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            try:
+                return json.loads(f.readline())
+            except ValueError:
+                return None
+
+    def contains(self, entry_id: str) -> bool:
+        self._ensure_ready()
+        if entry_id in self._ids:
+            return True
+        # Andere Prozesse können angehängt haben
+        return self._conn().execute("SELECT 1 FROM entries WHERE id=?", (entry_id,)).fetchone() is not None
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        self._ensure_ready()
+        row = self._conn().execute("SELECT offset FROM entries WHERE id=?", (entry_id,)).fetchone()
+        return self._read_at(row[0]) if row else None
+
+    def exists_like(self, symbol: str, side: str, timestamp) -> bool:
+        """Sekundärindex-Abfrage: gibt es bereits einen Eintrag mit gleichem Symbol/Side/Zeitstempel?"""
+        self._ensure_ready()
+        return self._conn().execute(
+            "SELECT 1 FROM entries WHERE symbol=? AND side=? AND ts=? LIMIT 1",
+            (symbol, str(side or "").upper() or None, _ts_seconds(timestamp)),
+        ).fetchone() is not None
+
+    def _iter_locked(self, symbol: str = None, since=None, until=None, reverse: bool = False) -> Iterator[dict]:
+        clauses, params = [], []
+        if symbol:
+            clauses.append("symbol=?")
+            params.append(symbol)
+        if since is not None:
+            clauses.append("ts>=?")
+            params.append(_ts_seconds(since))
+        if until is not None:
+            clauses.append("ts<=?")
+            params.append(_ts_seconds(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if reverse else "ASC"
+        cur = self._conn().execute(f"SELECT offset, length FROM entries{where} ORDER BY offset {order}", params)
+        with open(self.path, "rb") as f:
+            for offset, length in cur:
+                f.seek(offset)
+                try:
+                    yield json.loads(f.read(length))
+                except ValueError:
+                    continue
+
+    def iter_orders(self, symbol: str = None, since=None, until=None, reverse: bool = False) -> Iterator[dict]:
+        """Streamt Einträge (jüngste Version je id) in Schreibreihenfolge, optional nach Symbol/Zeit gefiltert."""
+        # Kein Datei-Lock: der Index verweist nur auf vollständig geschriebene Zeilen
+        self._ensure_ready()
+        yield from self._iter_locked(symbol, since, until, reverse)
+
+    def load_all(self) -> list:
+        return list(self.iter_orders())
+
+
+order_journal = OrderJournal()
@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Wartezeit auf das Fill-Event aus dem privaten WS-Feed, bevor per REST abgeglichen wird
+ORDER_FILL_TIMEOUT_SEC = float(os.getenv("ORDER_FILL_TIMEOUT_SEC", "1.5"))
+# Wie lange abgeschlossene Orders im Speicher bleiben (für späte Events/Abfragen)
+ORDER_TRACKER_RETAIN_SEC = float(os.getenv("ORDER_TRACKER_RETAIN_SEC", "300"))
+# Gebührenraten für Fills aus dem Feed (Match-Events enthalten keine Gebühr, nur maker/taker);
+# ein REST-Abgleich ersetzt die Schätzung durch die tatsächliche Gebühr
+FEED_TAKER_FEE = float(os.getenv("TAKER_FEE", "0.001"))
+FEED_MAKER_FEE = float(os.getenv("MAKER_FEE", os.getenv("TAKER_FEE", "0.001")))
+
+TERMINAL_STATES = ("filled", "cancelled", "failed")
+# Zustände dürfen nur vorwärts laufen: sent → ack → partial → filled/cancelled/failed
+_STATE_RANK = {"sent": 0, "ack": 1, "partial": 2, "filled": 3, "cancelled": 3, "failed": 3}
+
+
+@dataclass
+class TrackedOrder:
+    client_oid: str
+    symbol: str
+    side: str
+    size: float = 0.0
+    order_id: Optional[str] = None
+    state: str = "sent"
+    filled_size: float = 0.0
+    filled_funds: float = 0.0
+    fee: Optional[float] = None
+    # True, solange die Gebühr aus den Feed-Raten geschätzt ist (nicht von der Börse gemeldet)
+    fee_estimated: bool = False
+    last_error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    # Erste Annahme durch die Börse (ack/partial/filled/cancelled); None, solange nur gesendet
+    acked_at: Optional[float] = None
+    trade_ids: set = field(default_factory=set, repr=False)
+    done: Future = field(default_factory=Future, repr=False)
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        if self.filled_size > 0 and self.filled_funds > 0:
+            return round(self.filled_funds / self.filled_size, 8)
+        return None
+
+    def as_details(self) -> dict:
+        """Im Format von get_order_details() (dealSize/dealFunds/fee/status) für bestehende Aufrufer."""
+        return {
+            "id": self.order_id,
+            "clientOid": self.client_oid,
+            "dealSize": self.filled_size,
+            "dealFunds": self.filled_funds,
+            "fee": self.fee,
+            "status": self.state,
+        }
+
+
+class OrderTracker:
+    """
+    Zustandsautomat für eigene Orders, indiziert nach clientOid.
+    Gespeist von Börsen-Events (privater WS-Kanal /spotMarket/tradeOrdersV2), inkl. Füllstand,
+    Durchschnittspreis und Gebühr; REST wird nur zum Abgleich genutzt, wenn kein Event rechtzeitig eintrifft.
+    Jeder Zustandswechsel wird in den OrdersDB geschrieben.
+    """
+
+    def __init__(self):
+        self._orders: Dict[str, TrackedOrder] = {}
+        self._by_order_id: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._feed_active = threading.Event()
+        self._listeners = []
+
+    # --- Feed-Status ---
+    def set_feed_active(self, active: bool) -> None:
+        """Wird vom privaten WS-Stream gesetzt; ohne Feed wird sofort per REST abgeglichen."""
+        if active:
+            self._feed_active.set()
+        else:
+            self._feed_active.clear()
+
+    @property
+    def feed_active(self) -> bool:
+        return self._feed_active.is_set()
+
+    def add_listener(self, fn) -> None:
+        """fn(TrackedOrder) wird bei jedem Endzustand (filled/cancelled/failed) aufgerufen."""
+        self._listeners.append(fn)
+
+    # --- Registrierung & Übergänge ---
+    def register(self, client_oid: str, symbol: str, side: str, size) -> TrackedOrder:
+        with self._lock:
+            self._prune()
+            order = self._orders.get(client_oid)
+            if order is None:
+                order = TrackedOrder(client_oid=client_oid, symbol=symbol, side=str(side).lower(), size=float(size or 0))
+                self._orders[client_oid] = order
+            return order
+
+    def get(self, client_oid: str) -> Optional[TrackedOrder]:
+        return self._orders.get(client_oid)
+
+    def is_own(self, order_id: str) -> bool:
+        """True, wenn die Börsen-orderId zu einer eigenen (getrackten) Order gehört."""
+        return bool(order_id) and order_id in self._by_order_id
+
+    def _lookup(self, client_oid: str = None, order_id: str = None) -> Optional[TrackedOrder]:
+        if client_oid and client_oid in self._orders:
+            return self._orders[client_oid]
+        if order_id and order_id in self._by_order_id:
+            return self._orders.get(self._by_order_id[order_id])
+        return None
+
+    def _transition(self, order: TrackedOrder, state: str, order_id: str = None, last_error: str = None) -> None:
+        new_id = bool(order_id) and not order.order_id
+        if new_id:
+            order.order_id = order_id
+            self._by_order_id[order_id] = order.client_oid
+        order.updated = time.time()
+        if order.state in TERMINAL_STATES or _STATE_RANK.get(state, 0) <= _STATE_RANK.get(order.state, 0):
+            if new_id:
+                self._persist(order)
+            return
+        order.state = state
+        order.last_error = last_error
+        if order.acked_at is None and state != "failed":
+            order.acked_at = order.updated
+        self._persist(order)
+        if state in TERMINAL_STATES:
+            for fn in self._listeners:
+                try:
+                    fn(order)
+                except Exception as e:
+                    logger.warning(f"⚠️ Order-Listener für {order.client_oid} fehlgeschlagen: {e}")
+            if not order.done.done():
+                order.done.set_result(order)
+
+    def _persist(self, order: TrackedOrder) -> None:
+        try:
+            from core.orders_db import get_db
+            get_db().set_state(order.client_oid, order.state, order.order_id, last_error=order.last_error)
+        except Exception as e:
+            logger.warning(f"⚠️ OrdersDB-Update für {order.client_oid} fehlgeschlagen: {e}")
+
+    def ack(self, client_oid: str, order_id: str = None) -> None:
+        """Börse hat die Order angenommen (REST-Antwort oder 'received'/'open'-Event)."""
+        with self._lock:
+            order = self._orders.get(client_oid)
+            if order is not None:
+                self._transition(order, "ack", order_id)
+
+    def fail(self, client_oid: str, error: str = None) -> None:
+        with self._lock:
+            order = self._orders.get(client_oid)
+            if order is not None:
+                self._transition(order, "failed", last_error=error)
+
+    # --- Börsen-Events ---
+    def on_event(self, data: dict) -> None:
+        """
+        Verarbeitet ein Event aus /spotMarket/tradeOrdersV2.
+        type: received | open | match | update | filled | canceled
+        """
+        if not isinstance(data, dict):
+            return
+        with self._lock:
+            order = self._lookup(data.get("clientOid"), data.get("orderId"))
+            if order is None:
+                return
+            order_id = data.get("orderId")
+            ev_type = str(data.get("type") or "").lower()
+            filled_size = data.get("filledSize")
+            if ev_type == "match":
+                trade_id = data.get("tradeId")
+                if trade_id is None or trade_id not in order.trade_ids:
+                    if trade_id is not None:
+                        order.trade_ids.add(trade_id)
+                    try:
+                        m_size = float(data.get("matchSize") or 0)
+                        m_price = float(data.get("matchPrice") or 0)
+                        order.filled_funds += m_size * m_price
+                        if filled_size is None:
+                            order.filled_size += m_size
+                        self._add_match_fee(order, data, m_size * m_price)
+                    except (TypeError, ValueError):
+                        pass
+            if filled_size is not None:
+                try:
+                    order.filled_size = max(order.filled_size, float(filled_size))
+                except (TypeError, ValueError):
+                    pass
+            if ev_type == "filled":
+                self._transition(order, "filled", order_id)
+            elif ev_type == "canceled":
+                self._transition(order, "cancelled", order_id)
+            elif order.filled_size > 0:
+                self._transition(order, "partial", order_id)
+            elif ev_type in ("received", "open", "update"):
+                self._transition(order, "ack", order_id)
+
+    @staticmethod
+    def _add_match_fee(order: TrackedOrder, data: dict, funds: float) -> None:
+        """Gebühr eines Matches: gemeldete Gebühr, sonst Betrag × Maker-/Taker-Rate (liquidity)."""
+        if data.get("fee") is not None:
+            fee = float(data["fee"])
+        else:
+            rate = FEED_MAKER_FEE if str(data.get("liquidity") or "").lower() == "maker" else FEED_TAKER_FEE
+            fee = funds * rate
+            order.fee_estimated = True
+        order.fee = (order.fee or 0.0) + fee
+
+    # --- REST-Abgleich ---
+    def apply_rest(self, client_oid: str, details: dict) -> Optional[TrackedOrder]:
+        """Übernimmt den Stand aus get_order_details() (dealSize/dealFunds/fee/isActive/cancelExist)."""
+        with self._lock:
+            order = self._orders.get(client_oid)
+            if order is None or not isinstance(details, dict):
+                return order
+            try:
+                deal_size = float(details.get("dealSize") or 0)
+                deal_funds = float(details.get("dealFunds") or 0)
+                if deal_size >= order.filled_size:
+                    order.filled_size = deal_size
+                    order.filled_funds = deal_funds
+                if details.get("fee") is not None:
+                    order.fee = float(details.get("fee"))
+                    order.fee_estimated = False
+            except (TypeError, ValueError):
+                pass
+            order_id = details.get("id") or details.get("orderId")
+            status = str(details.get("status") or "").lower()
+            is_active = details.get("isActive")
+            if details.get("cancelExist"):
+                self._transition(order, "cancelled", order_id)
+            elif is_active is False or status in ("done", "filled", "success", "finished"):
+                self._transition(order, "filled" if order.filled_size > 0 else "cancelled", order_id)
+            elif order.filled_size > 0:
+                self._transition(order, "partial", order_id)
+            else:
+                self._transition(order, "ack", order_id)
+            return order
+
+    def reconcile(self, client_oid: str, trade_client, attempts: int = 1, delay: float = 0.35) -> Optional[TrackedOrder]:
+        """Holt den Order-Stand per REST und speist ihn in den Zustandsautomaten."""
+        order = self._orders.get(client_oid)
+        if order is None or trade_client is None or not order.order_id:
+            return order
+        for attempt in range(max(1, attempts)):
+            try:
+                details = trade_client.get_order_details(order.order_id)
+                self.apply_rest(client_oid, details)
+                if order.state in TERMINAL_STATES or order.filled_size > 0:
+                    break
+            except Exception as e:
+                logger.info(f"⚠️ REST-Abgleich für {client_oid} fehlgeschlagen: {e}")
+            if attempt < attempts - 1:
+                time.sleep(delay)
+        return order
+
+    # --- Warten ---
+    def wait_for_fill(self, client_oid: str, timeout: float = ORDER_FILL_TIMEOUT_SEC) -> Optional[TrackedOrder]:
+        """Wartet bis zum Endzustand (filled/cancelled/failed). None bei Timeout oder unbekannter Order."""
+        order = self._orders.get(client_oid)
+        if order is None:
+            return None
+        try:
+            return order.done.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - ORDER_TRACKER_RETAIN_SEC
+        stale = [oid for oid, o in self._orders.items() if o.state in TERMINAL_STATES and o.updated < cutoff]
+        for oid in stale:
+            order = self._orders.pop(oid)
+            if order.order_id:
+                self._by_order_id.pop(order.order_id, None)
+
+
+order_tracker = OrderTracker()
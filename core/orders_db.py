@@ -1,11 +1,145 @@
 import os
+import queue
 import sqlite3
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from contextlib import contextmanager
+
+from core.ids import DEFAULT_BUCKET_MS
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Maximale Anzahl Schreibvorgänge pro Commit des Writer-Threads
+ORDERS_DB_BATCH_SIZE = int(os.getenv("ORDERS_DB_BATCH_SIZE", "64"))
+# Abgeschlossene Orders bleiben so lange in der Hot-Tabelle, danach Archiv (Tages-Tabellen)
+ORDERS_RETENTION_SEC = int(os.getenv("ORDERS_RETENTION_SEC", str(24 * 3600)))
+# Nie abgeschlossene Orders (ack/open/partial ohne weiteres Update) werden nach dieser Zeit ebenfalls archiviert
+ORDERS_STALE_ACTIVE_SEC = int(os.getenv("ORDERS_STALE_ACTIVE_SEC", str(7 * 24 * 3600)))
+ORDERS_ARCHIVE_INTERVAL_SEC = int(os.getenv("ORDERS_ARCHIVE_INTERVAL_SEC", "3600"))
+# Obergrenze des In-Memory-Filters für kürzlich reservierte clientOids
+RECENT_OID_MAX = int(os.getenv("RECENT_OID_MAX", "4096"))
+IDEMPOTENCY_TTL_SEC = int(os.getenv("IDEMPOTENCY_TTL_SEC", "5"))
+# WAL + synchronous=NORMAL: kein fsync pro Commit, nach Stromausfall gehen höchstens die letzten Commits verloren
+ORDERS_DB_SYNCHRONOUS = os.getenv("ORDERS_DB_SYNCHRONOUS", "NORMAL").upper()
+
+_SQL_UPSERT_SENT = """
+    INSERT INTO orders(client_oid, symbol, side, price, qty, state, ts_created, last_update)
+    VALUES(?,?,?,?,?, 'sent', ?, ?)
+    ON CONFLICT(client_oid) DO UPDATE SET
+      symbol=excluded.symbol,
+      side=excluded.side,
+      price=excluded.price,
+      qty=excluded.qty,
+      state='sent',
+      last_update=excluded.last_update
+"""
+_SQL_SET_STATE = """
+    UPDATE orders
+       SET state=?,
+           exch_order_id=COALESCE(?, exch_order_id),
+           last_error=?,
+           last_update=?
+     WHERE client_oid=?
+"""
+_SQL_GET = (
+    "SELECT client_oid, state, exch_order_id, symbol, side, price, qty, ts_created, "
+    "COALESCE(last_update, ts_created) FROM orders WHERE client_oid=?"
+)
+_ARCHIVE_CANDIDATES = """
+    (state IN ('filled','cancelled','failed') AND COALESCE(last_update, ts_created) < ?)
+    OR (state IN ('ack','open','partial') AND COALESCE(last_update, ts_created) < ?)
+"""
+_SQL_PURGE = "DELETE FROM orders WHERE state IN ('pending','sent') AND COALESCE(last_update, ts_created) < ?"
+_SQL_UPSERT_PARENT = """
+    INSERT INTO parent_orders(parent_id, symbol, side, algo, target_qty, filled_qty, filled_funds,
+                              arrival_price, state, children, ts_created, last_update)
+    VALUES(?,?,?,?,?, 0, 0, ?, 'working', 0, ?, ?)
+    ON CONFLICT(parent_id) DO UPDATE SET
+      target_qty=excluded.target_qty,
+      arrival_price=excluded.arrival_price,
+      last_update=excluded.last_update
+"""
+_SQL_UPDATE_PARENT = """
+    UPDATE parent_orders
+       SET filled_qty=?, filled_funds=?, state=?, children=?, last_update=?
+     WHERE parent_id=?
+"""
+_PARENT_COLUMNS = ("parent_id", "symbol", "side", "algo", "target_qty", "filled_qty", "filled_funds",
+                   "arrival_price", "state", "children", "ts_created", "last_update")
+
+
+_ACTIVE_STATES = ('open', 'partial', 'filled', 'ack')
+_PENDING_STATES = ('sent', 'pending')
+
+
+class RecentOidFilter:
+    """
+    Begrenzter In-Memory-Filter kürzlich reservierter clientOids vor dem OrdersDB.
+    Ein Treffer beantwortet exists_active() ohne SQLite; ein Fehlschlag fällt auf SQLite durch.
+    Einträge leben so lange, wie dieselbe clientOid neu erzeugt werden kann (Bucket)
+    bzw. wie exists_active() eine 'sent'-Reservierung als aktiv wertet (TTL).
+    """
+
+    def __init__(self, max_size: int = RECENT_OID_MAX,
+                 bucket_ms: int = DEFAULT_BUCKET_MS, ttl_sec: int = IDEMPOTENCY_TTL_SEC):
+        self.max_size = max_size
+        self.lifetime_ms = max(int(bucket_ms), int(ttl_sec) * 1000)
+        # client_oid -> (state, ts_ms, expires_ms); Einfügereihenfolge = Ablaufreihenfolge (LRU)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def remember(self, client_oid: str, state: str, ts_ms: int) -> None:
+        with self._lock:
+            if state in _ACTIVE_STATES or state in _PENDING_STATES:
+                self._entries[client_oid] = (state, ts_ms, ts_ms + self.lifetime_ms)
+                self._entries.move_to_end(client_oid)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                # failed/cancelled: nicht mehr aktiv → SQLite entscheidet
+                self._entries.pop(client_oid, None)
+
+    def check(self, client_oid: str, now_ms: int, ttl_sec: int) -> bool:
+        """True = sicher aktiv (Duplikat). False = unbekannt, SQLite fragen."""
+        with self._lock:
+            entry = self._entries.get(client_oid)
+            if entry is not None and entry[2] < now_ms:
+                del self._entries[client_oid]
+                entry = None
+            if entry is not None:
+                state, ts_ms, _ = entry
+                if state in _ACTIVE_STATES or ts_ms >= now_ms - ttl_sec * 1000:
+                    self._hits += 1
+                    return True
+            self._misses += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "lookups": lookups,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
 
 class OrdersDB:
+    """
+    Idempotenz-Store für clientOids (SQLite, WAL).
+    - Lesezugriffe nutzen eine langlebige Verbindung pro Thread und bleiben synchron
+    - Alle Schreibvorgänge laufen über einen einzigen Writer-Thread, der in kleinen Batches committet
+    - Noch nicht committete Änderungen liegen in einem Overlay, das Lesezugriffe berücksichtigen
+      (Lesen nach Schreiben ist damit auch vor dem Commit konsistent)
+    """
+
     @staticmethod
     def _now_ms() -> int:
         return int(time.time_ns() // 1_000_000)
@@ -19,118 +153,240 @@ class OrdersDB:
             # fallback to project root if the configured folder is not creatable
             self.path = Path("orders.db")
             self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        # client_oid -> (seq, Feld-Updates) der noch nicht committeten Schreibvorgänge
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._seq = 0
+        self.recent = RecentOidFilter()
+        self.archive_path = self.path.with_name(self.path.stem + "_archive" + self.path.suffix)
+        self._archive_stop = threading.Event()
+        self._archive_thread = None
         self._ensure()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="orders-db-writer")
+        self._writer.start()
 
     def _ensure(self):
+        con = self._conn()
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS orders(
+                client_oid TEXT PRIMARY KEY,
+                exch_order_id TEXT,
+                symbol TEXT,
+                side TEXT,
+                price TEXT,
+                qty TEXT,
+                state TEXT,
+                last_error TEXT,
+                ts_created INTEGER,
+                last_update INTEGER
+            )
+            """
+        )
+        # Add missing column if upgrading from older schema
         try:
-            self.path.parent.mkdir(parents=True, exist_ok=True)
-        except Exception:
+            con.execute("ALTER TABLE orders ADD COLUMN last_update INTEGER")
+        except sqlite3.OperationalError:
             pass
-        with self._conn() as con:
-            con.execute(
-                """
-                CREATE TABLE IF NOT EXISTS orders(
-                    client_oid TEXT PRIMARY KEY,
-                    exch_order_id TEXT,
-                    symbol TEXT,
-                    side TEXT,
-                    price TEXT,
-                    qty TEXT,
-                    state TEXT,
-                    last_error TEXT,
-                    ts_created INTEGER,
-                    last_update INTEGER
-                )
-                """
+        # Helpful index for cleanup/lookups
+        try:
+            con.execute("CREATE INDEX IF NOT EXISTS idx_orders_state_update ON orders(state, last_update)")
+        except sqlite3.OperationalError:
+            pass
+        # Parent-Orders der Ausführungsalgorithmen (TWAP/POV); Kind-Orders stehen in `orders`
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parent_orders(
+                parent_id TEXT PRIMARY KEY,
+                symbol TEXT,
+                side TEXT,
+                algo TEXT,
+                target_qty TEXT,
+                filled_qty REAL,
+                filled_funds REAL,
+                arrival_price REAL,
+                state TEXT,
+                children INTEGER,
+                ts_created INTEGER,
+                last_update INTEGER
             )
-            # Add missing column if upgrading from older schema
-            try:
-                con.execute("ALTER TABLE orders ADD COLUMN last_update INTEGER")
-            except sqlite3.OperationalError:
-                pass
-            # Helpful index for cleanup/lookups
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """Langlebige Verbindung des aufrufenden Threads (Statement-Cache bleibt erhalten)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(
+                self.path.resolve().as_posix(),
+                timeout=5.0,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=64,
+            )
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(f"PRAGMA synchronous={ORDERS_DB_SYNCHRONOUS}")
+            con.execute("PRAGMA temp_store=MEMORY")
+            self._local.con = con
+        return con
+
+    # --- Writer ---
+    def _submit(self, sql: str, params: tuple, client_oid: str = None, overlay: dict = None) -> Future:
+        fut = Future()
+        with self._pending_lock:
+            self._seq += 1
+            seq = self._seq
+            if client_oid is not None and overlay is not None:
+                _, fields = self._pending.get(client_oid, (0, {}))
+                merged = dict(fields)
+                merged.update({k: v for k, v in overlay.items() if v is not None or k == "last_error"})
+                self._pending[client_oid] = (seq, merged)
+        self._queue.put((seq, sql, params, client_oid, fut))
+        return fut
+
+    def _writer_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < ORDERS_DB_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            con = self._conn()
+            errors = [None] * len(batch)
             try:
-                con.execute("CREATE INDEX IF NOT EXISTS idx_orders_state_update ON orders(state, last_update)")
-            except sqlite3.OperationalError:
-                pass
-
-    @contextmanager
-    def _conn(self):
-        abs_path = self.path.resolve()
-        con = sqlite3.connect(abs_path.as_posix(), timeout=5.0, isolation_level=None, check_same_thread=False)
+                con.execute("BEGIN IMMEDIATE")
+                for _, sql, params, _, _ in batch:
+                    if sql is not None:
+                        con.execute(sql, params)
+                con.execute("COMMIT")
+            except Exception as e:
+                logger.warning(f"⚠️ OrdersDB-Batch fehlgeschlagen ({e}) – schreibe {len(batch)} Einträge einzeln")
+                try:
+                    con.execute("ROLLBACK")
+                except Exception:
+                    pass
+                # Einzeln nachschreiben, damit ein fehlerhafter Eintrag nicht den ganzen Batch verliert;
+                # jeder Aufrufer erhält das Ergebnis seines eigenen Eintrags
+                for i, item in enumerate(batch):
+                    try:
+                        if item[1] is not None:
+                            con.execute(item[1], item[2])
+                    except Exception as item_error:
+                        errors[i] = item_error
+            with self._pending_lock:
+                for seq, _, _, client_oid, _ in batch:
+                    entry = self._pending.get(client_oid)
+                    if entry is not None and entry[0] <= seq:
+                        del self._pending[client_oid]
+            for (_, _, _, _, fut), error in zip(batch, errors):
+                if error is None:
+                    fut.set_result(True)
+                else:
+                    fut.set_exception(error)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wartet, bis alle bisher eingereichten Schreibvorgänge committet sind."""
         try:
-            yield con
-        finally:
-            con.close()
+            return self._submit(None, ()).result(timeout=timeout)
+        except Exception:
+            return False
 
+    # --- Schreiben ---
     def upsert_sent(self, client_oid, symbol, side, price, qty):
+        """
+        Reservierung; wartet auf den Commit, damit andere Prozesse die OID sofort sehen.
+        Scheitert der Schreibvorgang, wird der SQLite-Fehler weitergereicht (Order nicht senden).
+        """
         now_ms = self._now_ms()
-        with self._lock, self._conn() as con:
-            con.execute(
-                """
-                INSERT INTO orders(client_oid, symbol, side, price, qty, state, ts_created, last_update)
-                VALUES(?,?,?,?,?, 'sent', ?, ?)
-                ON CONFLICT(client_oid) DO UPDATE SET
-                  symbol=excluded.symbol,
-                  side=excluded.side,
-                  price=excluded.price,
-                  qty=excluded.qty,
-                  state='sent',
-                  last_update=excluded.last_update
-                """,
-                (client_oid, symbol, side, str(price), str(qty), now_ms, now_ms)
-            )
-            row = con.execute("SELECT state FROM orders WHERE client_oid=?", (client_oid,)).fetchone()
-            return row and row[0]
+        self._submit(
+            _SQL_UPSERT_SENT,
+            (client_oid, symbol, side, str(price), str(qty), now_ms, now_ms),
+            client_oid,
+            {"symbol": symbol, "side": side, "price": str(price), "qty": str(qty), "state": "sent",
+             "ts_created": now_ms, "last_update": now_ms},
+        ).result(timeout=10)
+        self.recent.remember(client_oid, "sent", now_ms)
+        return "sent"
+
+    def upsert_sent_many(self, orders: list) -> dict:
+        """
+        Reservierung mehrerer OIDs [(client_oid, symbol, side, price, qty), ...]. Der Writer bündelt sie
+        (bis zu ORDERS_DB_BATCH_SIZE je Commit); gewartet wird auf jeden Eintrag.
+        Rückgabe: {client_oid: Fehler} der nicht gespeicherten Reservierungen (leer = alle geschrieben).
+        """
+        now_ms = self._now_ms()
+        futures = []
+        for client_oid, symbol, side, price, qty in orders:
+            futures.append((client_oid, self._submit(
+                _SQL_UPSERT_SENT,
+                (client_oid, symbol, side, str(price), str(qty), now_ms, now_ms),
+                client_oid,
+                {"symbol": symbol, "side": side, "price": str(price), "qty": str(qty), "state": "sent",
+                 "ts_created": now_ms, "last_update": now_ms},
+            )))
+        failed = {}
+        for client_oid, fut in futures:
+            try:
+                fut.result(timeout=10)
+            except Exception as e:
+                failed[client_oid] = e
+                continue
+            self.recent.remember(client_oid, "sent", now_ms)
+        return failed
 
     def set_state(self, client_oid, state, exch_order_id=None, last_error=None):
+        """Zustandswechsel asynchron über den Writer-Thread; sofort im Overlay sichtbar."""
         now_ms = self._now_ms()
-        with self._lock, self._conn() as con:
-            con.execute(
-                """
-                UPDATE orders
-                   SET state=?,
-                       exch_order_id=COALESCE(?, exch_order_id),
-                       last_error=?,
-                       last_update=?
-                 WHERE client_oid=?
-                """,
-                (state, exch_order_id, last_error, now_ms, client_oid)
-            )
+        self._submit(
+            _SQL_SET_STATE,
+            (state, exch_order_id, last_error, now_ms, client_oid),
+            client_oid,
+            {"state": state, "exch_order_id": exch_order_id, "last_error": last_error, "last_update": now_ms},
+        )
+        self.recent.remember(client_oid, state, now_ms)
 
-    def exists_active(self, client_oid, ttl_sec: int = 5):
+    def upsert_parent(self, parent_id, symbol, side, algo, target_qty, arrival_price):
+        """Legt eine Parent-Order an (wartet auf den Commit)."""
         now_ms = self._now_ms()
-        cutoff = now_ms - ttl_sec * 1000
-        with self._lock, self._conn() as con:
-            row = con.execute(
-                """
-                SELECT state, COALESCE(last_update, ts_created)
-                  FROM orders
-                 WHERE client_oid=?
-                """,
-                (client_oid,)
-            ).fetchone()
-            if not row:
-                return False
-            state, ts = row[0], (row[1] or 0)
-            if state in ('open','partial','filled','ack'):
-                return True
-            if state in ('sent','pending') and ts >= cutoff:
-                return True
-            return False
+        self._submit(
+            _SQL_UPSERT_PARENT,
+            (parent_id, symbol, side, algo, str(target_qty), float(arrival_price), now_ms, now_ms),
+        ).result(timeout=10)
 
+    def update_parent(self, parent_id, filled_qty, filled_funds, state, children):
+        """Füllstand einer Parent-Order asynchron über den Writer-Thread."""
+        self._submit(
+            _SQL_UPDATE_PARENT,
+            (float(filled_qty), float(filled_funds), state, int(children), self._now_ms(), parent_id),
+        )
+
+    def purge_stale(self, ttl_sec: int = 5):
+        self._submit(_SQL_PURGE, (self._now_ms() - ttl_sec * 1000,))
+
+    # --- Lesen ---
     def get(self, client_oid: str):
-        with self._lock, self._conn() as con:
-            cur = con.execute(
-                "SELECT client_oid, state, exch_order_id, symbol, side, price, qty, ts_created, COALESCE(last_update, ts_created) FROM orders WHERE client_oid=?",
-                (client_oid,)
-            )
-            row = cur.fetchone()
-            if not row:
-                return None
-            return {
-                'client_oid': row[0],
+        with self._pending_lock:
+            pending = self._pending.get(client_oid)
+        row = self._conn().execute(_SQL_GET, (client_oid,)).fetchone()
+        if not row and pending is None:
+            return None
+        result = {
+            'client_oid': client_oid,
+            'state': None,
+            'exch_order_id': None,
+            'symbol': None,
+            'side': None,
+            'price': None,
+            'qty': None,
+            'ts_created': None,
+            'last_update': None,
+        }
+        if row:
+            result.update({
                 'state': row[1],
                 'exch_order_id': row[2],
                 'symbol': row[3],
@@ -139,15 +395,211 @@ class OrdersDB:
                 'qty': row[6],
                 'ts_created': int(row[7]) if row[7] is not None else None,
                 'last_update': int(row[8]) if row[8] is not None else None,
-            }
+            })
+        if pending is not None:
+            # Ein noch nicht committetes UPDATE auf eine nicht existierende Zeile bleibt wirkungslos
+            if not row and pending[1].get("ts_created") is None:
+                return None
+            result.update({k: v for k, v in pending[1].items() if k in result and k != "last_error"})
+        return result
 
-    def purge_stale(self, ttl_sec: int = 5):
-        cutoff = self._now_ms() - ttl_sec * 1000
-        with self._lock, self._conn() as con:
+    def exists_active(self, client_oid, ttl_sec: int = 5):
+        now_ms = self._now_ms()
+        # Schneller Pfad: kürzlich reservierte OID → Duplikat ohne SQLite
+        if self.recent.check(client_oid, now_ms, ttl_sec):
+            return True
+        row = self.get(client_oid)
+        if not row:
+            return False
+        cutoff = now_ms - ttl_sec * 1000
+        state, ts = row['state'], (row['last_update'] or row['ts_created'] or 0)
+        if state in _ACTIVE_STATES:
+            self.recent.remember(client_oid, state, ts)
+            return True
+        if state in _PENDING_STATES and ts >= cutoff:
+            self.recent.remember(client_oid, state, ts)
+            return True
+        return False
+
+    def get_parent(self, parent_id: str):
+        self.flush()
+        row = self._conn().execute(
+            f"SELECT {', '.join(_PARENT_COLUMNS)} FROM parent_orders WHERE parent_id=?", (parent_id,)
+        ).fetchone()
+        return dict(zip(_PARENT_COLUMNS, row)) if row else None
+
+    def list_parents(self, limit: int = 50) -> list:
+        """Letzte Parent-Orders, neueste zuerst."""
+        self.flush()
+        rows = self._conn().execute(
+            f"SELECT {', '.join(_PARENT_COLUMNS)} FROM parent_orders ORDER BY ts_created DESC LIMIT ?", (int(limit),)
+        ).fetchall()
+        return [dict(zip(_PARENT_COLUMNS, r)) for r in rows]
+
+    def idempotency_stats(self) -> dict:
+        """Trefferquote des In-Memory-Filters vor SQLite."""
+        return self.recent.stats()
+
+
+    # --- Archiv ---
+    def _archive_conn(self) -> sqlite3.Connection:
+        """Thread-Verbindung mit angehängter Archiv-DB (Tages-Tabellen orders_YYYYMMDD + Index)."""
+        con = self._conn()
+        if not getattr(self._local, "archive_attached", False):
+            con.execute("ATTACH DATABASE ? AS arch", (self.archive_path.resolve().as_posix(),))
+            con.execute("PRAGMA arch.journal_mode=WAL")
             con.execute(
-                "DELETE FROM orders WHERE state IN ('pending','sent') AND COALESCE(last_update, ts_created) < ?",
-                (cutoff,)
+                "CREATE TABLE IF NOT EXISTS arch.archive_index(client_oid TEXT PRIMARY KEY, day TEXT NOT NULL)"
             )
+            con.execute("CREATE INDEX IF NOT EXISTS arch.idx_archive_day ON archive_index(day)")
+            self._local.archive_attached = True
+        return con
+
+    def archive_terminal(self, retention_sec: int = ORDERS_RETENTION_SEC,
+                         stale_active_sec: int = ORDERS_STALE_ACTIVE_SEC) -> int:
+        """
+        Verschiebt abgeschlossene Orders älter als `retention_sec` (und hängende aktive älter als
+        `stale_active_sec`) in Tages-Tabellen der Archiv-DB. Gibt die Anzahl verschobener Orders zurück.
+        """
+        # Ausstehende Zustandswechsel zuerst schreiben, damit nichts Veraltetes archiviert wird
+        self.flush()
+        now_ms = self._now_ms()
+        params = (now_ms - retention_sec * 1000, now_ms - stale_active_sec * 1000)
+        con = self._archive_conn()
+        days = [r[0] for r in con.execute(
+            f"SELECT DISTINCT strftime('%Y%m%d', COALESCE(last_update, ts_created) / 1000, 'unixepoch') "
+            f"FROM orders WHERE {_ARCHIVE_CANDIDATES}",
+            params,
+        ).fetchall() if r[0]]
+        moved = 0
+        for day in days:
+            table = f"arch.orders_{day}"
+            day_filter = f"({_ARCHIVE_CANDIDATES}) AND strftime('%Y%m%d', COALESCE(last_update, ts_created) / 1000, 'unixepoch') = ?"
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM orders WHERE 0")
+                con.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_oid ON orders_{day}(client_oid)")
+                con.execute(f"INSERT OR REPLACE INTO {table} SELECT * FROM orders WHERE {day_filter}", params + (day,))
+                con.execute(
+                    f"INSERT OR REPLACE INTO arch.archive_index(client_oid, day) SELECT client_oid, ? FROM orders WHERE {day_filter}",
+                    (day,) + params + (day,),
+                )
+                cur = con.execute(f"DELETE FROM orders WHERE {day_filter}", params + (day,))
+                con.execute("COMMIT")
+                moved += cur.rowcount or 0
+            except Exception:
+                try:
+                    con.execute("ROLLBACK")
+                except Exception:
+                    pass
+                raise
+        return moved
+
+    def get_archived(self, client_oid: str, day: str = None):
+        """Archivierte Order per clientOid; `day` (YYYYMMDD oder YYYY-MM-DD) ist optional."""
+        con = self._archive_conn()
+        if day is None:
+            row = con.execute("SELECT day FROM arch.archive_index WHERE client_oid=?", (client_oid,)).fetchone()
+            if not row:
+                return None
+            day = row[0]
+        day = day.replace("-", "")
+        if not day.isdigit():
+            return None
+        try:
+            row = con.execute(_SQL_GET.replace("FROM orders", f"FROM arch.orders_{day}"), (client_oid,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return _row_to_dict(row) if row else None
+
+    def list_archived(self, day: str) -> list:
+        """Alle archivierten Orders eines Tages (YYYYMMDD oder YYYY-MM-DD)."""
+        day = day.replace("-", "")
+        if not day.isdigit():
+            return []
+        try:
+            rows = self._archive_conn().execute(
+                _SQL_GET.replace(" WHERE client_oid=?", "").replace("FROM orders", f"FROM arch.orders_{day}")
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        return [_row_to_dict(r) for r in rows]
+
+    def find(self, client_oid: str):
+        """Hot-Tabelle zuerst, danach Archiv."""
+        return self.get(client_oid) or self.get_archived(client_oid)
+
+    def start_archival(self, interval: float = ORDERS_ARCHIVE_INTERVAL_SEC) -> None:
+        """Startet (einmalig) den periodischen Archiv-Job."""
+        if self._archive_thread and self._archive_thread.is_alive():
+            return
+        self._archive_stop.clear()
+
+        def _loop():
+            while True:
+                try:
+                    moved = self.archive_terminal()
+                    if moved:
+                        logger.info(f"🗄️ OrdersDB: {moved} abgeschlossene Orders archiviert")
+                    stats = self.idempotency_stats()
+                    if stats["lookups"]:
+                        logger.info(f"🧮 Idempotenz-Filter: Trefferquote {stats['hit_rate']:.1%} ({stats['hits']}/{stats['lookups']}), {stats['size']} OIDs im Speicher")
+                except Exception as e:
+                    logger.warning(f"⚠️ OrdersDB-Archivierung fehlgeschlagen: {e}")
+                if self._archive_stop.wait(interval):
+                    break
+
+        self._archive_thread = threading.Thread(target=_loop, daemon=True, name="orders-db-archive")
+        self._archive_thread.start()
+
+    def stop_archival(self) -> None:
+        self._archive_stop.set()
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        'client_oid': row[0],
+        'state': row[1],
+        'exch_order_id': row[2],
+        'symbol': row[3],
+        'side': row[4],
+        'price': row[5],
+        'qty': row[6],
+        'ts_created': int(row[7]) if row[7] is not None else None,
+        'last_update': int(row[8]) if row[8] is not None else None,
+    }
+
+
+def benchmark(n: int = 2000, path: str = None, db_class=None) -> float:
+    """
+    Orders/s für den typischen Ablauf pro Order: purge, exists_active, upsert_sent, get, set_state (ack, filled).
+    db_class erlaubt den Vergleich mit einer anderen OrdersDB-Implementierung (siehe load_db_class).
+    """
+    import tempfile
+    path = path or os.path.join(tempfile.mkdtemp(), "bench_orders.db")
+    db = (db_class or OrdersDB)(path)
+    start = time.perf_counter()
+    for i in range(n):
+        oid = f"bench-{i}"
+        db.purge_stale(ttl_sec=5)
+        db.exists_active(oid, ttl_sec=5)
+        db.upsert_sent(oid, "ETH-USDT", "buy", "2500.1", "0.01")
+        db.get(oid)
+        db.set_state(oid, "ack", f"x{i}")
+        db.set_state(oid, "filled", f"x{i}")
+    if hasattr(db, "flush"):
+        db.flush(timeout=60)
+    return n / (time.perf_counter() - start)
+
+
+def load_db_class(module_path: str):
+    """OrdersDB-Klasse aus einer Datei laden, z.B. einer älteren Version (git show <rev>:core/orders_db.py > alt.py)."""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("orders_db_bench", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.OrdersDB
+
 
 db_singleton: OrdersDB | None = None
 
@@ -156,3 +608,17 @@ def get_db(path="data/db/orders.db") -> OrdersDB:
     if db_singleton is None:
         db_singleton = OrdersDB(path)
     return db_singleton
+
+
+if __name__ == "__main__":
+    import sys
+    if "--archive" in sys.argv:
+        print(f"OrdersDB: {get_db().archive_terminal()} Orders archiviert")
+    else:
+        # python -m core.orders_db [N] [alt.py] – mit Datei zusätzlich deren OrdersDB zum Vergleich
+        args = [a for a in sys.argv[1:] if not a.startswith("--")]
+        n = int(args[0]) if args and args[0].isdigit() else 2000
+        baseline = next((a for a in args if a.endswith(".py")), None)
+        if baseline:
+            print(f"OrdersDB ({baseline}): {benchmark(n, db_class=load_db_class(baseline)):.0f} Orders/s")
+        print(f"OrdersDB: {benchmark(n):.0f} Orders/s")
@@ -0,0 +1,324 @@
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# "instant" = bisheriges Verhalten (Fill zum übergebenen Preis), "book" = Matching gegen Orderbuch/Trades
+PAPER_FILL_MODEL = os.getenv("PAPER_FILL_MODEL", "instant").lower()
+# Simulierte Order-Latenz (Senden → Börse) in ms: Mittelwert und gleichverteilter Jitter
+PAPER_LATENCY_MS = float(os.getenv("PAPER_LATENCY_MS", "80"))
+PAPER_LATENCY_JITTER_MS = float(os.getenv("PAPER_LATENCY_JITTER_MS", "40"))
+# Orderbuch älter als das gilt als fehlend → Fill zum Referenzpreis mit PAPER_SLIPPAGE_BPS
+PAPER_BOOK_MAX_AGE_SEC = float(os.getenv("PAPER_BOOK_MAX_AGE_SEC", "5"))
+PAPER_SLIPPAGE_BPS = float(os.getenv("PAPER_SLIPPAGE_BPS", "5"))
+# Market-Rest jenseits der sichtbaren Tiefe: mit Aufschlag auf das letzte Level füllen (true) oder Teilfill (false)
+PAPER_FILL_BEYOND_DEPTH = os.getenv("PAPER_FILL_BEYOND_DEPTH", "true").lower() == "true"
+PAPER_BEYOND_DEPTH_BPS = float(os.getenv("PAPER_BEYOND_DEPTH_BPS", "10"))
+# Gebühren, falls keine symbolbezogenen Raten vorliegen
+PAPER_MAKER_FEE = float(os.getenv("PAPER_MAKER_FEE", os.getenv("TRADING_FEE_RATE", "0.001")))
+PAPER_TAKER_FEE = float(os.getenv("PAPER_TAKER_FEE", os.getenv("TRADING_FEE_RATE", "0.001")))
+
+Level = Tuple[float, float]
+
+
+@dataclass
+class Book:
+    bids: List[Level]
+    asks: List[Level]
+    ts: float
+
+
+@dataclass
+class SimOrder:
+    client_oid: str
+    symbol: str
+    side: str
+    qty: float
+    order_type: str = "market"
+    limit_price: Optional[float] = None
+    submitted: float = field(default_factory=time.time)
+    active_at: float = 0.0
+    # Geschätzte Menge vor uns in der Warteschlange am Limit-Preis (nur ruhende Limits)
+    queue_ahead: float = 0.0
+    state: str = "pending"
+    filled: float = 0.0
+    funds: float = 0.0
+    fee: float = 0.0
+    maker_qty: float = 0.0
+    ref_price: Optional[float] = None
+    fills: list = field(default_factory=list, repr=False)
+
+    @property
+    def remaining(self) -> float:
+        rest = self.qty - self.filled
+        return rest if rest > 1e-12 else 0.0
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        return self.funds / self.filled if self.filled > 0 else None
+
+    @property
+    def slippage_bps(self) -> Optional[float]:
+        """Gegenüber dem Referenzpreis beim Senden; positiv = schlechter (BUY teurer, SELL billiger)."""
+        avg = self.avg_price
+        if avg is None or not self.ref_price:
+            return None
+        diff = (avg - self.ref_price) if self.side == "buy" else (self.ref_price - avg)
+        return round(diff / self.ref_price * 10_000, 2)
+
+    def metrics(self) -> dict:
+        return {
+            "sender": "paper_matching",
+            "ref_price": self.ref_price,
+            "slippage_bps": self.slippage_bps,
+            "latency_ms": int((self.active_at - self.submitted) * 1000),
+            "levels": len(self.fills),
+            "maker_qty": round(self.maker_qty, 8),
+            "taker_qty": round(self.filled - self.maker_qty, 8),
+        }
+
+
+class PaperMatchingEngine:
+    """
+    In-Memory-Matching für Paper-Trading gegen das Live- (oder wiederabgespielte) Orderbuch:
+      - Orders werden erst nach einer simulierten Latenz aktiv und sehen das Buch zu diesem Zeitpunkt
+      - Market/marktfähige Limits laufen durch die Levels der Gegenseite (Teilfills, Slippage)
+      - ruhende Limits erhalten eine Warteschlangen-Schätzung (sichtbare Menge am Preis) und werden
+        erst gefüllt, wenn Trades am Preis diese Menge abgebaut haben bzw. der Preis durchhandelt
+      - Maker/Taker-Gebühren je Symbol aus dem Gebühren-Cache, sonst PAPER_MAKER_FEE/PAPER_TAKER_FEE
+    Zustand liegt nur im Speicher (ein Buch und die offenen Orders je Symbol).
+    """
+
+    def __init__(self, latency_ms: float = PAPER_LATENCY_MS, jitter_ms: float = PAPER_LATENCY_JITTER_MS,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._books: Dict[str, Book] = {}
+        self._orders: Dict[str, Dict[str, SimOrder]] = {}
+        self._fees: Dict[str, Tuple[float, float]] = {}
+        self._fee_fetcher: Optional[Callable[[str], Tuple[float, float]]] = None
+        self._listeners: List[Callable[[SimOrder, float, float], None]] = []
+        self._lock = threading.RLock()
+
+    # --- Konfiguration ---
+    def set_fee_fetcher(self, fetcher: Callable[[str], Tuple[float, float]]) -> None:
+        """Registriert z.B. api.get_trade_fee (symbol -> (maker, taker)); Ergebnis wird je Symbol gecacht."""
+        self._fee_fetcher = fetcher
+
+    def set_fee_rates(self, symbol: str, maker: float, taker: float) -> None:
+        self._fees[symbol] = (float(maker), float(taker))
+
+    def fee_rates(self, symbol: str) -> Tuple[float, float]:
+        rates = self._fees.get(symbol)
+        if rates is None:
+            rates = (PAPER_MAKER_FEE, PAPER_TAKER_FEE)
+            if self._fee_fetcher is not None:
+                try:
+                    maker, taker = self._fee_fetcher(symbol)
+                    # (0, 0) = Abruf fehlgeschlagen (get_trade_fee) → Standardraten
+                    if maker or taker:
+                        rates = (float(maker), float(taker))
+                except Exception as e:
+                    logger.info(f"⚠️ PAPER: Gebühren für {symbol} nicht abrufbar: {e}")
+            self._fees[symbol] = rates
+        return rates
+
+    def add_listener(self, fn: Callable[[SimOrder, float, float], None]) -> None:
+        """fn(order, qty, price) bei jedem Teil-Fill."""
+        self._listeners.append(fn)
+
+    def sample_latency(self) -> float:
+        jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    # --- Marktdaten ---
+    def on_depth(self, symbol: str, bids, asks, ts: Optional[float] = None) -> None:
+        """Level-2-Snapshot (z.B. /spotMarket/level2Depth5: [[preis, menge], ...])."""
+        try:
+            book = Book(
+                bids=[(float(p), float(s)) for p, s, *_ in bids],
+                asks=[(float(p), float(s)) for p, s, *_ in asks],
+                ts=time.time() if ts is None else float(ts),
+            )
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._books[symbol] = book
+            self._process(symbol, book.ts)
+
+    def on_ticker(self, symbol: str, bid, bid_size, ask, ask_size, ts: Optional[float] = None) -> None:
+        """Top-of-Book aus dem Ticker; ersetzt kein frischeres Tiefen-Buch."""
+        now = time.time() if ts is None else float(ts)
+        current = self._books.get(symbol)
+        if current is not None and len(current.bids) > 1 and now - current.ts < 1.0:
+            return
+        try:
+            self.on_depth(symbol, [(bid, bid_size)], [(ask, ask_size)], now)
+        except Exception:
+            pass
+
+    def on_trade(self, symbol: str, price, size, taker_side: str, ts: Optional[float] = None) -> None:
+        """Trade aus /market/match: baut Warteschlangen vor ruhenden Limits ab und füllt sie."""
+        try:
+            price, size = float(price), float(size)
+        except (TypeError, ValueError):
+            return
+        now = time.time() if ts is None else float(ts)
+        with self._lock:
+            self._process(symbol, now)
+            # Ein Taker-BUY trifft ruhende SELL-Limits und umgekehrt
+            resting_side = "sell" if str(taker_side).lower() == "buy" else "buy"
+            for order in list(self._orders.get(symbol, {}).values()):
+                if order.state != "open" or order.side != resting_side or size <= 0:
+                    continue
+                px = order.limit_price
+                through = price < px if order.side == "buy" else price > px
+                at_price = price == px
+                if not (through or at_price):
+                    continue
+                if through:
+                    # Durchgehandelt: alle vor uns sind bedient
+                    order.queue_ahead = 0.0
+                else:
+                    consumed = min(order.queue_ahead, size)
+                    order.queue_ahead -= consumed
+                    size -= consumed
+                if order.queue_ahead <= 0 and size > 0:
+                    qty = min(order.remaining, size)
+                    size -= qty
+                    self._fill(order, qty, px, maker=True, ts=now)
+
+    # --- Orders ---
+    def submit(self, symbol: str, side: str, qty: float, order_type: str = "market",
+               limit_price: Optional[float] = None, ref_price: Optional[float] = None,
+               client_oid: Optional[str] = None, ts: Optional[float] = None) -> SimOrder:
+        now = time.time() if ts is None else float(ts)
+        order = SimOrder(
+            client_oid=client_oid or uuid.uuid4().hex[:24],
+            symbol=symbol,
+            side=str(side).lower(),
+            qty=float(qty),
+            order_type=order_type,
+            limit_price=float(limit_price) if limit_price is not None else None,
+            submitted=now,
+            active_at=now + self.sample_latency(),
+            ref_price=float(ref_price) if ref_price is not None else None,
+        )
+        with self._lock:
+            self._orders.setdefault(symbol, {})[order.client_oid] = order
+        return order
+
+    def cancel(self, symbol: str, client_oid: str) -> Optional[SimOrder]:
+        with self._lock:
+            order = self._orders.get(symbol, {}).pop(client_oid, None)
+            if order is not None and order.state in ("pending", "open"):
+                order.state = "cancelled" if order.filled <= 0 else "partial"
+            return order
+
+    def get(self, symbol: str, client_oid: str) -> Optional[SimOrder]:
+        return self._orders.get(symbol, {}).get(client_oid)
+
+    def advance(self, symbol: str, now: Optional[float] = None) -> None:
+        """Aktiviert fällige Orders ohne neues Marktdaten-Event (z.B. Timer oder Replay-Uhr)."""
+        with self._lock:
+            self._process(symbol, time.time() if now is None else float(now))
+
+    def execute_market(self, symbol: str, side: str, qty: float, ref_price: float,
+                       now: Optional[float] = None) -> SimOrder:
+        """
+        Synchroner Market-Fill für den Paper-Order-Handler: Order wird mit Latenz gesendet und sofort
+        gegen das zuletzt bekannte Buch ausgeführt (im Live-Betrieb liegt das Buch nach Ablauf der
+        Latenz noch nicht vor; im Replay werden Events vorher in Zeitreihenfolge eingespeist).
+        """
+        order = self.submit(symbol, side, qty, "market", ref_price=ref_price, ts=now)
+        with self._lock:
+            self._activate(order, max(order.active_at, self._books[symbol].ts if symbol in self._books else 0.0))
+            self._orders.get(symbol, {}).pop(order.client_oid, None)
+        return order
+
+    # --- Matching ---
+    def _process(self, symbol: str, now: float) -> None:
+        orders = self._orders.get(symbol)
+        if not orders:
+            return
+        book = self._books.get(symbol)
+        for oid, order in list(orders.items()):
+            if order.state == "pending" and order.active_at <= now:
+                self._activate(order, now)
+            elif order.state == "open" and book is not None:
+                # Gegenseite ist durch das Limit gelaufen → als Maker zum Limit gefüllt
+                best = book.asks[0][0] if order.side == "buy" and book.asks else (
+                    book.bids[0][0] if order.side == "sell" and book.bids else None)
+                if best is not None and (best <= order.limit_price if order.side == "buy" else best >= order.limit_price):
+                    self._fill(order, order.remaining, order.limit_price, maker=True, ts=now)
+            if order.state in ("filled", "cancelled", "partial"):
+                orders.pop(oid, None)
+
+    def _activate(self, order: SimOrder, now: float) -> None:
+        book = self._books.get(order.symbol)
+        fresh = book is not None and now - book.ts <= PAPER_BOOK_MAX_AGE_SEC
+        levels = (book.asks if order.side == "buy" else book.bids) if fresh else []
+        if order.ref_price is None:
+            order.ref_price = levels[0][0] if levels else order.limit_price
+        if order.order_type == "market" and not levels:
+            # Kein (aktuelles) Buch → Referenzpreis mit pauschaler Slippage
+            ref = order.ref_price or 0.0
+            if ref <= 0:
+                order.state = "cancelled"
+                return
+            bps = PAPER_SLIPPAGE_BPS / 10_000
+            self._fill(order, order.remaining, ref * (1 + bps) if order.side == "buy" else ref * (1 - bps), maker=False, ts=now)
+            return
+        limit = order.limit_price
+        last_px = None
+        for px, size in levels:
+            if order.remaining <= 0:
+                break
+            if limit is not None and (px > limit if order.side == "buy" else px < limit):
+                break
+            qty = min(order.remaining, size)
+            if qty > 0:
+                self._fill(order, qty, px, maker=False, ts=now)
+            last_px = px
+        if order.remaining <= 0:
+            return
+        if order.order_type == "market":
+            if PAPER_FILL_BEYOND_DEPTH and last_px is not None:
+                bps = PAPER_BEYOND_DEPTH_BPS / 10_000
+                px = last_px * (1 + bps) if order.side == "buy" else last_px * (1 - bps)
+                self._fill(order, order.remaining, px, maker=False, ts=now)
+            else:
+                order.state = "partial" if order.filled > 0 else "cancelled"
+            return
+        # Limit-Rest ruht im Buch: vor uns steht die sichtbare Menge am selben Preis
+        own_side = (book.bids if order.side == "buy" else book.asks) if fresh else []
+        order.queue_ahead = sum(size for px, size in own_side if px == limit)
+        order.state = "open"
+
+    def _fill(self, order: SimOrder, qty: float, price: float, maker: bool, ts: float) -> None:
+        if qty <= 0:
+            return
+        maker_rate, taker_rate = self.fee_rates(order.symbol)
+        order.filled += qty
+        order.funds += qty * price
+        order.fee += qty * price * (maker_rate if maker else taker_rate)
+        if maker:
+            order.maker_qty += qty
+        order.fills.append((ts, qty, price, maker))
+        order.state = "filled" if order.remaining <= 0 else "open"
+        for fn in self._listeners:
+            try:
+                fn(order, qty, price)
+            except Exception as e:
+                logger.warning(f"⚠️ PAPER-Matching-Listener fehlgeschlagen: {e}")
+
+
+paper_engine = PaperMatchingEngine()
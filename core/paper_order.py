@@ -3,49 +3,45 @@ import uuid
 from core.logger import log_info, log_warning
 from core.telegram_utils import send_telegram_message
 from core.position import PositionManager
-from core.utils import load_json_file, save_json_file
+from core.order_journal import order_journal
 from strategies.atr import calculate_atr
 from core.kucoin_api import KuCoinClientWrapper
 from config.config import get_config
-from core.paper_wallet import PaperWallet
+from core.paper_wallet import get_paper_wallet
 from core.filters import prepare_order
 from decimal import Decimal, ROUND_DOWN
 from core.filters import filter_book
+from core.paper_matching import PAPER_FILL_MODEL, paper_engine
 
 class PaperOrderHandler:
-    def _ensure_history_file(self):
-        """Ensure trades_file exists and is a JSON list; normalize if it's a dict/None."""
-        try:
-            import os
-            # Create folder if missing
-            folder = os.path.dirname(self.trades_file)
-            if folder and not os.path.exists(folder):
-                os.makedirs(folder, exist_ok=True)
-            raw = load_json_file(self.trades_file)
-            if raw is None:
-                save_json_file(self.trades_file, [])
-                log_info(f"🗃️ {self.trades_file} initialisiert (leere Liste)")
-            elif isinstance(raw, dict):
-                # normalize silently to list
-                save_json_file(self.trades_file, [])
-                log_info(f"🗃️ {self.trades_file} war dict – auf Liste [] normalisiert")
-            elif not isinstance(raw, list):
-                save_json_file(self.trades_file, [])
-                log_info(f"🗃️ {self.trades_file} war {type(raw).__name__} – auf Liste [] normalisiert")
-        except Exception as e:
-            log_warning(f"⚠️ Konnte {self.trades_file} nicht normalisieren: {e}")
-
     def __init__(self):
-        self.trades_file = "data/order_history.json"
+        self.trades_file = order_journal.path
         self.positions_file = "data/positions_paper.json"
         self.position_manager = PositionManager(mode="PAPER")
-        self.wallet = PaperWallet()
+        self.wallet = get_paper_wallet()
         self.price_cache = {}
         self.atr_multiplier_sl = float(get_config("ATR_MULTIPLIER_SL", 1.5))
         self.atr_multiplier_tp = float(get_config("ATR_MULTIPLIER_TP", 3))
         self.atr_period = int(get_config("ATR_PERIOD", 14))
         self.atr_timeframe = get_config("ATR_TIMEFRAME", "1hour")
-        self._ensure_history_file()
+        self.book_fills = PAPER_FILL_MODEL == "book"
+        if self.book_fills:
+            # Maker/Taker-Raten je Symbol (einmal abgerufen, danach aus dem Cache der Matching-Engine)
+            paper_engine.set_fee_fetcher(KuCoinClientWrapper().get_trade_fee)
+
+    def _simulate_fill(self, symbol, side, quantity, price):
+        """Market-Fill gegen das Orderbuch (PAPER_FILL_MODEL=book); None = Fill zum übergebenen Preis."""
+        if not self.book_fills:
+            return None
+        sim = paper_engine.execute_market(symbol, side, quantity, price)
+        if sim.filled <= 0:
+            log_warning(f"⚠️ PAPER: Keine Liquidität für {side} {quantity} {symbol} im Orderbuch.")
+        else:
+            log_info(
+                f"📖 PAPER-Matching {side} {symbol}: {sim.filled} @ {sim.avg_price:.8f} "
+                f"(Ref {price}, Slippage {sim.slippage_bps} bps, Latenz {sim.metrics()['latency_ms']} ms)"
+            )
+        return sim
 
     def place_order(self, symbol, side, quantity, price=None, entry_reason=None, **kwargs):
         # Verwende Preis aus price_cache, falls kein Preis übergeben wurde
@@ -184,6 +180,16 @@ class PaperOrderHandler:
             price = float(adj_qpx)
             quantity = float(adj_qqty)
 
+            sim = self._simulate_fill(symbol, side, quantity, price)
+            if sim is not None:
+                if sim.filled <= 0:
+                    return {"status": "rejected", "reason": "no_liquidity", "symbol": symbol}
+                price, quantity = round(sim.avg_price, 10), sim.filled
+                fee_rate = sim.fee / sim.funds
+                order["price"] = order["entry_price"] = price
+                order["status"] = "filled" if sim.remaining <= 0 else "partial"
+                order["trade_tags"] = sim.metrics()
+
             if not self.wallet.update_balance(base, quantity, True, price=price, quote=quote, fee_rate=fee_rate):
                 log_warning(f"⚠️ PAPER: Wallet-Update nach Budget-Anpassung fehlgeschlagen – BUY abgebrochen.")
                 return {"status": "rejected", "reason": "wallet_update_failed", "symbol": symbol}
@@ -238,6 +244,16 @@ class PaperOrderHandler:
 
             sell_qty = float(sell_qty_dec)
 
+            sim = self._simulate_fill(symbol, side, sell_qty, price)
+            if sim is not None:
+                if sim.filled <= 0:
+                    return {"status": "rejected", "reason": "no_liquidity", "symbol": symbol}
+                price, sell_qty = round(sim.avg_price, 10), sim.filled
+                fee_rate = sim.fee / sim.funds
+                order["price"] = price
+                order["status"] = "filled" if sim.remaining <= 0 else "partial"
+                order["trade_tags"] = sim.metrics()
+
             if not self.wallet.update_balance(base, sell_qty, False, price=price, quote=quote, fee_rate=fee_rate):
                 log_warning(f"⚠️ PAPER: Wallet-Update für SELL fehlgeschlagen – abgebrochen.")
                 return {"status": "rejected", "reason": "wallet_update_failed", "symbol": symbol}
@@ -324,19 +340,10 @@ class PaperOrderHandler:
         except Exception:
             pass
 
-        # Speichert Order in order_history.json ohne Duplikate
-        self._ensure_history_file()
-        raw_orders = load_json_file(self.trades_file)
-        orders = raw_orders if isinstance(raw_orders, list) else []
-
-        # Prüfe auf Duplikat anhand von id ODER (symbol, side, timestamp)
-        if any(
-            (o.get("id") and o.get("id") == order.get("id")) or (
-                o.get("symbol") == order.get("symbol") and
-                o.get("side") == order.get("side") and
-                o.get("timestamp") == order.get("timestamp")
-            )
-            for o in orders
+        # Speichert Order im Order-Journal ohne Duplikate
+        # Prüfe auf Duplikat anhand von id ODER (symbol, side, timestamp) – beides über den Journal-Index
+        if order_journal.contains(order.get("id")) or order_journal.exists_like(
+            order.get("symbol"), order.get("side"), order.get("timestamp")
         ):
             log_warning(
                 f"⚠️ Duplikat erkannt (id: {order.get('id')}, Symbol: {order.get('symbol')}, Side: {order.get('side')}, TS: {order.get('timestamp')}), überspringe Speicherung."
@@ -351,8 +358,8 @@ class PaperOrderHandler:
             order["fee"] = order.get("fee", 0.0)
             # Calculate PNL if not set or 0
             if order.get("pnl", 0) == 0:
-                # Try to find matching BUY in history
-                for o in orders:
+                # Try to find matching BUY in history (nur Einträge des Symbols)
+                for o in order_journal.iter_orders(symbol=order.get("symbol")):
                     if (
                         o.get("symbol") == order.get("symbol") and
                         o.get("side") == "buy" and
@@ -369,7 +376,7 @@ class PaperOrderHandler:
 
         # Falls SELL mit PNL, aktualisiere passenden BUY-Eintrag
         if order.get("side") == "sell" and order.get("pnl", 0) != 0:
-            for i, o in enumerate(orders):
+            for o in order_journal.iter_orders(symbol=order.get("symbol")):
                 if (
                     o.get("symbol") == order.get("symbol") and
                     o.get("side") == "buy" and
@@ -377,19 +384,17 @@ class PaperOrderHandler:
                     o.get("quantity") == order.get("quantity") and
                     o.get("pnl", 0) == 0
                 ):
-                    orders[i].update({
+                    order_journal.update(o["id"], {
                         "pnl": order["pnl"],
                         "reason": order["reason"],
                         "fee": order["fee"],
                         "timestamp": order["timestamp"]
                     })
-                    save_json_file(self.trades_file, orders)
                     log_info(f"💾 PAPER-Trade aktualisiert mit PNL ({order['id']})")
                     # Do not return here; also append the SELL order to history.
                     break
 
-        orders.append(order)
-        save_json_file(self.trades_file, orders)
+        order_journal.append(order)
         log_info(f"💾 PAPER-Trade gespeichert ({order['id']})")
 
     def log_trade_to_json(self, trade):
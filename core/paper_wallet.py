@@ -2,28 +2,63 @@
 # Simuliertes Wallet für Paper-Trading-Modus
 
 from core.logger import log_info
+import atexit
 import os
 import json
+import threading
+import time
 from config.config import get_pair_list
 
+# Journal-Zeilen werden gesammelt und in diesem Takt angehängt (Write-Behind)
+PAPER_WALLET_FLUSH_SEC = float(os.getenv("PAPER_WALLET_FLUSH_SEC", "1.0"))
+# Kompakter Snapshot (Journal wird danach geleert) spätestens nach dieser Zeit bzw. Zeilenzahl
+PAPER_WALLET_SNAPSHOT_SEC = float(os.getenv("PAPER_WALLET_SNAPSHOT_SEC", "300"))
+PAPER_WALLET_SNAPSHOT_LINES = int(os.getenv("PAPER_WALLET_SNAPSHOT_LINES", "5000"))
+
+
+def _parse_start_balances(raw: str) -> dict:
+    """PAPER_START_BALANCES, z.B. "BTC=0.05,ETH=1.2" → {"BTC": 0.05, "ETH": 1.2}."""
+    balances = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        ccy, value = part.split("=", 1)
+        try:
+            balances[ccy.strip().upper()] = float(value)
+        except ValueError:
+            continue
+    return balances
+
+
 class PaperWallet:
+    """
+    Paper-Balances als beliebige Asset-Map (Lesen O(1), ohne I/O).
+    Mit PAPER_WALLET_FILE werden Änderungen als Journal-Zeilen (nur geänderte Assets, absolute Werte)
+    gesammelt und von einem Hintergrund-Thread angehängt; periodisch wird ein kompakter Snapshot
+    geschrieben und das Journal geleert. Beim Start: Snapshot laden, danach neuere Journal-Zeilen anwenden.
+    """
+
     def __init__(self):
         # Konfiguration aus ENV
         start_usdt = float(os.getenv("PAPER_START_BALANCE_USDT", "10000") or 10000)
         reset_on_start = os.getenv("PAPER_RESET_ON_START", "false").lower() == "true"
         top_up = float(os.getenv("PAPER_TOP_UP_USDT", "0") or 0)
         self.wallet_file = os.getenv("PAPER_WALLET_FILE")  # optional: persistente Datei
+        self.journal_file = self.wallet_file + ".journal" if self.wallet_file else None
         self._persist_enabled = bool(self.wallet_file)
+        self._lock = threading.Lock()
+        # Serialisiert Journal-Anhängen und Snapshot (Writer-Thread, close() beim Beenden)
+        self._io_lock = threading.RLock()
+        self._pending = []
+        self._seq = 0
+        self._journal_lines = 0
+        self._snapshot_at = time.time()
+        self._stop = threading.Event()
+        self._writer = None
 
         # Standard-Balances
-        default_balances = {
-            "USDT": start_usdt if start_usdt > 0 else 10000.0,
-            "BTC": 0.0,
-            "ETH": 0.0,
-            "ADA": 0.0,
-            "DOGE": 0.0,
-            "SOL": 0.0,
-        }
+        default_balances = {"USDT": start_usdt if start_usdt > 0 else 10000.0}
+        default_balances.update(_parse_start_balances(os.getenv("PAPER_START_BALANCES", "")))
 
         # Laden aus Datei, wenn vorhanden und kein Reset angefordert
         loaded = False
@@ -41,51 +76,125 @@ class PaperWallet:
             self.balances["USDT"] = float(self.balances.get("USDT", 0.0) + top_up)
             log_info(f"💸 PAPER: Top-up von {top_up} USDT angewendet. Neuer USDT-Saldo: {self.balances['USDT']}")
 
-        # Persistenz: initialen Zustand speichern
+        # Persistenz: initialen Zustand als Snapshot speichern, danach Write-Behind
         if self._persist_enabled:
             self._save_persisted()
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="paper-wallet-writer")
+            self._writer.start()
+            atexit.register(self.close)
 
+    # --- Persistenz ---
     def _save_persisted(self) -> None:
-        """Speichert Balances atomar in die konfigurierte Datei, falls aktiviert."""
+        """Schreibt einen kompakten Snapshot atomar und leert das Journal."""
         if not self._persist_enabled or not self.wallet_file:
             return
+        with self._io_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
         try:
-            os.makedirs(os.path.dirname(self.wallet_file), exist_ok=True)
+            os.makedirs(os.path.dirname(self.wallet_file) or ".", exist_ok=True)
+            with self._lock:
+                state = {"seq": self._seq, "ts": int(time.time()), "balances": dict(self.balances)}
+                # Noch nicht angehängte Zeilen sind im Snapshot enthalten
+                self._pending.clear()
             tmp_path = self.wallet_file + ".tmp"
             with open(tmp_path, "w") as f:
-                json.dump(self.balances, f, indent=2)
+                json.dump(state, f, indent=2)
             os.replace(tmp_path, self.wallet_file)
+            # Journal erst nach dem Snapshot leeren; Zeilen mit seq <= Snapshot werden beim Laden ignoriert
+            with open(self.journal_file, "w"):
+                pass
+            self._journal_lines = 0
+            self._snapshot_at = time.time()
         except Exception as e:
             log_info(f"⚠️ PAPER: Konnte Wallet nicht speichern ({self.wallet_file}): {e}")
 
     def _load_persisted(self) -> bool:
-        """Lädt Balances aus Datei. Gibt True zurück, wenn erfolgreich geladen."""
+        """Lädt Snapshot plus Journal. Gibt True zurück, wenn erfolgreich geladen."""
         try:
             if not self.wallet_file or not os.path.exists(self.wallet_file):
                 return False
             with open(self.wallet_file, "r") as f:
                 data = json.load(f)
-            if isinstance(data, dict):
-                # nur bekannte Keys übernehmen, Rest ignorieren
-                self.balances = {
-                    "USDT": float(data.get("USDT", 0.0)),
-                    "BTC": float(data.get("BTC", 0.0)),
-                    "ETH": float(data.get("ETH", 0.0)),
-                    "ADA": float(data.get("ADA", 0.0)),
-                    "DOGE": float(data.get("DOGE", 0.0)),
-                    "SOL": float(data.get("SOL", 0.0)),
-                }
-                log_info(f"💾 PAPER: Wallet aus Datei geladen: {self.wallet_file}")
-                return True
-            return False
+            if not isinstance(data, dict):
+                return False
+            if isinstance(data.get("balances"), dict):
+                balances, seq = data["balances"], int(data.get("seq", 0))
+            else:
+                # Altes Format: flaches {Asset: Menge}
+                balances, seq = data, 0
+            self.balances = {str(k).upper(): float(v) for k, v in balances.items()}
+            replayed = 0
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, "r") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break  # unvollständige letzte Zeile (Abbruch beim Schreiben)
+                        if int(entry.get("seq", 0)) <= seq:
+                            continue
+                        self.balances.update({k: float(v) for k, v in entry.get("set", {}).items()})
+                        seq = int(entry["seq"])
+                        replayed += 1
+            self._seq = seq
+            log_info(f"💾 PAPER: Wallet aus Datei geladen: {self.wallet_file} ({replayed} Journal-Einträge)")
+            return True
         except Exception as e:
             log_info(f"⚠️ PAPER: Konnte Wallet nicht laden ({self.wallet_file}): {e}")
             return False
 
+    def _record(self, changed: dict) -> None:
+        """Merkt geänderte Assets für das Journal vor (Aufrufer hält self._lock)."""
+        if not self._persist_enabled:
+            return
+        self._seq += 1
+        self._pending.append({"seq": self._seq, "ts": round(time.time(), 3), "set": changed})
+
+    def flush(self) -> None:
+        """Hängt vorgemerkte Journal-Zeilen an; kompaktiert bei Bedarf."""
+        if not self._persist_enabled:
+            return
+        with self._io_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            try:
+                with open(self.journal_file, "a") as f:
+                    f.write("".join(json.dumps(entry) + "\n" for entry in batch))
+                self._journal_lines += len(batch)
+            except Exception as e:
+                log_info(f"⚠️ PAPER: Wallet-Journal konnte nicht geschrieben werden: {e}")
+                with self._lock:
+                    self._pending[:0] = batch
+                return
+        if self._journal_lines >= PAPER_WALLET_SNAPSHOT_LINES or (
+            self._journal_lines and time.time() - self._snapshot_at >= PAPER_WALLET_SNAPSHOT_SEC
+        ):
+            self._write_snapshot()
+
+    def _writer_loop(self) -> None:
+        while not self._stop.wait(PAPER_WALLET_FLUSH_SEC):
+            self.flush()
+
+    def close(self) -> None:
+        """Schreibt ausstehende Änderungen und einen Snapshot (beim Beenden)."""
+        if not self._persist_enabled or self._stop.is_set():
+            return
+        self._stop.set()
+        self.flush()
+        self._save_persisted()
+
+    # --- Lesen ---
     def get_balance(self, symbol="USDT"):
-        value = self.balances.get(symbol, 0.0)
-        log_info(f"💰 PAPER Wallet: {symbol}={value}")
-        return value
+        return self.balances.get(symbol, 0.0)
+
+    def snapshot(self) -> dict:
+        return dict(self.balances)
 
     def load_balance(self):
         pair = get_pair_list()[0]
@@ -98,6 +207,7 @@ class PaperWallet:
     def get_available_balance(self, coin: str) -> float:
         return self.get_balance(coin)
 
+    # --- Schreiben ---
     def update_balance(self, symbol: str, quantity: float, is_buy: bool, price: float = None, quote: str = None, fee_rate: float = None) -> bool:
         """Aktualisiert die Paper-Balances unter Berücksichtigung von Preis und Gebühren.
         - symbol: Basis-Asset (z. B. "DOGE")
@@ -125,32 +235,46 @@ class PaperWallet:
             price = 1.0  # Rückwärtskompatibilität
 
         base = symbol
-        quote_bal = self.balances.get(quote, 0.0)
-        base_bal = self.balances.get(base, 0.0)
+        with self._lock:
+            quote_bal = self.balances.get(quote, 0.0)
+            base_bal = self.balances.get(base, 0.0)
 
+            if is_buy:
+                cost = price * quantity
+                fee = cost * fee_rate
+                total = cost + fee
+                if quote_bal + 1e-12 < total:
+                    log_info(f"⚠️ PAPER: Nicht genug {quote} für Kauf – benötigt {total:.8f}, verfügbar {quote_bal:.8f}")
+                    return False
+                self.balances[quote] = quote_bal - total
+                self.balances[base] = base_bal + quantity
+                self._record({quote: self.balances[quote], base: self.balances[base]})
+            else:
+                sell_qty = min(quantity, base_bal)
+                if sell_qty <= 0:
+                    log_info(f"⚠️ PAPER: Keine {base}-Menge zum Verkauf verfügbar.")
+                    return False
+                proceeds = price * sell_qty
+                fee = proceeds * fee_rate
+                self.balances[base] = base_bal - sell_qty
+                self.balances[quote] = quote_bal + (proceeds - fee)
+                self._record({quote: self.balances[quote], base: self.balances[base]})
         if is_buy:
-            cost = price * quantity
-            fee = cost * fee_rate
-            total = cost + fee
-            if quote_bal + 1e-12 < total:
-                log_info(f"⚠️ PAPER: Nicht genug {quote} für Kauf – benötigt {total:.8f}, verfügbar {quote_bal:.8f}")
-                return False
-            self.balances[quote] = quote_bal - total
-            self.balances[base] = base_bal + quantity
             log_info(f"📥 PAPER: Gekauft {quantity:.8f} {base} @ {price:.8f} → Kosten {cost:.8f} {quote}, Fee {fee:.8f}")
-            if self._persist_enabled:
-                self._save_persisted()
-            return True
         else:
-            sell_qty = min(quantity, base_bal)
-            if sell_qty <= 0:
-                log_info(f"⚠️ PAPER: Keine {base}-Menge zum Verkauf verfügbar.")
-                return False
-            proceeds = price * sell_qty
-            fee = proceeds * fee_rate
-            self.balances[base] = base_bal - sell_qty
-            self.balances[quote] = quote_bal + (proceeds - fee)
             log_info(f"📤 PAPER: Verkauft {sell_qty:.8f} {base} @ {price:.8f} → Erlös {(proceeds - fee):.8f} {quote}, Fee {fee:.8f}")
-            if self._persist_enabled:
-                self._save_persisted()
-            return True
+        return True
+
+
+_paper_wallet = None
+_paper_wallet_lock = threading.Lock()
+
+
+def get_paper_wallet() -> PaperWallet:
+    """Prozessweite PaperWallet-Instanz (Datei wird nur einmal gelesen)."""
+    global _paper_wallet
+    if _paper_wallet is None:
+        with _paper_wallet_lock:
+            if _paper_wallet is None:
+                _paper_wallet = PaperWallet()
+    return _paper_wallet
@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from core.exec_algo import ChildOrderExecutor, ParentOrder, run_in_background, symbol_busy
+from core.filters import prepare_order
+from core.logger_setup import setup_logger
+from core.order_tracker import order_tracker, TERMINAL_STATES
+from core.price_service import price_service
+
+logger = setup_logger(__name__)
+
+# "taker" = bisheriges Verhalten (eine Limit-Order am letzten Preis), "passive" = Post-Only am Best Bid
+ENTRY_EXECUTION = os.getenv("ENTRY_EXECUTION", "taker").lower()
+# Spätestens nach dieser Zeit wird der Rest per Market-Order gekauft
+PASSIVE_ENTRY_TIMEOUT_SEC = float(os.getenv("PASSIVE_ENTRY_TIMEOUT_SEC", "20"))
+# Maximaler Abstand des Limits über dem Signalpreis beim Nachziehen (0.002 = 0.2 %)
+PASSIVE_MAX_CHASE_PCT = float(os.getenv("PASSIVE_MAX_CHASE_PCT", "0.002"))
+# Wie oft das Buch geprüft und ggf. neu bepreist wird
+PASSIVE_REPRICE_INTERVAL_SEC = float(os.getenv("PASSIVE_REPRICE_INTERVAL_SEC", "1.0"))
+# Ältere Best-Bid-Daten gelten als nicht vorhanden
+PASSIVE_BOOK_MAX_AGE_SEC = float(os.getenv("PASSIVE_BOOK_MAX_AGE_SEC", "3"))
+# Rest nach Ablauf per Market kaufen (false = Rest verfallen lassen)
+PASSIVE_TIMEOUT_TO_MARKET = os.getenv("PASSIVE_TIMEOUT_TO_MARKET", "true").lower() == "true"
+
+
+@dataclass
+class PassiveEntry(ParentOrder):
+    """BUY-Parent-Order mit Signalpreis als Arrival-Preis und Zähler für Neubepreisungen."""
+    strategy: str = "impulse"
+    algo: str = "post_only"
+    reprices: int = 0
+
+    @property
+    def signal_price(self) -> float:
+        return self.arrival_price
+
+    @property
+    def price_improvement_bps(self) -> Optional[float]:
+        """Positiv = günstiger gekauft als der Signalpreis."""
+        return self.slippage_bps
+
+    def metrics(self) -> dict:
+        metrics = super().metrics()
+        return {
+            "signal_price": self.signal_price,
+            "maker_qty": metrics["maker_qty"],
+            "taker_qty": metrics["taker_qty"],
+            "reprices": self.reprices,
+            "first_fill_ms": metrics["first_fill_ms"],
+            "fill_latency_ms": metrics["fill_latency_ms"],
+            "price_improvement_bps": self.price_improvement_bps,
+        }
+
+
+def passive_entry_active(symbol: str) -> bool:
+    """True, solange für das Symbol ein passiver Entry läuft (Engine soll kein zweites Signal senden)."""
+    return symbol_busy(symbol)
+
+
+def _best_bid(symbol: str) -> Optional[float]:
+    bid, _, age = price_service.get_book(symbol)
+    if bid is None or age > PASSIVE_BOOK_MAX_AGE_SEC:
+        return None
+    return bid
+
+
+class PassiveEntryExecutor(ChildOrderExecutor):
+    """
+    Führt einen BUY-Entry als Post-Only-Limit am Best Bid aus:
+      - folgt dem Best Bid nach oben, höchstens bis signal_price * (1 + PASSIVE_MAX_CHASE_PCT)
+      - storniert und setzt neu, sobald sich der gerundete Zielpreis ändert (Teilfills bleiben erhalten)
+      - nach PASSIVE_ENTRY_TIMEOUT_SEC wird der Rest per Market-Order gekauft
+    Fills kommen aus dem OrderTracker (privater Order-Feed), REST nur zum Abgleich.
+    Am Ende wird ein einziger BUY (VWAP aller Teilorders) in Historie und Positionen geschrieben,
+    inkl. Fill-Latenz und Preisverbesserung gegenüber dem Signalpreis.
+    """
+
+    # --- Einzelne Teilorder ---
+    def _place(self, entry: PassiveEntry, price, qty, post_only: bool) -> Optional[str]:
+        return self.place(entry, price, qty, post_only=post_only, tag="passive" if post_only else "ttm")
+
+    def _settle(self, entry: PassiveEntry, oid: str, maker: bool) -> None:
+        self.settle(entry, oid, maker=maker, wait=PASSIVE_REPRICE_INTERVAL_SEC)
+
+    def _poll(self, entry: PassiveEntry, oid: str):
+        """Wartet ein Reprice-Intervall auf Fill-Events; ohne Feed per REST."""
+        if order_tracker.feed_active:
+            order_tracker.wait_for_fill(oid, timeout=PASSIVE_REPRICE_INTERVAL_SEC)
+        else:
+            time.sleep(PASSIVE_REPRICE_INTERVAL_SEC)
+            order_tracker.reconcile(oid, self.trade_client, attempts=1)
+        tracked = order_tracker.get(oid)
+        if tracked is not None and tracked.filled_size > 0 and entry.first_fill_ts is None:
+            entry.first_fill_ts = time.time()
+        return tracked
+
+    # --- Ablauf ---
+    def execute(self, symbol: str, qty, signal_price: float, strategy: str = "impulse") -> dict:
+        _, qqty, err, notional = prepare_order(symbol, "buy", signal_price, qty)
+        if err:
+            logger.info(f"Local reject {symbol} buy: {err} (qty={qqty}, notional={notional})")
+            return {"status": "rejected_local", "reason": err, "symbol": symbol, "side": "buy"}
+        entry = PassiveEntry(symbol=symbol, qty=qqty, arrival_price=float(signal_price), strategy=strategy)
+        cap = entry.signal_price * (1 + PASSIVE_MAX_CHASE_PCT)
+        deadline = entry.started + PASSIVE_ENTRY_TIMEOUT_SEC
+        oid, resting_px = None, None
+
+        while time.time() < deadline and entry.remaining > 0:
+            bid = _best_bid(symbol)
+            target = min(bid if bid is not None else entry.signal_price, cap)
+            target_px, _, _, _ = prepare_order(symbol, "buy", target, entry.remaining)
+            if oid is None:
+                oid = self._place(entry, target_px, entry.remaining, post_only=True)
+                if oid is None:
+                    break
+                resting_px = target_px
+            elif target_px != resting_px:
+                # Buch hat sich bewegt → stornieren, Teilfill übernehmen, am neuen Best Bid neu setzen
+                self.cancel(oid)
+                self._settle(entry, oid, maker=True)
+                entry.reprices += 1
+                oid = None
+                continue
+            tracked = self._poll(entry, oid)
+            if tracked is not None and tracked.state in TERMINAL_STATES:
+                # Gefüllt oder abgelehnt (Post-Only hätte gekreuzt) → Stand übernehmen, ggf. neu setzen
+                self._settle(entry, oid, maker=True)
+                oid = None
+
+        if oid is not None:
+            self.cancel(oid)
+            self._settle(entry, oid, maker=True)
+
+        if entry.remaining > 0 and PASSIVE_TIMEOUT_TO_MARKET:
+            logger.info(f"⏱️ Passiver Entry {symbol}: Timeout – kaufe Rest {entry.remaining} per Market")
+            ttm = self._place(entry, entry.signal_price, entry.remaining, post_only=False)
+            if ttm is not None:
+                self._settle(entry, ttm, maker=False)
+
+        return self._finish(entry)
+
+    def _finish(self, entry: PassiveEntry) -> dict:
+        result = self.record(entry, sender="passive_entry", order_type="post_only")
+        metrics = entry.metrics()
+        if result["status"] == "cancelled":
+            logger.info(f"🧯 Passiver Entry {entry.symbol} ohne Fill beendet ({metrics})")
+        else:
+            logger.info(
+                f"✅ Passiver Entry {entry.symbol}: {entry.filled_size} @ {entry.avg_price} "
+                f"(maker {metrics['maker_qty']}, taker {metrics['taker_qty']}, "
+                f"Latenz {metrics['fill_latency_ms']} ms, Verbesserung {metrics['price_improvement_bps']} bps)"
+            )
+        return result
+
+
+def submit_passive_entry(api, symbol: str, qty, signal_price: float, strategy: str = "impulse",
+                         on_done: Callable[[dict], None] = None) -> Optional[threading.Thread]:
+    """
+    Startet einen passiven Entry im Hintergrund (der Preis-Handler wird nicht blockiert).
+    on_done erhält das Ergebnis-Dict. None, wenn für das Symbol bereits ein Entry läuft.
+    """
+    return run_in_background(
+        symbol,
+        lambda: PassiveEntryExecutor(api).execute(symbol, qty, signal_price, strategy),
+        on_done=on_done,
+        name="passive-entry",
+    )
@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 from core.utils import ensure_directory
 from core.logger import log_info
 from core.telegram_utils import send_safe_message
+from core.order_journal import order_journal, ORDER_JOURNAL_FILE
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,11 +15,10 @@ TELEGRAM_CHAT_ID_PRIVATE = os.getenv("TELEGRAM_CHAT_ID_PRIVATE")
 TELEGRAM_CHAT_ID_CHANNEL = os.getenv("TELEGRAM_CHAT_ID_CHANNEL")
 DAILY_REPORT_FILE = "data/performance.json"
 
-ORDER_HISTORY_FILE = "data/order_history.json"
+ORDER_HISTORY_FILE = ORDER_JOURNAL_FILE
 
 def log_trade(order):
-    """Loggt eine Order in die zentrale order_history.json"""
-    ensure_directory(os.path.dirname(ORDER_HISTORY_FILE))
+    """Loggt eine Order in das zentrale Order-Journal"""
 
     order_data = {
         "id": order.get("id"),
@@ -37,33 +37,18 @@ def log_trade(order):
     }
 
     try:
-        # Bestehende Daten laden
-        if os.path.exists(ORDER_HISTORY_FILE):
-            with open(ORDER_HISTORY_FILE, "r") as f:
-                trades = json.load(f)
-        else:
-            trades = []
-
         # Wenn Order mit gleicher ID existiert, aber aktueller Eintrag hat mehr Felder, dann ersetzen
-        existing_ids = [t.get("id") for t in trades]
-        if order_data["id"] in existing_ids:
-            index = existing_ids.index(order_data["id"])
-            old = trades[index]
+        old = order_journal.get(order_data["id"]) if order_data["id"] and order_journal.contains(order_data["id"]) else None
+        if old is not None:
             if sum(v is not None for v in order_data.values()) > sum(v is not None for v in old.values()):
-                trades[index] = order_data
+                order_journal.upsert(order_data)
                 log_info(f"♻️ Order mit mehr Details ersetzt: {order_data['id']}")
             else:
                 log_info(f"⚠️ Doppelter Order-Eintrag erkannt, wird nicht erneut gespeichert: {order_data['id']}")
-            with open(ORDER_HISTORY_FILE, "w") as f:
-                json.dump(trades, f, indent=4)
             return
 
-        # Eintrag hinzufügen und speichern
-        trades.append(order_data)
-        with open(ORDER_HISTORY_FILE, "w") as f:
-            json.dump(trades, f, indent=4)
-
-        log_info(f"📘 Order gespeichert in order_history.json: {order_data['side']} {order_data['symbol']} ({order_data['quantity']})")
+        order_journal.append(order_data)
+        log_info(f"📘 Order gespeichert im Order-Journal: {order_data['side']} {order_data['symbol']} ({order_data['quantity']})")
 
     except Exception as e:
         log_info(f"❌ Fehler beim Loggen der Order: {e}")
@@ -71,48 +56,39 @@ def log_trade(order):
 
 # --- Performance Reporting & Telegram ---
 
-def calculate_performance():
-    """Berechnet PnL, Trefferquote und Drawdown aus ORDER_HISTORY_FILE und gibt ein Dict zurück."""
-    if not os.path.exists(ORDER_HISTORY_FILE):
-        return {
-            "pnl": 0.0,
-            "hit_rate": 0.0,
-            "drawdown": 0.0,
-            "num_trades": 0,
-            "num_wins": 0,
-            "num_losses": 0,
-        }
-    with open(ORDER_HISTORY_FILE, "r") as f:
-        trades = json.load(f)
-    if not trades:
-        return {
-            "pnl": 0.0,
-            "hit_rate": 0.0,
-            "drawdown": 0.0,
-            "num_trades": 0,
-            "num_wins": 0,
-            "num_losses": 0,
-        }
-
-    # Nur abgeschlossene Trades mit PnL berücksichtigen
-    closed_trades = [t for t in trades if t.get("pnl") is not None]
-    num_trades = len(closed_trades)
-    pnl_total = sum(t.get("pnl", 0.0) for t in closed_trades)
-    num_wins = sum(1 for t in closed_trades if t.get("pnl", 0.0) > 0)
-    num_losses = sum(1 for t in closed_trades if t.get("pnl", 0.0) < 0)
-    hit_rate = (num_wins / num_trades) * 100 if num_trades > 0 else 0.0
+def calculate_performance(journal=None):
+    """
+    Berechnet PnL, Trefferquote und Drawdown aus dem Order-Journal (gestreamt) und gibt ein Dict zurück.
+    `journal` erlaubt die Auswertung eines anderen Journals (z.B. eines Backtest-Laufs).
+    """
+    journal = journal or order_journal
+    # Nur abgeschlossene Trades mit PnL berücksichtigen; Kennzahlen in einem Durchlauf
+    num_trades = 0
+    pnl_total = 0.0
+    num_wins = 0
+    num_losses = 0
 
     # Drawdown-Berechnung (maximaler Verlust vom letzten Hoch)
     equity = 0.0
     peak = 0.0
     max_drawdown = 0.0
-    for t in closed_trades:
-        equity += t.get("pnl", 0.0)
+    for t in journal.iter_orders():
+        if t.get("pnl") is None:
+            continue
+        pnl = t.get("pnl", 0.0)
+        num_trades += 1
+        pnl_total += pnl
+        if pnl > 0:
+            num_wins += 1
+        elif pnl < 0:
+            num_losses += 1
+        equity += pnl
         if equity > peak:
             peak = equity
         dd = peak - equity
         if dd > max_drawdown:
             max_drawdown = dd
+    hit_rate = (num_wins / num_trades) * 100 if num_trades > 0 else 0.0
 
     return {
         "pnl": pnl_total,
@@ -171,12 +147,9 @@ def send_daily_report():
 
 # --- Detailliertes Dashboard & Export/Plot ---
 
-def generate_detailed_report():
+def generate_detailed_report(journal=None):
     """Erstellt einen detaillierten Bericht pro Symbol mit PnL, Winrate und Gebührenanteil."""
-    if not os.path.exists(ORDER_HISTORY_FILE):
-        return {}
-    with open(ORDER_HISTORY_FILE, "r") as f:
-        trades = json.load(f)
+    trades = (journal or order_journal).load_all()
     if not trades:
         return {}
 
@@ -203,24 +176,18 @@ def generate_detailed_report():
     return report
 
 
-def export_performance_csv(file_path="data/performance_export.csv"):
+def export_performance_csv(file_path="data/performance_export.csv", journal=None):
     """Exportiert die gesamte Orderhistorie als CSV für externe Analyse."""
-    if not os.path.exists(ORDER_HISTORY_FILE):
-        return
-    with open(ORDER_HISTORY_FILE, "r") as f:
-        trades = json.load(f)
+    trades = (journal or order_journal).load_all()
     if not trades:
         return
     df = pd.DataFrame(trades)
     df.to_csv(file_path, index=False)
 
 
-def generate_equity_curve_plot(output_path="data/equity_curve.png"):
+def generate_equity_curve_plot(output_path="data/equity_curve.png", journal=None):
     """Erstellt eine Equity-Kurve basierend auf der Orderhistorie."""
-    if not os.path.exists(ORDER_HISTORY_FILE):
-        return
-    with open(ORDER_HISTORY_FILE, "r") as f:
-        trades = json.load(f)
+    trades = (journal or order_journal).load_all()
     if not trades:
         return
     df = pd.DataFrame(trades)
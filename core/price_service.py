@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Standard-Höchstalter (Sekunden) eines WS-Preises, bevor per REST nachgeladen wird
+PRICE_MAX_AGE_SEC = float(os.getenv("PRICE_MAX_AGE_SEC", "5"))
+# Maximale Wartezeit auf einen bereits laufenden REST-Abruf eines anderen Threads
+PRICE_FALLBACK_WAIT_SEC = float(os.getenv("PRICE_FALLBACK_WAIT_SEC", "10"))
+
+
+class PriceService:
+    """
+    Zentrale Preisquelle: liefert den letzten WebSocket-Preis inkl. Alter und
+    fällt nur dann auf REST zurück, wenn der Preis älter als `max_age` ist.
+    Gleichzeitige REST-Fallbacks für dasselbe Symbol teilen sich einen Aufruf.
+    """
+
+    def __init__(self, default_max_age: float = PRICE_MAX_AGE_SEC):
+        self.default_max_age = default_max_age
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._books: Dict[str, Tuple[float, float, float]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._rest_fetcher: Optional[Callable[[str], float]] = None
+
+    def set_rest_fetcher(self, fetcher: Callable[[str], float]) -> None:
+        """Registriert die REST-Funktion (symbol -> Preis) für den Fallback."""
+        self._rest_fetcher = fetcher
+
+    def update(self, symbol: str, price: float, ts: Optional[float] = None) -> None:
+        """Speichert einen neuen Preis (z.B. aus dem WS-Ticker) mit Zeitstempel."""
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        if price <= 0:
+            return
+        ts = time.time() if ts is None else float(ts)
+        current = self._prices.get(symbol)
+        # Ältere Werte (z.B. verspäteter REST-Abruf) überschreiben keinen neueren WS-Preis
+        if current is not None and current[1] > ts:
+            return
+        self._prices[symbol] = (price, ts)
+
+    def get_with_age(self, symbol: str) -> Tuple[Optional[float], Optional[float]]:
+        """Gibt (Preis, Alter in Sekunden) des letzten bekannten Preises zurück, ohne REST."""
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None, None
+        price, ts = entry
+        return price, max(0.0, time.time() - ts)
+
+    def update_book(self, symbol: str, bid, ask, ts: Optional[float] = None) -> None:
+        """Speichert Best Bid/Ask (z.B. bestBid/bestAsk aus dem WS-Ticker)."""
+        try:
+            bid, ask = float(bid), float(ask)
+        except (TypeError, ValueError):
+            return
+        if bid <= 0 or ask <= 0:
+            return
+        self._books[symbol] = (bid, ask, time.time() if ts is None else float(ts))
+
+    def get_book(self, symbol: str) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Gibt (Best Bid, Best Ask, Alter in Sekunden) zurück, ohne REST."""
+        entry = self._books.get(symbol)
+        if entry is None:
+            return None, None, None
+        bid, ask, ts = entry
+        return bid, ask, max(0.0, time.time() - ts)
+
+    def get_price(self, symbol: str, max_age: Optional[float] = None) -> float:
+        """
+        Liefert einen Preis, der höchstens `max_age` Sekunden alt ist.
+        Ist der gecachte Preis zu alt oder fehlt er, wird REST (koalesziert) abgefragt.
+        Schlägt REST fehl, wird der letzte bekannte Preis (egal wie alt) oder 0.0 geliefert.
+        """
+        max_age = self.default_max_age if max_age is None else max_age
+        price, age = self.get_with_age(symbol)
+        if price is not None and age <= max_age:
+            return price
+        fetched = self._fetch_coalesced(symbol)
+        if fetched:
+            return fetched
+        if price is not None:
+            logger.info(f"⚠️ REST-Preis für {symbol} nicht verfügbar – verwende {age:.1f}s alten Preis {price}")
+            return price
+        return 0.0
+
+    def _fetch_coalesced(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            fut = self._inflight.get(symbol)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[symbol] = fut
+        if not leader:
+            try:
+                return fut.result(timeout=PRICE_FALLBACK_WAIT_SEC)
+            except Exception:
+                return None
+        result = None
+        try:
+            if self._rest_fetcher is not None:
+                result = self._rest_fetcher(symbol)
+            if result:
+                self.update(symbol, result)
+        except Exception as e:
+            logger.info(f"⚠️ REST-Fallback für {symbol} fehlgeschlagen: {e}")
+            result = None
+        finally:
+            with self._lock:
+                self._inflight.pop(symbol, None)
+            fut.set_result(result)
+        return result
+
+
+price_service = PriceService()
+
+
+def get_price(symbol: str, max_age: Optional[float] = None) -> float:
+    return price_service.get_price(symbol, max_age=max_age)
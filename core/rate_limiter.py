@@ -0,0 +1,36 @@
+import os
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-sicherer Token-Bucket: `rate` Requests pro Sekunde, Bursts bis `burst`.
+    `acquire()` blockiert, bis ein Token frei ist.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = max(float(rate), 0.001)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Gemeinsamer Limiter für öffentliche KuCoin-Marktdaten-Endpunkte (Klines, Ticker, Symbole)
+market_data_limiter = RateLimiter(
+    rate=float(os.getenv("KUCOIN_PUBLIC_RATE_PER_SEC", "8")),
+    burst=int(os.getenv("KUCOIN_PUBLIC_RATE_BURST", "8")),
+)
@@ -30,7 +30,7 @@ from core.telegram_utils import send_safe_message
 
 load_dotenv()
 
-TRADES_FILE = os.getenv("ORDER_HISTORY_FILE", "data/order_history.json")
+TRADES_FILE = os.getenv("ORDER_HISTORY_FILE", "data/order_history.jsonl")
 
 
 # Backup-Funktion für eine Datei mit Zeitstempel
@@ -85,7 +85,8 @@ def restore_trades() -> dict:
     Lädt das Trade-Log für Recovery.
     Gibt immer ein Dict zurück (Key = Trade-ID), um konsistente Verarbeitung zu gewährleisten.
     """
-    trades = load_json_file(TRADES_FILE)
+    from core.order_journal import order_journal
+    trades = order_journal.load_all()
     if isinstance(trades, list):
         trades = {str(trade.get("id", f"trade_{i}")): trade for i, trade in enumerate(trades) if isinstance(trade, dict)}
     return trades if isinstance(trades, dict) else {}
@@ -0,0 +1,171 @@
+import os
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+from core.tick_store import FIELDS, RECORD_SIZE, TICK_DIR, tick_files
+
+logger = setup_logger(__name__)
+
+# Spalten-Offsets im Segment werden auf Cache-Lines ausgerichtet
+ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SharedArraysRef:
+    """
+    Leichtgewichtiger, picklebarer Deskriptor eines Shared-Memory-Segments mit benannten 1D-Spalten:
+    (Name, dtype, Byte-Offset, Länge) je Spalte. Wird statt der Arrays an Worker übergeben.
+    """
+    name: str
+    columns: Tuple[Tuple[str, str, int, int], ...]
+
+    @property
+    def length(self) -> int:
+        return self.columns[0][3] if self.columns else 0
+
+
+class SharedArrays:
+    """Besitzer eines Segments: legt es an, füllt die Spalten und gibt es mit close() wieder frei (unlink)."""
+
+    def __init__(self, layout: Dict[str, Tuple[str, int]]):
+        columns, offset = [], 0
+        for key, (dtype, length) in layout.items():
+            columns.append((key, np.dtype(dtype).str, offset, int(length)))
+            offset += -(-int(length) * np.dtype(dtype).itemsize // ALIGNMENT) * ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.ref = SharedArraysRef(self.shm.name, tuple(columns))
+        self.arrays = _views(self.shm, self.ref, writeable=True)
+
+    @classmethod
+    def from_arrays(cls, **arrays: np.ndarray) -> "SharedArrays":
+        arrays = {key: np.asarray(value) for key, value in arrays.items()}
+        segment = cls({key: (value.dtype, len(value)) for key, value in arrays.items()})
+        for key, value in arrays.items():
+            segment.arrays[key][:] = value
+        return segment
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    def close(self) -> None:
+        self.arrays = {}
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            self.shm.close()
+        except BufferError:
+            # Views des Besitzers noch referenziert – Mapping verschwindet mit dem letzten Verweis
+            pass
+
+
+def _views(shm: shared_memory.SharedMemory, ref: SharedArraysRef, writeable: bool) -> Dict[str, np.ndarray]:
+    views = {}
+    for key, dtype, offset, length in ref.columns:
+        view = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        view.flags.writeable = writeable
+        views[key] = view
+    return views
+
+
+# Je Prozess geöffnete Segmente; die Views bleiben gültig, solange das SharedMemory-Objekt lebt
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]] = {}
+_attach_lock = threading.Lock()
+
+
+def attach(ref: SharedArraysRef) -> Dict[str, np.ndarray]:
+    """Read-only Views auf die Spalten eines Segments – ohne Kopie, je Prozess nur einmal geöffnet."""
+    with _attach_lock:
+        entry = _attached.get(ref.name)
+        if entry is None:
+            shm = shared_memory.SharedMemory(name=ref.name)
+            entry = _attached[ref.name] = (shm, _views(shm, ref, writeable=False))
+        return entry[1]
+
+
+def detach(ref: Optional[SharedArraysRef] = None) -> None:
+    """Schließt ein (oder alle) geöffneten Segmente dieses Prozesses; Views darauf sind danach ungültig."""
+    with _attach_lock:
+        names = [ref.name] if ref is not None else list(_attached)
+        for name in names:
+            entry = _attached.pop(name, None)
+            if entry is not None:
+                entry[1].clear()
+                try:
+                    entry[0].close()
+                except BufferError:
+                    # Noch referenzierte Views (z.B. in laufender Auswertung) – Prozessende räumt auf
+                    pass
+
+
+class SharedMarketData:
+    """
+    Registry der Segmente eines Optimierungs-/Backtest-Laufs (Kontextmanager). Der Elternprozess lädt
+    Zeit/Preis/Größe je Symbol einmal in Shared Memory; Worker erhalten nur SharedArraysRef und
+    hängen sich mit attach() read-only an, statt die Arrays bei jedem Auftrag gepickelt zu bekommen.
+    """
+
+    def __init__(self):
+        self._segments: Dict[str, SharedArrays] = {}
+
+    def put(self, key: str, **arrays: np.ndarray) -> SharedArraysRef:
+        self.release(key)
+        segment = self._segments[key] = SharedArrays.from_arrays(**arrays)
+        return segment.ref
+
+    def load_ticks(self, symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+                   base_dir: str = TICK_DIR, key: Optional[str] = None) -> Optional[SharedArraysRef]:
+        """
+        Aufgezeichnete Ticks (core.tick_store) direkt aus den per mmap geöffneten Tagesdateien in die
+        Spalten ts/price/size des Segments kopieren – ohne Zwischen-Arrays im Prozessspeicher.
+        """
+        slices: List[np.ndarray] = []
+        for path in tick_files(symbol, start, end, base_dir):
+            records = os.path.getsize(path) // RECORD_SIZE
+            if not records:
+                continue
+            # Unvollständiger letzter Datensatz wird über die Form abgeschnitten
+            mm = np.memmap(path, dtype=np.float64, mode="r", shape=(records, FIELDS))
+            lo = int(np.searchsorted(mm[:, 0], start, side="left")) if start is not None else 0
+            hi = int(np.searchsorted(mm[:, 0], end, side="right")) if end is not None else records
+            if hi > lo:
+                slices.append(mm[lo:hi])
+        total = sum(len(part) for part in slices)
+        if not total:
+            return None
+        key = key or symbol
+        self.release(key)
+        segment = self._segments[key] = SharedArrays({"ts": ("f8", total), "price": ("f8", total), "size": ("f8", total)})
+        pos = 0
+        for part in slices:
+            for j, column in enumerate(("ts", "price", "size")):
+                segment.arrays[column][pos:pos + len(part)] = part[:, j]
+            pos += len(part)
+        del slices
+        return segment.ref
+
+    @property
+    def nbytes(self) -> int:
+        return sum(segment.nbytes for segment in self._segments.values())
+
+    def release(self, key: str) -> None:
+        segment = self._segments.pop(key, None)
+        if segment is not None:
+            segment.close()
+
+    def close(self) -> None:
+        for key in list(self._segments):
+            self.release(key)
+
+    def __enter__(self) -> "SharedMarketData":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
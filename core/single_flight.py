@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Wie lange (Sekunden) ein abgeschlossenes Ergebnis noch an weitere Aufrufer verteilt wird
+SINGLE_FLIGHT_WINDOW_SEC = float(os.getenv("SINGLE_FLIGHT_WINDOW_SEC", "1.0"))
+# Maximale Wartezeit eines Mitläufers auf den laufenden Aufruf
+SINGLE_FLIGHT_WAIT_SEC = float(os.getenv("SINGLE_FLIGHT_WAIT_SEC", "15"))
+
+
+class SingleFlight:
+    """
+    Bündelt gleichzeitige, identische Lese-Requests: pro Schlüssel läuft höchstens ein Aufruf,
+    alle anderen Aufrufer erhalten dessen Ergebnis. Erfolgreiche Ergebnisse werden zusätzlich
+    `window` Sekunden weitergegeben. Fehler werden an alle Wartenden durchgereicht, aber nicht gecacht.
+    Ergebnisse werden geteilt und dürfen von Aufrufern nicht verändert werden.
+    invalidate() erhöht einen Generationszähler: Aufrufe, die davor gestartet sind, werden
+    weder gecacht noch an spätere Aufrufer verteilt.
+    """
+
+    def __init__(self, window: float = SINGLE_FLIGHT_WINDOW_SEC):
+        self.window = window
+        self._inflight: Dict[Hashable, Future] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        # Generation je Schlüssel plus globale Generation (invalidate() ohne Schlüssel)
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executed": 0, "saved_inflight": 0, "saved_window": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], window: float = None) -> Any:
+        window = self.window if window is None else window
+        with self._lock:
+            self._stats["calls"] += 1
+            recent = self._recent.get(key)
+            if recent is not None and time.monotonic() - recent[0] <= window:
+                self._stats["saved_window"] += 1
+                return recent[1]
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+                generation = self._generation(key)
+                self._stats["executed"] += 1
+            else:
+                self._stats["saved_inflight"] += 1
+        if not leader:
+            return fut.result(timeout=SINGLE_FLIGHT_WAIT_SEC)
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._release(key, fut)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._release(key, fut)
+            # Nach einem invalidate() während des Aufrufs ist das Ergebnis möglicherweise veraltet
+            if window > 0 and generation == self._generation(key):
+                self._recent[key] = (time.monotonic(), result)
+        fut.set_result(result)
+        return result
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def _release(self, key: Hashable, fut: Future) -> None:
+        # Nur den eigenen Eintrag entfernen – nach invalidate() kann bereits ein neuer Aufruf laufen
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Verwirft gecachte Ergebnisse (z.B. nach einer Order, die Balances ändert).
+        Laufende Aufrufe werden abgekoppelt: spätere Aufrufer starten einen neuen Request.
+        """
+        with self._lock:
+            if key is None:
+                self._epoch += 1
+                self._recent.clear()
+                self._inflight.clear()
+            else:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._recent.pop(key, None)
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        """Zähler: calls = Anfragen gesamt, executed = echte Aufrufe, saved_* = eingesparte Aufrufe."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["saved"] = stats["saved_inflight"] + stats["saved_window"]
+        return stats
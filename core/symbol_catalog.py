@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+from core.filters import filter_book, SymbolFilters
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+SYMBOL_CATALOG_FILE = os.getenv("SYMBOL_CATALOG_FILE", "data/symbol_catalog.json")
+SYMBOL_CATALOG_REFRESH_SEC = int(os.getenv("SYMBOL_CATALOG_REFRESH_SEC", "3600"))
+
+# Reihenfolge der Felder im kompakten Snapshot (eine Liste pro Symbol statt Dict)
+_SNAPSHOT_FIELDS = ("baseIncrement", "priceIncrement", "quoteIncrement", "baseMinSize", "minFunds", "enableTrading")
+
+
+@dataclass(frozen=True)
+class SymbolInfo:
+    """Metadaten eines Symbols. Zahlen bleiben Strings, damit Decimal-Rundung exakt bleibt."""
+    symbol: str
+    base_increment: Optional[str] = None
+    price_increment: Optional[str] = None
+    quote_increment: Optional[str] = None
+    base_min_size: Optional[str] = None
+    min_funds: Optional[str] = None
+    enable_trading: bool = True
+
+    @classmethod
+    def from_kucoin(cls, entry: dict) -> Optional["SymbolInfo"]:
+        sym = (entry.get("symbol") or entry.get("symbolName") or entry.get("name") or "").upper()
+        if not sym:
+            return None
+
+        def _s(*keys):
+            for k in keys:
+                v = entry.get(k)
+                if v not in (None, ""):
+                    return str(v)
+            return None
+
+        return cls(
+            symbol=sym,
+            base_increment=_s("baseIncrement", "lotSize"),
+            price_increment=_s("priceIncrement", "tickSize"),
+            quote_increment=_s("quoteIncrement"),
+            base_min_size=_s("baseMinSize"),
+            min_funds=_s("minFunds"),
+            enable_trading=bool(entry.get("enableTrading", True)),
+        )
+
+    def to_row(self) -> list:
+        return [self.base_increment, self.price_increment, self.quote_increment,
+                self.base_min_size, self.min_funds, self.enable_trading]
+
+    @classmethod
+    def from_row(cls, symbol: str, row: list) -> "SymbolInfo":
+        values = dict(zip(_SNAPSHOT_FIELDS, row))
+        return cls(
+            symbol=symbol,
+            base_increment=values.get("baseIncrement"),
+            price_increment=values.get("priceIncrement"),
+            quote_increment=values.get("quoteIncrement"),
+            base_min_size=values.get("baseMinSize"),
+            min_funds=values.get("minFunds"),
+            enable_trading=bool(values.get("enableTrading", True)),
+        )
+
+    def to_filters(self) -> SymbolFilters:
+        # KuCoin liefert priceIncrement/baseIncrement und bei Spot minFunds
+        price_inc = Decimal(self.price_increment or "0.00000001")
+        base_inc = Decimal(self.base_increment or "0.00000001")
+        try:
+            min_funds = Decimal(self.min_funds) if self.min_funds is not None else None
+        except Exception:
+            min_funds = None
+        return SymbolFilters(price_increment=price_inc, base_increment=base_inc, min_funds=min_funds)
+
+    def as_legacy_dict(self) -> dict:
+        """Format von get_symbol_filters(): floats oder None."""
+        def safe_float(val):
+            try:
+                return float(val)
+            except Exception:
+                return None
+        return {
+            "baseMinSize": safe_float(self.base_min_size),
+            "baseIncrement": safe_float(self.base_increment),
+            "priceIncrement": safe_float(self.price_increment),
+            "minFunds": safe_float(self.min_funds),
+        }
+
+
+class SymbolCatalog:
+    """
+    Nach Symbol indizierter Katalog der KuCoin-Symbol-Metadaten.
+    - Lädt beim Start einen lokalen Snapshot (kein Netzwerk nötig)
+    - Aktualisiert sich per Hintergrund-Thread in festen Intervallen
+    - Befüllt den globalen FilterBook nach jedem Laden/Refresh
+    """
+
+    def __init__(self, path: str = SYMBOL_CATALOG_FILE):
+        self.path = path
+        self._by_symbol: Dict[str, SymbolInfo] = {}
+        self._updated_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._by_symbol)
+
+    def get(self, symbol: str) -> Optional[SymbolInfo]:
+        return self._by_symbol.get(symbol.upper())
+
+    def age(self) -> float:
+        """Sekunden seit dem letzten erfolgreichen Laden (inf, wenn leer)."""
+        return time.time() - self._updated_at if self._updated_at else float("inf")
+
+    def _publish(self, mapping: Dict[str, SymbolInfo], updated_at: float) -> None:
+        # Dict wird komplett ersetzt – Leser sehen immer einen konsistenten Stand
+        self._by_symbol = mapping
+        self._updated_at = updated_at
+        filter_book.set_all({sym: info.to_filters() for sym, info in mapping.items()})
+
+    def load_snapshot(self) -> bool:
+        """Lädt den lokalen Snapshot. Gibt True zurück, wenn Symbole geladen wurden."""
+        try:
+            if not os.path.exists(self.path):
+                return False
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            rows = data.get("symbols") or {}
+            mapping = {sym: SymbolInfo.from_row(sym, row) for sym, row in rows.items()}
+            if not mapping:
+                return False
+            self._publish(mapping, float(data.get("ts") or 0.0))
+            logger.info(f"💾 Symbol-Katalog aus Snapshot geladen: {len(mapping)} Symbole (Alter {self.age():.0f}s)")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Symbol-Snapshot konnte nicht geladen werden ({self.path}): {e}")
+            return False
+
+    def _save_snapshot(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            payload = {
+                "ts": self._updated_at,
+                "fields": list(_SNAPSHOT_FIELDS),
+                "symbols": {sym: info.to_row() for sym, info in self._by_symbol.items()},
+            }
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Symbol-Snapshot konnte nicht gespeichert werden ({self.path}): {e}")
+
+    def refresh(self, api_client=None) -> bool:
+        """Lädt die Symbolliste per REST, aktualisiert Index, FilterBook und Snapshot."""
+        with self._refresh_lock:
+            try:
+                if api_client is None:
+                    from core.kucoin_api import kucoin_client
+                    api_client = kucoin_client
+                data = api_client.get_symbols()
+                mapping = {}
+                for entry in data or []:
+                    info = SymbolInfo.from_kucoin(entry)
+                    if info is not None:
+                        mapping[info.symbol] = info
+                if not mapping:
+                    logger.warning("No KuCoin symbols returned; SymbolCatalog not updated.")
+                    return False
+                self._publish(mapping, time.time())
+                self._save_snapshot()
+                logger.info(f"Loaded {len(mapping)} KuCoin symbols into SymbolCatalog/FilterBook")
+                return True
+            except Exception as e:
+                logger.warning(f"Could not refresh KuCoin symbol catalog: {e}")
+                return False
+
+    def ensure_loaded(self, api_client=None, max_age: float = SYMBOL_CATALOG_REFRESH_SEC) -> None:
+        """
+        Startpfad: Snapshot laden; nur ohne Snapshot wird synchron per REST geladen.
+        Ein veralteter Snapshot wird sofort genutzt und im Hintergrund erneuert.
+        """
+        if not self._by_symbol and not self.load_snapshot():
+            self.refresh(api_client)
+            return
+        if self.age() > max_age:
+            threading.Thread(target=self.refresh, args=(api_client,), daemon=True, name="symbol-catalog-refresh").start()
+
+    def start_background_refresh(self, api_client=None, interval: float = SYMBOL_CATALOG_REFRESH_SEC) -> None:
+        """Startet (einmalig) den periodischen Refresh-Thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                self.refresh(api_client)
+
+        self._thread = threading.Thread(target=_loop, daemon=True, name="symbol-catalog")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+symbol_catalog = SymbolCatalog()
@@ -0,0 +1,116 @@
+import atexit
+import bisect
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Ticks aus dem WS-Feed mitschreiben (Grundlage für Backtests und Optimierung)
+RECORD_TICKS = os.getenv("RECORD_TICKS", "false").lower() == "true"
+TICK_DIR = os.getenv("TICK_DIR", "data/ticks")
+TICK_FLUSH_SEC = float(os.getenv("TICK_FLUSH_SEC", "5"))
+TICK_FLUSH_COUNT = int(os.getenv("TICK_FLUSH_COUNT", "2000"))
+
+# Datensatz: drei float64 in nativer Byte-Reihenfolge (timestamp in Sekunden, Preis, Größe), eine Datei je Symbol und UTC-Tag
+FIELDS = 3
+RECORD_SIZE = 8 * FIELDS
+TICK_SUFFIX = ".ticks"
+
+
+def tick_path(symbol: str, day: str, base_dir: str = TICK_DIR) -> str:
+    return os.path.join(base_dir, symbol.upper(), f"{day}{TICK_SUFFIX}")
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def tick_files(symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+               base_dir: str = TICK_DIR) -> List[str]:
+    """Tagesdateien eines Symbols, die [start, end] berühren, chronologisch."""
+    folder = os.path.join(base_dir, symbol.upper())
+    if not os.path.isdir(folder):
+        return []
+    first = _day(start) if start is not None else None
+    last = _day(end) if end is not None else None
+    days = sorted(name[:-len(TICK_SUFFIX)] for name in os.listdir(folder) if name.endswith(TICK_SUFFIX))
+    return [os.path.join(folder, f"{d}{TICK_SUFFIX}") for d in days
+            if (first is None or d >= first) and (last is None or d <= last)]
+
+
+def load_ticks(symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+               base_dir: str = TICK_DIR) -> Tuple[array, array, array]:
+    """(timestamps, preise, größen) als array('d') für [start, end]."""
+    ts_out, px_out, sz_out = array("d"), array("d"), array("d")
+    for path in tick_files(symbol, start, end, base_dir):
+        raw = array("d")
+        with open(path, "rb") as f:
+            data = f.read()
+        # Unvollständiger letzter Datensatz (Abbruch beim Schreiben) wird ignoriert
+        raw.frombytes(data[:len(data) - len(data) % RECORD_SIZE])
+        ts, px, sz = raw[0::FIELDS], raw[1::FIELDS], raw[2::FIELDS]
+        # Innerhalb einer Tagesdatei sind die Ticks in Empfangsreihenfolge (aufsteigend) abgelegt
+        lo = bisect.bisect_left(ts, start) if start is not None else 0
+        hi = bisect.bisect_right(ts, end) if end is not None else len(ts)
+        ts_out.extend(ts[lo:hi])
+        px_out.extend(px[lo:hi])
+        sz_out.extend(sz[lo:hi])
+    return ts_out, px_out, sz_out
+
+
+class TickRecorder:
+    """Puffert Ticks je Symbol im Speicher und hängt sie blockweise an die Tagesdateien an."""
+
+    def __init__(self, base_dir: str = TICK_DIR, flush_sec: float = TICK_FLUSH_SEC,
+                 flush_count: int = TICK_FLUSH_COUNT):
+        self.base_dir = base_dir
+        self.flush_sec = flush_sec
+        self.flush_count = flush_count
+        self._buffers: Dict[str, array] = {}
+        self._pending = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, symbol: str, price: float, size: float = 0.0, ts: Optional[float] = None) -> None:
+        now = time.time() if ts is None else float(ts)
+        with self._lock:
+            buf = self._buffers.get(symbol)
+            if buf is None:
+                buf = self._buffers[symbol] = array("d")
+            buf.extend((now, float(price), float(size or 0.0)))
+            self._pending += 1
+            due = self._pending >= self.flush_count or now - self._last_flush >= self.flush_sec
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            self._pending = 0
+            self._last_flush = time.time()
+        for symbol, buf in buffers.items():
+            # Nach UTC-Tag aufteilen (ein Puffer kann über Mitternacht reichen)
+            start = 0
+            while start < len(buf):
+                day = _day(buf[start])
+                end = start
+                while end < len(buf) and _day(buf[end]) == day:
+                    end += FIELDS
+                path = tick_path(symbol, day, self.base_dir)
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "ab") as f:
+                        f.write(buf[start:end].tobytes())
+                except OSError as e:
+                    logger.warning(f"⚠️ Ticks für {symbol} konnten nicht geschrieben werden: {e}")
+                start = end
+
+
+tick_recorder = TickRecorder()
@@ -2,6 +2,7 @@ import os
 import logging
 import json
 from typing import Optional
+from core.price_service import price_service
 
 def get_env_variable(key: str, default=None, cast_type=str):
     """Liest eine Umgebungsvariable und castet sie in den gewünschten Typ."""
@@ -24,6 +25,7 @@ price_cache = {}  # Simpler global cache für zuletzt bekannte Preise pro Symbol
 
 def update_price_cache(symbol: str, price: float):
     price_cache[symbol] = price
+    price_service.update(symbol, price)
 
 def get_cached_price(symbol: str) -> Optional[float]:
     return price_cache.get(symbol)
@@ -49,15 +51,15 @@ def load_json_dict_file(filepath):
     except Exception:
         return {}
 
+def _is_order_history(filepath) -> bool:
+    from core.order_journal import ORDER_JOURNAL_FILE, LEGACY_ORDER_HISTORY_FILE
+    path = os.path.abspath(str(filepath))
+    return path in (os.path.abspath(ORDER_JOURNAL_FILE), os.path.abspath(LEGACY_ORDER_HISTORY_FILE))
+
 def append_to_order_history(order_data: dict, file_path: str = "data/order_history.json", fee: float = None):
-    """Hängt einen einzelnen Order-Eintrag an order_history.json an, inkl. Timestamp und optional berechnetem Fee."""
+    """Hängt einen einzelnen Order-Eintrag an die Order-Historie an, inkl. Timestamp und optional berechnetem Fee."""
     from datetime import datetime
 
-    ensure_directory(os.path.dirname(file_path))
-    history = load_json_file(file_path, default=[])
-    if not isinstance(history, list):
-        history = []
-
     # Fee automatisch berechnen, falls nicht übergeben und Infos vorhanden
     if fee is None:
         if 'filled_amount' in order_data and 'taker_fee_rate' in order_data:
@@ -75,9 +77,7 @@ def append_to_order_history(order_data: dict, file_path: str = "data/order_histo
     if not get_env_variable("SILENT_MODE", "False", cast_type=str).lower() == "true":
         print(f"📘 Speichere Order-History nach {file_path}: {order_data}")
 
-    history.append(order_data)
-    with open(file_path, 'w') as f:
-        json.dump(history, f, indent=4)
+    append_to_json_file(file_path, order_data)
 
 def save_json_file(filepath: str, data: dict):
     if not isinstance(filepath, (str, bytes, os.PathLike)):
@@ -91,10 +91,17 @@ def save_json_file(filepath: str, data: dict):
 
 # --- Neue Funktion: append_to_json_file ---
 def append_to_json_file(filepath, new_entry):
-    data = load_json_file(filepath, default=[])
-
     from core.logger import log_warning, log_info
 
+    # Order-Historie: Append-only Journal mit Index statt Laden/Neuschreiben der ganzen Datei
+    if _is_order_history(filepath):
+        from core.order_journal import order_journal
+        if not order_journal.append(new_entry):
+            log_info(f"⚠️ Duplikat mit ID {new_entry.get('id')} in {filepath} erkannt – Eintrag wird übersprungen.")
+        return
+
+    data = load_json_file(filepath, default=[])
+
     if isinstance(data, dict):
         log_warning(f"⚠️ Erwartete Liste in {filepath}, aber erhalten: dict. Ersetze durch leere Liste.")
         data = []
@@ -9,7 +9,7 @@ def get_dynamic_position_size(pair: str, risk_percent: float = 1.0, min_position
 
         base, quote = pair.split("-")
         available_capital = wallet_instance.get_balance(quote)
-        current_price = get_price(pair)
+        current_price = get_price(pair, max_age=SIZING_PRICE_MAX_AGE_SEC)
         atr_value = get_atr(pair)
 
         if not available_capital or not current_price or not atr_value:
@@ -33,6 +33,8 @@ import os
 
 # Logging-Flag für Wallet-Übersicht
 LOG_WALLET_OVERVIEW = os.getenv("LOG_WALLET_OVERVIEW", "True") == "True"
+# Höchstalter (Sekunden) des Preises für die Positionsgrößenberechnung
+SIZING_PRICE_MAX_AGE_SEC = float(os.getenv("SIZING_PRICE_MAX_AGE_SEC", "5"))
 
 class Wallet:
     def __init__(self):
@@ -114,7 +116,7 @@ def calculate_position_size(pair: str, percent: float = 5.0):
         return None
 
     from core.kucoin_api import get_price  # aktualisiert
-    current_price = get_price(pair)
+    current_price = get_price(pair, max_age=SIZING_PRICE_MAX_AGE_SEC)
     if not current_price:
         return None
 
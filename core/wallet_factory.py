@@ -1,11 +1,11 @@
 from config.config import MODE
 from core.wallet import Wallet as LiveWallet
-from core.paper_wallet import PaperWallet
+from core.paper_wallet import get_paper_wallet
 
 def get_wallet():
     if MODE == "LIVE":
         return LiveWallet()
     elif MODE == "PAPER":
-        return PaperWallet()
+        return get_paper_wallet()
     else:
         raise ValueError(f"Unbekannter Modus: {MODE}")
\ No newline at end of file
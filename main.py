@@ -5,12 +5,11 @@ sys.stderr.reconfigure(encoding='utf-8')
 
 import argparse
 from dotenv import load_dotenv
-import json
 import threading
 import time
 
 from core.orders_db import get_db
-from core.kucoin_api import refresh_symbol_filters
+from core.symbol_catalog import symbol_catalog
 
 from core.logger import logger
 from core.telegram_utils import send_telegram_message, send_position_summary
@@ -42,12 +41,18 @@ def main():
     logger.info(f"Idempotency bucket: {DEFAULT_BUCKET_MS} ms")
 
     # === Phase 1 Init: Idempotenz-DB + Symbol-Filter ===
-    get_db()
+    # Abgeschlossene Orders periodisch in Tages-Archive verschieben (Hot-Tabelle bleibt klein)
+    get_db().start_archival()
     try:
-        # KuCoin-Client instanzieren wie im Stream-Code und Filter laden
+        # Symbol-Katalog aus lokalem Snapshot laden (REST nur ohne Snapshot), danach periodisch im Hintergrund erneuern
         from core.kucoin_api import KuCoinClientWrapper
         api_client = KuCoinClientWrapper()
-        refresh_symbol_filters(api_client)
+        symbol_catalog.ensure_loaded(api_client)
+        symbol_catalog.start_background_refresh(api_client)
+        if run_context == "LIVE":
+            # Lokales Balance-Abbild für Pre-Trade-Checks, periodisch mit der Börse abgeglichen
+            from core.balance_ledger import balance_ledger
+            balance_ledger.start_reconciler(api_client)
     except Exception as e:
         logger.warning(f"⚠️ KuCoin-Symbolfilter konnten nicht geladen werden: {e}")
 
@@ -60,6 +65,13 @@ def main():
     if os.getenv("DEBUG_MODE", "false").lower() == "true":
         logger.debug(f"♻️ Recovery: {len(positions)} Positionen geladen.")
 
+    # === 3c. Preis-Buffer mit einem allTickers-Snapshot vorbelegen ===
+    try:
+        from strategies.realtime_engine import warm_price_buffers
+        warm_price_buffers(pairs)
+    except Exception as e:
+        logger.warning(f"⚠️ Preis-Buffer konnten nicht vorbelegt werden: {e}")
+
     logger.info(f"🚀 Starte HF Trading Bot im {mode}-Modus für: {', '.join(pairs)}")
 
     # === 4. Telegram-Startnachricht ===
@@ -84,13 +96,17 @@ def main():
         # Optimierte Parameter laden (Filter-Status-Log entfernt)
         optimized_params_path = "data/bot_params.json"
         if os.path.exists(optimized_params_path):
-            with open(optimized_params_path, "r") as f:
-                optimized_params = json.load(f)
+            from strategies.bot_params import load_bot_params
+            optimized_params, params_meta = load_bot_params(optimized_params_path)
             import hashlib
             with open(optimized_params_path, "rb") as f:
                 params_bytes = f.read()
                 params_hash = hashlib.sha256(params_bytes).hexdigest()
             logger.info(f"🔧 bot_params.json geladen – SHA256: {params_hash}")
+            if params_meta:
+                provenance = params_meta.get("provenance", {})
+                logger.info(f"  Veröffentlicht {params_meta.get('published_at')} von {provenance.get('tool', '?')} "
+                            f"(Lauf {provenance.get('run_id', '-')}, Parameter-SHA256 {params_meta.get('sha256', '')[:12]})")
             # Beispielwerte loggen
             for pair, settings in list(optimized_params.items())[:3]:
                 logger.info(f"  {pair}: TP={settings.get('tp')} SL={settings.get('sl')} ScaleOut={settings.get('scale_out')}")
@@ -103,7 +119,7 @@ def main():
         except Exception as e:
             logger.exception(f"❌ Schwerer Fehler im Hauptprozess: {e}")
     else:
-        logger.error("❌ Keine bot_params.json gefunden – bitte manuell bereitstellen, bevor der Bot gestartet werden kann.")
+        logger.error("❌ Keine bot_params.json gefunden – bitte mit `python -m strategies.optimizer SYMBOL...` erzeugen oder manuell bereitstellen, bevor der Bot gestartet werden kann.")
         try:
             send_telegram_message(
                 "❌ <b>Bot-Start fehlgeschlagen</b>\nKeine <code>obot_params.json</code> gefunden.\nBitte manuell bereitstellen und Bot neu starten.",
@@ -0,0 +1,478 @@
+import argparse
+import json
+import math
+import os
+import time
+import uuid
+from array import array
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.logger_setup import setup_logger
+from strategies.impulse_logic import (
+    resolve_params, price_change, entry_gate, is_impulse, initial_levels, trailing_levels,
+    exit_action, recovery_needed, recovery_levels,
+)
+
+logger = setup_logger(__name__)
+
+BACKTEST_DIR = os.getenv("BACKTEST_DIR", "data/backtests")
+# Notional je Entry (USDT) und pauschale Slippage der simulierten Market-Orders
+BACKTEST_NOTIONAL = float(os.getenv("BACKTEST_NOTIONAL", "100"))
+BACKTEST_SLIPPAGE_BPS = float(os.getenv("BACKTEST_SLIPPAGE_BPS", "0"))
+
+# Engine-Einstellungen (wie strategies/realtime_engine)
+ENGINE_LOOP_INTERVAL = float(os.getenv("ENGINE_LOOP_INTERVAL", 10))
+TAKER_FEE = float(os.getenv("TAKER_FEE", 0.001))
+USE_TRAILING_SL = os.getenv("USE_TRAILING_SL", "false").lower() == "true"
+TRAILING_UPDATE_COOLDOWN = int(os.getenv("TRAILING_UPDATE_COOLDOWN", 600))
+# Die Engine rechnet den ATR(14) aus 15min-Kerzen
+ATR_BAR_SEC = 900
+ATR_PERIOD = 14
+
+
+class SimClock:
+    """Simulierte Uhr; wird vom Backtest je Event vorgestellt."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+
+class SimBroker:
+    """
+    Füllt Market-Orders sofort zum Eventpreis (± Slippage) mit Taker-Gebühr, führt die offenen
+    Positionen und protokolliert jeden Fill im order_history-Format (pnl in %, pnl_usdt absolut).
+    """
+
+    def __init__(self, clock: SimClock, fee_rate: float = TAKER_FEE, slippage_bps: float = BACKTEST_SLIPPAGE_BPS,
+                 mode: str = "BACKTEST"):
+        self.clock = clock
+        self.fee_rate = fee_rate
+        self.slippage = slippage_bps / 10_000
+        self.mode = mode
+        self.positions: Dict[str, dict] = {}
+        self.trades: List[dict] = []
+
+    def get_open_position(self, symbol: str) -> Optional[dict]:
+        return self.positions.get(symbol)
+
+    def update_sl(self, symbol: str, sl: float) -> None:
+        if symbol in self.positions:
+            self.positions[symbol]["sl"] = sl
+
+    def update_tp(self, symbol: str, tp: float) -> None:
+        if symbol in self.positions:
+            self.positions[symbol]["tp"] = tp
+
+    def _record(self, symbol: str, side: str, qty: float, price: float, fee: float, pos: dict,
+                reason: str, pnl: Optional[float] = 0.0, pnl_usdt: Optional[float] = None) -> dict:
+        trade = {
+            "id": uuid.uuid4().hex[:24],
+            "timestamp": int(self.clock.now),
+            "mode": self.mode,
+            "symbol": symbol,
+            "side": side,
+            "quantity": round(qty, 12),
+            "price": price,
+            "fee": round(fee, 8),
+            "entry_price": pos["entry_price"],
+            "sl": pos.get("sl"),
+            "tp": pos.get("tp"),
+            "pnl": pnl,
+            "pnl_usdt": pnl_usdt,
+            "reason": reason,
+        }
+        self.trades.append(trade)
+        return {"status": "filled", "orderId": trade["id"], "price": price, "size": qty}
+
+    def buy(self, symbol: str, qty: float, price: float, reason: str = "impulse") -> dict:
+        px = price * (1 + self.slippage)
+        fee = qty * px * self.fee_rate
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = {"entry_price": px, "quantity": qty, "entry_fee": fee, "sl": None, "tp": None}
+        else:
+            total = pos["quantity"] + qty
+            pos["entry_price"] = (pos["entry_price"] * pos["quantity"] + px * qty) / total
+            pos["quantity"] = total
+            pos["entry_fee"] += fee
+        return self._record(symbol, "BUY", qty, px, fee, pos, reason)
+
+    def sell(self, symbol: str, qty: float, price: float, reason: str) -> Optional[dict]:
+        pos = self.positions.get(symbol)
+        if pos is None or qty <= 0:
+            return None
+        qty = min(qty, pos["quantity"])
+        px = price * (1 - self.slippage)
+        fee = qty * px * self.fee_rate
+        entry_fee = pos["entry_fee"] * qty / pos["quantity"]
+        entry = pos["entry_price"]
+        pnl_usdt = (px - entry) * qty - (fee + entry_fee)
+        pnl = (px - entry) / entry * 100.0
+        response = self._record(symbol, "SELL", qty, px, fee, pos, reason, round(pnl, 4), round(pnl_usdt, 6))
+        pos["quantity"] -= qty
+        pos["entry_fee"] -= entry_fee
+        if pos["quantity"] <= 1e-12:
+            del self.positions[symbol]
+        return response
+
+
+class ImpulseBacktest:
+    """
+    Spielt Ticks (oder aus Kerzen erzeugte Events) eines Symbols durch dieselbe Entscheidungslogik
+    wie on_new_price (strategies/impulse_logic): Taktung mit ENGINE_LOOP_INTERVAL, Positions-/
+    Cooldown-Sperre, Impuls-Entry, Trailing, Scale-Out, SL/TP und Recovery. Der ATR wird laufend
+    aus den abgeschlossenen 15min-Kerzen der Events berechnet (EWM wie strategies.atr).
+    """
+
+    def __init__(self, symbol: str, settings: Optional[dict] = None, clock: Optional[SimClock] = None,
+                 broker: Optional[SimBroker] = None, notional: float = BACKTEST_NOTIONAL,
+                 loop_interval: float = ENGINE_LOOP_INTERVAL, use_trailing: bool = USE_TRAILING_SL,
+                 trailing_cooldown: float = TRAILING_UPDATE_COOLDOWN):
+        self.symbol = symbol
+        self.params = resolve_params(settings)
+        self.clock = clock or SimClock()
+        self.broker = broker or SimBroker(self.clock)
+        self.notional = notional
+        self.loop_interval = loop_interval
+        self.use_trailing = use_trailing
+        self.trailing_cooldown = trailing_cooldown
+
+        self.prev_price: Optional[float] = None
+        self.next_eval = -math.inf
+        self.last_entry_ts = 0.0
+        self.last_exit_ts = 0.0
+        self.last_trailing_ts = 0.0
+        self.entry_count = 0
+
+        # ATR-Zustand: laufende Kerze + EWM (adjust=True) über die True Ranges
+        self.bar_end = -math.inf
+        self.bar = None
+        self.prev_close: Optional[float] = None
+        self.atr_alpha = 2.0 / (ATR_PERIOD + 1)
+        self.atr_num = 0.0
+        self.atr_den = 0.0
+        self.atr_bars = 0
+        self.atr: Optional[float] = None
+
+        self.events = 0
+        self.evaluations = 0
+        self.blocked = {"max_positions": 0, "cooldown": 0}
+        self.elapsed = 0.0
+
+    # --- ATR ---
+    def _close_bar(self, high: float, low: float, close: float) -> None:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        decay = 1.0 - self.atr_alpha
+        self.atr_num = self.atr_num * decay + tr
+        self.atr_den = self.atr_den * decay + 1.0
+        self.atr_bars += 1
+        # calculate_atr braucht period + 1 Kerzen
+        if self.atr_bars > ATR_PERIOD:
+            self.atr = self.atr_num / self.atr_den
+
+    # --- Events ---
+    def run(self, timestamps: Sequence[float], prices: Sequence[float]) -> dict:
+        """Verarbeitet die Events in Zeitreihenfolge; kann für Folgeabschnitte erneut aufgerufen werden."""
+        started = time.perf_counter()
+        interval = self.loop_interval
+        bar_sec = ATR_BAR_SEC
+        next_eval = self.next_eval
+        bar_end = self.bar_end
+        high, low, close = self.bar if self.bar else (0.0, 0.0, None)
+        clock = self.clock
+        evaluate = self._evaluate
+        for ts, price in zip(timestamps, prices):
+            if ts >= bar_end:
+                if close is not None:
+                    self._close_bar(high, low, close)
+                bar_end = (ts // bar_sec + 1) * bar_sec
+                high = low = close = price
+            else:
+                if price > high:
+                    high = price
+                elif price < low:
+                    low = price
+                close = price
+            if ts >= next_eval:
+                next_eval = ts + interval
+                clock.now = ts
+                evaluate(ts, price)
+        self.next_eval = next_eval
+        self.bar_end = bar_end
+        self.bar = (high, low, close) if close is not None else None
+        self.events += len(timestamps)
+        self.elapsed += time.perf_counter() - started
+        return self.result()
+
+    def _evaluate(self, now: float, price: float) -> None:
+        self.evaluations += 1
+        params = self.params
+        broker = self.broker
+        symbol = self.symbol
+        prev = self.prev_price
+        self.prev_price = price
+
+        # Impuls-basierter Entry (Sperren gelten nur für den Entry, Exits laufen weiter)
+        if prev is not None:
+            blocked, _ = entry_gate(params, now, self.entry_count, self.last_entry_ts, self.last_exit_ts)
+            if blocked:
+                self.blocked[blocked] += 1
+            elif is_impulse(price_change(prev, price), params) and symbol not in broker.positions:
+                response = broker.buy(symbol, self.notional / price, price, reason="impulse")
+                self.last_entry_ts = now
+                self.entry_count += 1
+                new_sl, new_tp = initial_levels(response["price"], self.atr, params)
+                broker.update_sl(symbol, new_sl)
+                broker.update_tp(symbol, new_tp)
+
+        position = broker.positions.get(symbol)
+        if position is None:
+            return
+
+        # Trailing Stop-Loss / Take-Profit
+        if self.use_trailing and now - self.last_trailing_ts >= self.trailing_cooldown:
+            new_sl, new_tp = trailing_levels(price, self.atr, position["sl"], position["tp"], params)
+            if new_sl > (position["sl"] or 0):
+                position["sl"] = new_sl
+            if new_tp > (position["tp"] or 0):
+                position["tp"] = new_tp
+            self.last_trailing_ts = now
+
+        # Take-Profit / Stop-Loss / Scale-Out
+        action = exit_action(price, position["sl"], position["tp"], params)
+        if action is not None:
+            reason, share = action
+            if reason == "scale_out":
+                broker.sell(symbol, position["quantity"] * share, price, reason)
+                return
+            broker.sell(symbol, position["quantity"], price, reason)
+            self.last_exit_ts = now
+            self.entry_count = 0
+            return
+
+        # Recovery: SL/TP nachladen falls fehlen oder zu weit entfernt
+        if any(recovery_needed(position["entry_price"], position["sl"], position["tp"])):
+            new_sl, new_tp = recovery_levels(position["entry_price"], position["sl"], position["tp"], self.atr, params)
+            if new_sl is not None:
+                position["sl"] = new_sl
+            if new_tp is not None:
+                position["tp"] = new_tp
+
+    def result(self) -> dict:
+        sells = [t for t in self.broker.trades if t["symbol"] == self.symbol and t["side"] == "SELL"]
+        pnl_usdt = sum(t["pnl_usdt"] for t in sells)
+        return {
+            "symbol": self.symbol,
+            "events": self.events,
+            "evaluations": self.evaluations,
+            "entries": sum(1 for t in self.broker.trades if t["symbol"] == self.symbol and t["side"] == "BUY"),
+            "exits": len(sells),
+            "wins": sum(1 for t in sells if t["pnl_usdt"] > 0),
+            "pnl_usdt": round(pnl_usdt, 6),
+            "fees": round(sum(t["fee"] for t in self.broker.trades if t["symbol"] == self.symbol), 6),
+            "blocked": dict(self.blocked),
+            "open_position": self.broker.positions.get(self.symbol),
+            "elapsed_sec": round(self.elapsed, 4),
+            "events_per_sec": int(self.events / self.elapsed) if self.elapsed > 0 else None,
+        }
+
+
+def events_from_candles(rows: Sequence[Sequence], step: int) -> Tuple[array, array]:
+    """
+    Zerlegt Kerzen (CandleStore-Zeilen: timestamp, open, close, high, low, ...) in vier Events je Kerze:
+    Open, dann Low/High in plausibler Reihenfolge (steigende Kerze zuerst Low), zuletzt Close.
+    """
+    timestamps, prices = array("d"), array("d")
+    quarter = step / 4.0
+    for row in rows:
+        ts = float(row[0])
+        ts = ts / 1000.0 if ts > 1e12 else ts
+        o, c, h, l = float(row[1]), float(row[2]), float(row[3]), float(row[4])
+        path = (o, l, h, c) if c >= o else (o, h, l, c)
+        for i, px in enumerate(path):
+            timestamps.append(ts + i * quarter)
+            prices.append(px)
+    return timestamps, prices
+
+
+def load_events(symbol: str, start: float, end: float, source: str = "ticks",
+                interval: str = "1min") -> Tuple[Sequence[float], Sequence[float]]:
+    """Aufgezeichnete Ticks (core.tick_store) oder Kerzen aus dem lokalen Candle-Cache (lädt fehlende nach)."""
+    if source == "ticks":
+        from core.tick_store import load_ticks
+        timestamps, prices, _ = load_ticks(symbol, start, end)
+        return timestamps, prices
+    from core.candle_store import INTERVAL_SECONDS, candle_downloader
+    rows = candle_downloader.fetch(symbol, interval, int(start), int(end))
+    return events_from_candles(rows, INTERVAL_SECONDS[interval])
+
+
+# Kennzahlen, die ImpulseBacktest und Kernel gleich liefern; nur diese landen im Ergebnis-Cache
+# (ohne Laufzeitmessung und ohne Kernel-Extras wie max_drawdown/jit)
+CACHED_RESULT_KEYS = ("events", "evaluations", "entries", "exits", "wins", "pnl_usdt", "fees", "blocked", "open_position")
+
+
+def _cached_metrics(result: dict) -> dict:
+    return {key: result.get(key) for key in CACHED_RESULT_KEYS}
+
+
+def run_symbol(symbol: str, timestamps: Sequence[float], prices: Sequence[float], settings: Optional[dict] = None,
+               notional: float = BACKTEST_NOTIONAL, kernel: bool = False, use_cache: bool = True) -> Tuple[dict, List[dict]]:
+    """
+    Backtest eines Symbols → (Ergebnis, Trades). Vorher Blick in den Ergebnis-Cache (strategies.result_cache):
+    Schlüssel aus den Events, den aufgelösten Parametern samt Simulations-Einstellungen und der Code-Version.
+    ImpulseBacktest und Kernel liefern identische Trades und teilen sich deshalb die Einträge.
+    Ein Treffer enthält nur CACHED_RESULT_KEYS; elapsed_sec ist 0, events_per_sec None (nichts gerechnet).
+    """
+    from strategies.result_cache import data_digest, result_cache
+
+    key = result_cache.key("backtest", data_digest(timestamps, prices), {
+        "params": asdict(resolve_params(settings)),
+        "notional": notional,
+        "loop_interval": ENGINE_LOOP_INTERVAL,
+        "use_trailing": USE_TRAILING_SL,
+        "trailing_cooldown": TRAILING_UPDATE_COOLDOWN,
+        "fee_rate": TAKER_FEE,
+        "slippage_bps": BACKTEST_SLIPPAGE_BPS,
+    })
+    if use_cache:
+        hit = result_cache.get(key, with_trades=True)
+        if hit is not None:
+            result = dict(_cached_metrics(hit["metrics"]), symbol=symbol, cached=True, elapsed_sec=0.0, events_per_sec=None)
+            return result, hit["trades"]
+
+    if kernel:
+        from strategies.kernels import simulate
+        result, trades = simulate(symbol, timestamps, prices, settings, notional=notional)
+    else:
+        clock = SimClock()
+        broker = SimBroker(clock)
+        result = ImpulseBacktest(symbol, settings, clock=clock, broker=broker, notional=notional).run(timestamps, prices)
+        trades = broker.trades
+    if use_cache:
+        result_cache.put(key, _cached_metrics(result), trades)
+    return result, trades
+
+
+def backtest_shared(symbol: str, data, settings: Optional[dict], notional: float = BACKTEST_NOTIONAL,
+                    kernel: bool = False, use_cache: bool = True) -> Tuple[dict, List[dict]]:
+    """
+    Worker-Auftrag: Backtest eines Symbols über Shared-Memory-Events (core.shared_market_data).
+    Die Spalten werden read-only angehängt und als memoryview durchlaufen (ohne Kopie, Python-floats).
+    """
+    from core.shared_market_data import attach
+
+    arrays = attach(data)
+    return run_symbol(symbol, memoryview(arrays["ts"]), memoryview(arrays["price"]), settings, notional,
+                      kernel, use_cache)
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest der Impuls-Strategie über Ticks oder Kerzen")
+    parser.add_argument("symbols", nargs="+", help="z.B. ETH-USDT BTC-USDT")
+    parser.add_argument("--start", help="UNIX-Sekunden oder ISO-Datum (UTC); Standard: --days vor --end")
+    parser.add_argument("--end", help="UNIX-Sekunden oder ISO-Datum (UTC); Standard: jetzt")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--source", choices=["ticks", "candles"], default="ticks")
+    parser.add_argument("--interval", default="1min", help="Kerzen-Intervall bei --source candles")
+    parser.add_argument("--params", default="data/bot_params.json")
+    parser.add_argument("--notional", type=float, default=BACKTEST_NOTIONAL)
+    parser.add_argument("--out", default=BACKTEST_DIR)
+    parser.add_argument("--kernel", action="store_true",
+                        help="Simulations-Kernel (strategies.kernels, Numba falls installiert) statt ImpulseBacktest")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Symbole parallel in Prozessen (Events über Shared Memory)")
+    parser.add_argument("--no-cache", action="store_true", help="Ergebnis-Cache weder lesen noch schreiben")
+    args = parser.parse_args(argv)
+
+    end = _parse_time(args.end) if args.end else time.time()
+    start = _parse_time(args.start) if args.start else end - args.days * 86400
+    try:
+        with open(args.params, "r") as f:
+            bot_params = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"⚠️ {args.params} nicht gefunden – Backtest mit ENV-Defaults")
+        bot_params = {}
+
+    clock = SimClock(start)
+    broker = SimBroker(clock)
+    results = []
+    use_cache = not args.no_cache
+    if args.workers > 1 and len(args.symbols) > 1:
+        # Symbole sind unabhängig (Positionen je Symbol) → gleiche Trades wie sequentiell, nur parallel
+        from concurrent.futures import ProcessPoolExecutor
+        from core.shared_market_data import SharedMarketData
+
+        with SharedMarketData() as shared, ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = []
+            for symbol in args.symbols:
+                if args.source == "ticks":
+                    ref = shared.load_ticks(symbol, start, end)
+                else:
+                    timestamps, prices = load_events(symbol, start, end, args.source, args.interval)
+                    ref = shared.put(symbol, ts=timestamps, price=prices) if len(timestamps) else None
+                if ref is None:
+                    logger.warning(f"⚠️ Keine Daten für {symbol} im Zeitraum")
+                    continue
+                futures.append(pool.submit(backtest_shared, symbol, ref, bot_params.get(symbol), args.notional,
+                                           args.kernel, use_cache))
+            for future in futures:
+                result, trades = future.result()
+                results.append(result)
+                broker.trades.extend(trades)
+    else:
+        for symbol in args.symbols:
+            timestamps, prices = load_events(symbol, start, end, args.source, args.interval)
+            if not len(timestamps):
+                logger.warning(f"⚠️ Keine Daten für {symbol} im Zeitraum")
+                continue
+            result, trades = run_symbol(symbol, timestamps, prices, bot_params.get(symbol), args.notional,
+                                        args.kernel, use_cache)
+            results.append(result)
+            broker.trades.extend(trades)
+    for result in results:
+        timing = "aus Cache" if result.get("cached") else f"in {result['elapsed_sec']}s ({result['events_per_sec']}/s)"
+        logger.info(f"🧪 {result['symbol']}: {result['events']} Events {timing}, "
+                    f"{result['exits']} Exits, PnL {result['pnl_usdt']:.4f} USDT")
+
+    # Trades als eigenes Order-Journal, damit core.performance es auswerten kann
+    from core.order_journal import OrderJournal
+    from core.performance import calculate_performance, generate_detailed_report
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    os.makedirs(args.out, exist_ok=True)
+    journal = OrderJournal(os.path.join(args.out, f"{run_id}.jsonl"), os.path.join(args.out, f"{run_id}.db"),
+                           migrate_legacy=False)
+    journal.append_many(broker.trades)
+    summary = {
+        "run_id": run_id,
+        "start": start,
+        "end": end,
+        "source": args.source,
+        "results": results,
+        "performance": calculate_performance(journal),
+        "per_symbol": generate_detailed_report(journal),
+    }
+    with open(os.path.join(args.out, f"{run_id}.summary.json"), "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    print(json.dumps(summary, indent=2, default=str))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
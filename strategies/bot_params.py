@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+BOT_PARAMS_FILE = "data/bot_params.json"
+# Reservierter Schlüssel für Prüfsumme und Herkunft; alle anderen Schlüssel sind Symbole
+META_KEY = "_meta"
+
+
+def params_digest(params: dict) -> str:
+    """SHA256 über die kanonische JSON-Form der Symbol-Parameter (ohne _meta)."""
+    payload = {k: v for k, v in params.items() if not k.startswith("_")}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def load_bot_params(path: str = BOT_PARAMS_FILE) -> Tuple[dict, Optional[dict]]:
+    """
+    (Parameter je Symbol, _meta-Block oder None). Stimmt die eingetragene Prüfsumme nicht,
+    wurde die Datei nach der Veröffentlichung von Hand geändert → Warnung, Werte gelten trotzdem.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    meta = data.get(META_KEY) if isinstance(data.get(META_KEY), dict) else None
+    params = {k: v for k, v in data.items() if not k.startswith("_")}
+    if meta and meta.get("sha256") and meta["sha256"] != params_digest(params):
+        logger.warning(f"⚠️ {path}: Prüfsumme passt nicht zum Inhalt (manuell geändert?)")
+    return params, meta
+
+
+def publish_bot_params(params: dict, provenance: Optional[dict] = None, path: str = BOT_PARAMS_FILE) -> str:
+    """Schreibt die Parameter atomar mit _meta-Block (sha256, Zeitpunkt, Herkunft); gibt die Prüfsumme zurück."""
+    params = {k: v for k, v in params.items() if not k.startswith("_")}
+    digest = params_digest(params)
+    data = dict(params)
+    data[META_KEY] = {
+        "sha256": digest,
+        "published_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "provenance": provenance or {},
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"💾 {path} veröffentlicht – SHA256: {digest}")
+    return digest
@@ -0,0 +1,137 @@
+# IMPULSE LOGIC - Entscheidungen ohne Seiteneffekte (keine Orders, kein Logging, keine Uhr),
+# gemeinsam genutzt von strategies/realtime_engine (live) und strategies/backtest (simuliert)
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Feste SL/TP-Offsets (ohne ATR) aus bot_params sl/tp statt aus TRAILING_SL/TP_OFFSET übernehmen.
+# Risiko-Änderung für LIVE (z.B. ETH-USDT 0.2 %/0.3 % statt 0.5 %/2 %) – daher nur auf ausdrücklichen Wunsch
+BOT_PARAMS_FIXED_OFFSETS = os.getenv("BOT_PARAMS_FIXED_OFFSETS", "false").lower() == "true"
+
+
+@dataclass(frozen=True)
+class ImpulseParams:
+    impulse_threshold: float
+    reentry_cooldown: float
+    max_concurrent_positions: int
+    atr_sl_mult: float
+    atr_tp_mult: float
+    # Feste Offsets, falls kein ATR verfügbar ist
+    sl_offset: float
+    tp_offset: float
+    scale_out_active: bool
+    sell_percent: float
+
+
+def fixed_offsets(settings: Optional[dict] = None) -> Tuple[float, float]:
+    """(SL-, TP-Offset) ohne ATR: TRAILING_SL/TP_OFFSET, mit BOT_PARAMS_FIXED_OFFSETS die bot_params-Werte sl/tp."""
+    sl = float(os.getenv("TRAILING_SL_OFFSET", 0.005))
+    tp = float(os.getenv("TRAILING_TP_OFFSET", 0.02))
+    if BOT_PARAMS_FIXED_OFFSETS and settings:
+        sl = float(settings.get("sl", sl))
+        tp = float(settings.get("tp", tp))
+    return sl, tp
+
+
+def resolve_params(settings: Optional[dict] = None) -> ImpulseParams:
+    """Parameter eines Symbols aus seinem bot_params.json-Eintrag; fehlende Werte aus der ENV."""
+    settings = settings or {}
+    atr_sl_mult = settings.get("atr_sl_mult")
+    atr_tp_mult = settings.get("atr_tp_mult")
+    # Validierung der ATR-Parameter
+    if atr_sl_mult is None or atr_sl_mult < 0.1:
+        atr_sl_mult = float(os.getenv("ATR_MULTIPLIER_SL", 1.5))
+    if atr_tp_mult is None or atr_tp_mult < 0.1:
+        atr_tp_mult = float(os.getenv("ATR_MULTIPLIER_TP", 3.0))
+    scale_out = settings.get("scale_out") or {}
+    sl_offset, tp_offset = fixed_offsets(settings)
+    return ImpulseParams(
+        impulse_threshold=float(settings.get("impulse_threshold", os.getenv("IMPULSE_THRESHOLD", 0.001))),
+        reentry_cooldown=float(settings.get("reentry_cooldown", os.getenv("REENTRY_COOLDOWN", 120))),
+        max_concurrent_positions=int(settings.get("max_concurrent_positions", 1)),
+        atr_sl_mult=float(atr_sl_mult),
+        atr_tp_mult=float(atr_tp_mult),
+        sl_offset=sl_offset,
+        tp_offset=tp_offset,
+        scale_out_active=bool(scale_out.get("active", False)),
+        sell_percent=float(scale_out.get("sell_percent", 0) or 0),
+    )
+
+
+def price_change(last_price: float, price: float) -> float:
+    return (price - last_price) / last_price
+
+
+def entry_gate(params: ImpulseParams, now: float, entry_count: int,
+               last_entry_ts: float, last_exit_ts: float) -> Tuple[Optional[str], float]:
+    """
+    (Grund, Restwartezeit), falls für diesen Tick kein Entry erlaubt ist: "max_positions" oder
+    "cooldown" (ab letztem Entry/Exit). (None, 0) = Entry erlaubt. Sperrt nur den Entry –
+    Trailing, Exits und Recovery einer offenen Position laufen immer.
+    """
+    if entry_count >= params.max_concurrent_positions:
+        return "max_positions", 0.0
+    elapsed = now - max(last_entry_ts, last_exit_ts)
+    if elapsed < params.reentry_cooldown:
+        return "cooldown", params.reentry_cooldown - elapsed
+    return None, 0.0
+
+
+def is_impulse(change: float, params: ImpulseParams) -> bool:
+    return change >= params.impulse_threshold
+
+
+def initial_levels(entry_price: float, atr: Optional[float], params: ImpulseParams) -> Tuple[float, float]:
+    """(SL, TP) nach einem Entry: ATR × Multiplikator, ohne ATR feste Offsets."""
+    if atr:
+        return entry_price - atr * params.atr_sl_mult, entry_price + atr * params.atr_tp_mult
+    return entry_price * (1 - params.sl_offset), entry_price * (1 + params.tp_offset)
+
+
+def trailing_levels(price: float, atr: Optional[float], current_sl: Optional[float],
+                    current_tp: Optional[float], params: ImpulseParams) -> Tuple[float, float]:
+    """Nachgezogene (SL, TP) relativ zum aktuellen Preis; beide werden nur angehoben."""
+    if atr:
+        new_sl = price - atr * params.atr_sl_mult
+        new_tp = price + atr * params.atr_tp_mult
+    else:
+        new_sl = price - price * params.sl_offset
+        new_tp = price + price * params.tp_offset
+    return max(current_sl or 0, new_sl), max(current_tp or 0, new_tp)
+
+
+def exit_action(price: float, sl: Optional[float], tp: Optional[float],
+                params: ImpulseParams) -> Optional[Tuple[str, float]]:
+    """
+    ("stop_loss", 1.0), ("scale_out", Anteil) oder ("take_profit", 1.0) – Anteil bezogen auf die
+    offene Menge. Scale-Out greift bei jedem TP-Treffer, solange er aktiv ist.
+    """
+    if sl and price <= sl:
+        return "stop_loss", 1.0
+    if tp and price >= tp:
+        if params.scale_out_active and params.sell_percent > 0:
+            return "scale_out", params.sell_percent
+        return "take_profit", 1.0
+    return None
+
+
+def recovery_needed(entry_price: Optional[float], current_sl: Optional[float],
+                    current_tp: Optional[float]) -> Tuple[bool, bool]:
+    """(SL, TP) neu setzen? Ja, wenn er fehlt oder mehr als 10 % vom Entry entfernt ist."""
+    sl_update = current_sl is None or bool(
+        entry_price and current_sl < entry_price and abs(current_sl - entry_price) / entry_price > 0.1)
+    tp_update = current_tp is None or bool(
+        entry_price and current_tp > entry_price and abs(current_tp - entry_price) / entry_price > 0.1)
+    return sl_update, tp_update
+
+
+def recovery_levels(entry_price: Optional[float], current_sl: Optional[float], current_tp: Optional[float],
+                    atr: Optional[float], params: ImpulseParams) -> Tuple[Optional[float], Optional[float]]:
+    """Neue (SL, TP) für die laut recovery_needed fälligen Werte; sonst None."""
+    sl_update, tp_update = recovery_needed(entry_price, current_sl, current_tp)
+    new_sl = new_tp = None
+    if sl_update:
+        new_sl = entry_price - atr * params.atr_sl_mult if atr else entry_price * (1 - params.sl_offset)
+    if tp_update:
+        new_tp = entry_price + atr * params.atr_tp_mult if atr else entry_price * (1 + params.tp_offset)
+    return new_sl, new_tp
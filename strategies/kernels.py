@@ -0,0 +1,462 @@
+# KERNELS - innere Simulationsschleifen der Impuls-Strategie als schlichte Python-Funktionen
+# (nur Skalare und NumPy-Arrays, keine Objekte/Dicts), damit Numba sie kompilieren kann.
+# Ohne Numba (oder mit JIT_KERNELS=false) laufen exakt dieselben Funktionen als reines Python.
+import argparse
+import math
+import os
+import time
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+from strategies.impulse_logic import resolve_params
+
+logger = setup_logger(__name__)
+
+JIT_KERNELS = os.getenv("JIT_KERNELS", "true").lower() == "true"
+ENGINE_LOOP_INTERVAL = float(os.getenv("ENGINE_LOOP_INTERVAL", 10))
+TAKER_FEE = float(os.getenv("TAKER_FEE", 0.001))
+USE_TRAILING_SL = os.getenv("USE_TRAILING_SL", "false").lower() == "true"
+TRAILING_UPDATE_COOLDOWN = int(os.getenv("TRAILING_UPDATE_COOLDOWN", 600))
+BACKTEST_NOTIONAL = float(os.getenv("BACKTEST_NOTIONAL", "100"))
+BACKTEST_SLIPPAGE_BPS = float(os.getenv("BACKTEST_SLIPPAGE_BPS", "0"))
+ATR_BAR_SEC = 900
+ATR_PERIOD = 14
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+JIT_ENABLED = numba is not None and JIT_KERNELS
+
+
+def _jit(fn):
+    if not JIT_ENABLED:
+        return fn
+    return numba.njit(cache=True, nogil=True)(fn)
+
+
+# Spalten der Parameter-Matrix (eine Zeile je Kombination)
+P_THRESHOLD, P_COOLDOWN, P_MAX_POS, P_ATR_SL, P_ATR_TP, P_SL, P_TP, P_SELL_PCT = range(8)
+N_PARAMS = 8
+# Kennzahlen je Lauf
+(S_EVENTS, S_EVALS, S_ENTRIES, S_EXITS, S_WINS, S_PNL, S_FEES, S_BLOCKED_POS, S_BLOCKED_COOLDOWN,
+ S_MAX_DD, S_OPEN_QTY, S_OPEN_ENTRY, S_OPEN_FEE, S_OPEN_SL, S_OPEN_TP) = range(15)
+N_STATS = 15
+# Trade-Protokoll: Zeit, Seite (+1 BUY / -1 SELL), Menge, Preis, Gebühr, Entry, SL, TP, pnl %, pnl USDT, Grund
+T_TS, T_SIDE, T_QTY, T_PRICE, T_FEE, T_ENTRY, T_SL, T_TP, T_PNL, T_PNL_USDT, T_REASON = range(11)
+N_TRADE_FIELDS = 11
+REASONS = ("impulse", "stop_loss", "take_profit", "scale_out")
+
+
+def simulate_impulse(ts, prices, p, loop_interval, use_trailing, trailing_cooldown, notional, fee_rate,
+                     slippage, stats, trades):
+    """
+    Ein Symbol, eine Parameterzeile `p`, Semantik von strategies.backtest.ImpulseBacktest (= on_new_price):
+    Taktung, Positions-/Cooldown-Sperre, Impuls-Entry, Trailing, SL/Scale-Out/TP, Recovery und laufender
+    ATR(14) aus 15min-Kerzen. Schreibt die Kennzahlen nach `stats`, Trades nach `trades` (solange Platz)
+    und gibt die Anzahl der Trades zurück (kann größer als len(trades) sein → mit mehr Platz wiederholen).
+    """
+    threshold = p[P_THRESHOLD]
+    cooldown = p[P_COOLDOWN]
+    max_pos = p[P_MAX_POS]
+    atr_sl = p[P_ATR_SL]
+    atr_tp = p[P_ATR_TP]
+    sl_off = p[P_SL]
+    tp_off = p[P_TP]
+    sell_pct = p[P_SELL_PCT]
+    capacity = trades.shape[0]
+
+    alpha = 2.0 / (ATR_PERIOD + 1)
+    decay = 1.0 - alpha
+    atr_num = 0.0
+    atr_den = 0.0
+    atr_bars = 0
+    atr = 0.0
+    prev_close = 0.0
+    has_prev_close = False
+    bar_end = -math.inf
+    high = 0.0
+    low = 0.0
+    close = 0.0
+    has_bar = False
+
+    next_eval = -math.inf
+    prev_price = 0.0
+    has_prev = False
+    last_entry = 0.0
+    last_exit = 0.0
+    last_trailing = 0.0
+    entry_count = 0
+
+    in_pos = False
+    qty = 0.0
+    entry = 0.0
+    entry_fee = 0.0
+    sl = 0.0
+    tp = 0.0
+
+    evaluations = 0
+    entries = 0
+    exits = 0
+    wins = 0
+    pnl = 0.0
+    fees = 0.0
+    peak = 0.0
+    max_dd = 0.0
+    blocked_pos = 0
+    blocked_cooldown = 0
+    n_trades = 0
+
+    for i in range(len(ts)):
+        now = ts[i]
+        price = prices[i]
+        # Laufende 15min-Kerze; abgeschlossene Kerzen aktualisieren den ATR (EWM, adjust=True)
+        if now >= bar_end:
+            if has_bar:
+                tr = high - low
+                if has_prev_close:
+                    tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+                prev_close = close
+                has_prev_close = True
+                atr_num = atr_num * decay + tr
+                atr_den = atr_den * decay + 1.0
+                atr_bars += 1
+                if atr_bars > ATR_PERIOD:
+                    atr = atr_num / atr_den
+            bar_end = (now // ATR_BAR_SEC + 1) * ATR_BAR_SEC
+            high = price
+            low = price
+            close = price
+            has_bar = True
+        else:
+            if price > high:
+                high = price
+            elif price < low:
+                low = price
+            close = price
+        if now < next_eval:
+            continue
+        next_eval = now + loop_interval
+        evaluations += 1
+        prev = prev_price
+        had_prev = has_prev
+        prev_price = price
+        has_prev = True
+
+        # Sperren gelten nur für den Entry (impulse_logic.entry_gate), Exits laufen weiter
+        if had_prev:
+            if entry_count >= max_pos:
+                blocked_pos += 1
+            elif now - max(last_entry, last_exit) < cooldown:
+                blocked_cooldown += 1
+            elif (price - prev) / prev >= threshold and not in_pos:
+                buy_qty = notional / price
+                px = price * (1.0 + slippage)
+                fee = buy_qty * px * fee_rate
+                in_pos = True
+                qty = buy_qty
+                entry = px
+                entry_fee = fee
+                fees += fee
+                entries += 1
+                last_entry = now
+                entry_count += 1
+                if atr != 0.0:
+                    sl = px - atr * atr_sl
+                    tp = px + atr * atr_tp
+                else:
+                    sl = px * (1.0 - sl_off)
+                    tp = px * (1.0 + tp_off)
+                if n_trades < capacity:
+                    row = trades[n_trades]
+                    row[T_TS] = now
+                    row[T_SIDE] = 1.0
+                    row[T_QTY] = buy_qty
+                    row[T_PRICE] = px
+                    row[T_FEE] = fee
+                    row[T_ENTRY] = px
+                    # SL/TP wie im Journal des Backtests: Stand zum Zeitpunkt des Fills (noch keine)
+                    row[T_SL] = math.nan
+                    row[T_TP] = math.nan
+                    row[T_PNL] = 0.0
+                    row[T_PNL_USDT] = math.nan
+                    row[T_REASON] = 0.0
+                n_trades += 1
+
+        if not in_pos:
+            continue
+
+        if use_trailing and now - last_trailing >= trailing_cooldown:
+            if atr != 0.0:
+                new_sl = price - atr * atr_sl
+                new_tp = price + atr * atr_tp
+            else:
+                new_sl = price - price * sl_off
+                new_tp = price + price * tp_off
+            if new_sl > sl:
+                sl = new_sl
+            if new_tp > tp:
+                tp = new_tp
+            last_trailing = now
+
+        reason = 0
+        share = 1.0
+        if sl != 0.0 and price <= sl:
+            reason = 1
+        elif tp != 0.0 and price >= tp:
+            if sell_pct > 0.0:
+                reason = 3
+                share = sell_pct
+            else:
+                reason = 2
+        if reason != 0:
+            sell_qty = min(qty * share, qty)
+            if sell_qty > 0.0:
+                px = price * (1.0 - slippage)
+                fee = sell_qty * px * fee_rate
+                fee_part = entry_fee * sell_qty / qty
+                trade_pnl = (px - entry) * sell_qty - (fee + fee_part)
+                if n_trades < capacity:
+                    row = trades[n_trades]
+                    row[T_TS] = now
+                    row[T_SIDE] = -1.0
+                    row[T_QTY] = sell_qty
+                    row[T_PRICE] = px
+                    row[T_FEE] = fee
+                    row[T_ENTRY] = entry
+                    row[T_SL] = sl
+                    row[T_TP] = tp
+                    row[T_PNL] = (px - entry) / entry * 100.0
+                    row[T_PNL_USDT] = trade_pnl
+                    row[T_REASON] = reason
+                n_trades += 1
+                # Wie das Journal (pnl_usdt auf 6 Stellen) – Reste nach vielen Scale-Outs zählen nicht als Gewinn
+                booked = round(trade_pnl, 6)
+                pnl += booked
+                fees += fee
+                exits += 1
+                if booked > 0.0:
+                    wins += 1
+                if pnl > peak:
+                    peak = pnl
+                if peak - pnl > max_dd:
+                    max_dd = peak - pnl
+                qty -= sell_qty
+                entry_fee -= fee_part
+                if qty <= 1e-12:
+                    in_pos = False
+                    qty = 0.0
+            if reason != 3:
+                last_exit = now
+                entry_count = 0
+            continue
+
+        # Recovery: SL/TP zu weit (> 10 %) vom Entry entfernt
+        if sl < entry and abs(sl - entry) / entry > 0.1:
+            sl = entry - atr * atr_sl if atr != 0.0 else entry * (1.0 - sl_off)
+        if tp > entry and abs(tp - entry) / entry > 0.1:
+            tp = entry + atr * atr_tp if atr != 0.0 else entry * (1.0 + tp_off)
+
+    stats[S_EVENTS] = len(ts)
+    stats[S_EVALS] = evaluations
+    stats[S_ENTRIES] = entries
+    stats[S_EXITS] = exits
+    stats[S_WINS] = wins
+    stats[S_PNL] = pnl
+    stats[S_FEES] = fees
+    stats[S_BLOCKED_POS] = blocked_pos
+    stats[S_BLOCKED_COOLDOWN] = blocked_cooldown
+    stats[S_MAX_DD] = max_dd
+    stats[S_OPEN_QTY] = qty if in_pos else 0.0
+    stats[S_OPEN_ENTRY] = entry if in_pos else 0.0
+    stats[S_OPEN_FEE] = entry_fee if in_pos else 0.0
+    stats[S_OPEN_SL] = sl if in_pos else 0.0
+    stats[S_OPEN_TP] = tp if in_pos else 0.0
+    return n_trades
+
+
+def simulate_grid(ts, prices, params, loop_interval, use_trailing, trailing_cooldown, notional, fee_rate,
+                  slippage, stats):
+    """Alle Parameterzeilen über dieselbe Tick-Reihe; `stats` hat die Form (Kombinationen × N_STATS)."""
+    no_trades = np.zeros((0, N_TRADE_FIELDS))
+    for k in range(params.shape[0]):
+        # Global aufgelöst: unter Numba der kompilierte Kernel, sonst die Python-Funktion
+        simulate_impulse_kernel(ts, prices, params[k], loop_interval, use_trailing, trailing_cooldown, notional,
+                         fee_rate, slippage, stats[k], no_trades)
+
+
+# Kompilierte Varianten (bzw. dieselben Funktionen ohne Numba)
+simulate_impulse_kernel = _jit(simulate_impulse)
+simulate_grid_kernel = _jit(simulate_grid)
+
+
+def params_row(settings: Optional[dict] = None) -> np.ndarray:
+    """Parameterzeile eines bot_params.json-Eintrags (über resolve_params, inkl. ENV-Fallbacks)."""
+    params = resolve_params(settings)
+    row = np.zeros(N_PARAMS)
+    row[P_THRESHOLD] = params.impulse_threshold
+    row[P_COOLDOWN] = params.reentry_cooldown
+    row[P_MAX_POS] = params.max_concurrent_positions
+    row[P_ATR_SL] = params.atr_sl_mult
+    row[P_ATR_TP] = params.atr_tp_mult
+    row[P_SL] = params.sl_offset
+    row[P_TP] = params.tp_offset
+    row[P_SELL_PCT] = params.sell_percent if params.scale_out_active else 0.0
+    return row
+
+
+def simulate(symbol: str, timestamps: Sequence[float], prices: Sequence[float], settings: Optional[dict] = None,
+             record_trades: bool = True, notional: float = BACKTEST_NOTIONAL, loop_interval: float = ENGINE_LOOP_INTERVAL,
+             use_trailing: bool = USE_TRAILING_SL, trailing_cooldown: float = TRAILING_UPDATE_COOLDOWN,
+             fee_rate: float = TAKER_FEE, slippage_bps: float = BACKTEST_SLIPPAGE_BPS) -> Tuple[dict, List[dict]]:
+    """
+    Kernel-Gegenstück zu ImpulseBacktest.run(): (Ergebnis wie ImpulseBacktest.result(), Trades im
+    order_history-Format). Ein Lauf, der mehr Trades erzeugt als vorab Platz war, wird einmal wiederholt.
+    """
+    ts = np.ascontiguousarray(timestamps, dtype=np.float64)
+    px = np.ascontiguousarray(prices, dtype=np.float64)
+    row = params_row(settings)
+    stats = np.zeros(N_STATS)
+    capacity = max(64, len(ts) // 500) if record_trades else 0
+    started = time.perf_counter()
+    while True:
+        buffer = np.zeros((capacity, N_TRADE_FIELDS))
+        count = simulate_impulse_kernel(ts, px, row, float(loop_interval), bool(use_trailing),
+                                        float(trailing_cooldown), float(notional), float(fee_rate),
+                                        slippage_bps / 10_000, stats, buffer)
+        if count <= capacity or not record_trades:
+            break
+        capacity = count
+    elapsed = time.perf_counter() - started
+
+    trades = [_trade_dict(symbol, buffer[i]) for i in range(min(count, capacity))] if record_trades else []
+    events = int(stats[S_EVENTS])
+    open_position = None
+    if stats[S_OPEN_QTY] > 0:
+        open_position = {"entry_price": float(stats[S_OPEN_ENTRY]), "quantity": float(stats[S_OPEN_QTY]),
+                         "entry_fee": float(stats[S_OPEN_FEE]), "sl": float(stats[S_OPEN_SL]), "tp": float(stats[S_OPEN_TP])}
+    result = {
+        "symbol": symbol,
+        "events": events,
+        "evaluations": int(stats[S_EVALS]),
+        "entries": int(stats[S_ENTRIES]),
+        "exits": int(stats[S_EXITS]),
+        "wins": int(stats[S_WINS]),
+        "pnl_usdt": round(float(stats[S_PNL]), 6),
+        "fees": round(float(stats[S_FEES]), 6),
+        "max_drawdown": round(float(stats[S_MAX_DD]), 6),
+        "blocked": {"max_positions": int(stats[S_BLOCKED_POS]), "cooldown": int(stats[S_BLOCKED_COOLDOWN])},
+        "open_position": open_position,
+        "elapsed_sec": round(elapsed, 4),
+        "events_per_sec": int(events / elapsed) if elapsed > 0 else None,
+        "jit": JIT_ENABLED,
+    }
+    return result, trades
+
+
+def _trade_dict(symbol: str, row: np.ndarray) -> dict:
+    sell = row[T_SIDE] < 0
+    return {
+        "id": uuid.uuid4().hex[:24],
+        "timestamp": int(row[T_TS]),
+        "mode": "BACKTEST",
+        "symbol": symbol,
+        "side": "SELL" if sell else "BUY",
+        "quantity": round(float(row[T_QTY]), 12),
+        "price": float(row[T_PRICE]),
+        "fee": round(float(row[T_FEE]), 8),
+        "entry_price": float(row[T_ENTRY]),
+        "sl": float(row[T_SL]) if sell else None,
+        "tp": float(row[T_TP]) if sell else None,
+        "pnl": round(float(row[T_PNL]), 4) if sell else 0.0,
+        "pnl_usdt": round(float(row[T_PNL_USDT]), 6) if sell else None,
+        "reason": REASONS[int(row[T_REASON])],
+    }
+
+
+def synthetic_ticks(days: float = 30, step: float = 1.0, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Zufallspfad mit einem Tick je `step` Sekunden – Benchmark-Ersatz, wenn keine Aufzeichnung vorliegt."""
+    rng = np.random.default_rng(seed)
+    n = int(days * 86400 / step)
+    ts = 1_700_000_000.0 + np.arange(n) * step
+    px = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.0004, n)))
+    return ts, px
+
+
+def benchmark(timestamps: Sequence[float], prices: Sequence[float], settings: Optional[dict] = None,
+              python_sample: int = 0) -> dict:
+    """
+    Misst denselben Lauf als ImpulseBacktest (Objekt-Pfad), als Kernel in reinem Python und – falls
+    Numba installiert ist – kompiliert (ohne Kompilierzeit). `python_sample` > 0 begrenzt die
+    Pure-Python-Kernel-Messung auf die ersten N Ticks und rechnet hoch.
+    """
+    from strategies.backtest import ImpulseBacktest
+
+    ts = np.ascontiguousarray(timestamps, dtype=np.float64)
+    px = np.ascontiguousarray(prices, dtype=np.float64)
+    row = params_row(settings)
+    report = {"ticks": len(ts), "numba": numba is not None}
+
+    bt = ImpulseBacktest("BENCH", settings)
+    started = time.perf_counter()
+    reference = bt.run(memoryview(ts), memoryview(px))
+    report["backtest_sec"] = round(time.perf_counter() - started, 4)
+
+    n = min(python_sample, len(ts)) if python_sample > 0 else len(ts)
+    stats = np.zeros(N_STATS)
+    started = time.perf_counter()
+    simulate_impulse(ts[:n], px[:n], row, ENGINE_LOOP_INTERVAL, USE_TRAILING_SL, float(TRAILING_UPDATE_COOLDOWN),
+                     BACKTEST_NOTIONAL, TAKER_FEE, BACKTEST_SLIPPAGE_BPS / 10_000, stats, np.zeros((0, N_TRADE_FIELDS)))
+    report["python_kernel_sec"] = round((time.perf_counter() - started) * len(ts) / max(n, 1), 4)
+
+    if numba is not None:
+        compiled = numba.njit(cache=True, nogil=True)(simulate_impulse)
+        args = (ENGINE_LOOP_INTERVAL, USE_TRAILING_SL, float(TRAILING_UPDATE_COOLDOWN), BACKTEST_NOTIONAL,
+                TAKER_FEE, BACKTEST_SLIPPAGE_BPS / 10_000)
+        started = time.perf_counter()
+        compiled(ts[:16], px[:16], row, *args, np.zeros(N_STATS), np.zeros((0, N_TRADE_FIELDS)))
+        report["jit_compile_sec"] = round(time.perf_counter() - started, 4)
+        stats = np.zeros(N_STATS)
+        started = time.perf_counter()
+        compiled(ts, px, row, *args, stats, np.zeros((0, N_TRADE_FIELDS)))
+        report["jit_kernel_sec"] = round(time.perf_counter() - started, 4)
+        report["speedup_vs_backtest"] = round(report["backtest_sec"] / max(report["jit_kernel_sec"], 1e-9), 1)
+        report["speedup_vs_python_kernel"] = round(report["python_kernel_sec"] / max(report["jit_kernel_sec"], 1e-9), 1)
+    report["matches_backtest"] = (int(stats[S_ENTRIES]) == reference["entries"]
+                                  and int(stats[S_EXITS]) == reference["exits"]
+                                  and abs(stats[S_PNL] - reference["pnl_usdt"]) < 1e-3) if n == len(ts) else None
+    return report
+
+
+def main(argv=None):
+    from strategies.backtest import _parse_time, load_events
+
+    parser = argparse.ArgumentParser(description="Benchmark der Simulations-Kernel (Objekt-Backtest vs. Python vs. Numba)")
+    parser.add_argument("symbol", nargs="?", help="Aufgezeichnetes Symbol; ohne Angabe synthetische 1s-Ticks")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--end")
+    parser.add_argument("--threshold", type=float, default=0.001)
+    parser.add_argument("--scale-out", type=float, default=0.0, help="sell_percent (0 = aus)")
+    parser.add_argument("--python-sample", type=int, default=0,
+                        help="Pure-Python-Kernel nur über die ersten N Ticks messen und hochrechnen")
+    args = parser.parse_args(argv)
+
+    if args.symbol:
+        end = _parse_time(args.end) if args.end else time.time()
+        timestamps, prices = load_events(args.symbol, end - args.days * 86400, end)
+    else:
+        timestamps, prices = synthetic_ticks(args.days)
+    settings = {"impulse_threshold": args.threshold,
+                "scale_out": {"active": args.scale_out > 0, "sell_percent": args.scale_out}}
+    report = benchmark(timestamps, prices, settings, args.python_sample)
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+from core.shared_market_data import SharedArraysRef, SharedMarketData, attach
+from strategies.bot_params import BOT_PARAMS_FILE, load_bot_params, publish_bot_params
+from strategies.param_sweep import (
+    ENGINE_LOOP_INTERVAL, SWEEP_GRID_FILE, SWEEP_KEYS, SWEEP_MIN_TRADES, SWEEP_NOTIONAL, TAKER_FEE,
+    SweepFeatures, atr_series, cached_sweep, expand_sweep_grid, sample_series,
+)
+from strategies.result_cache import code_version, data_digest
+from strategies.shadow_eval import variant_to_bot_params
+
+logger = setup_logger(__name__)
+
+CHECKPOINT_DIR = "data/checkpoints"
+# 0 → alle Kerne
+OPT_WORKERS = int(os.getenv("OPT_WORKERS", "0"))
+# Kombinationen je Auftrag = Checkpoint-Granularität (kleiner → weniger Verlust bei Abbruch, mehr Overhead)
+OPT_CHUNK_SIZE = int(os.getenv("OPT_CHUNK_SIZE", "256"))
+# Je Chunk gesicherte Bestwerte; der Gesamtsieger ist immer unter den Chunk-Siegern
+OPT_TOP_K = int(os.getenv("OPT_TOP_K", "20"))
+# Veröffentlicht wird nur ein Sieger mit PnL (USDT) darüber – in-sample wie walk-forward (out-of-sample)
+OPT_MIN_PNL = float(os.getenv("OPT_MIN_PNL", "0"))
+# Walk-Forward: Trainings-/Testfenster in Tagen (Schrittweite = Testfenster)
+WF_TRAIN_DAYS = float(os.getenv("WF_TRAIN_DAYS", "14"))
+WF_TEST_DAYS = float(os.getenv("WF_TEST_DAYS", "7"))
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _write_json_atomic(path: str, data) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _rank_key(row: dict, min_trades: int) -> Tuple:
+    # Gleiche Ordnung wie SweepResult.ranking: genug Trades, PnL absteigend, Drawdown aufsteigend
+    return (row["trades"] < min_trades, -row["pnl"], row["max_drawdown"])
+
+
+def _features(data: SharedArraysRef, digest: str) -> SweepFeatures:
+    arrays = attach(data)
+    return SweepFeatures(arrays["sample_ts"], arrays["prices"], arrays["atr"], digest)
+
+
+def search_chunk(symbol: str, chunk: int, data: SharedArraysRef, digest: str, combos: np.ndarray, min_trades: int,
+                 top_k: int, notional: float, fee_rate: float, use_cache: bool = True) -> dict:
+    """Worker-Auftrag: ein Block Kombinationen eines Symbols; Rückgabe ist direkt der Checkpoint-Inhalt."""
+    result = cached_sweep(symbol, _features(data, digest), combos, notional, fee_rate, use_cache=use_cache)
+    return {
+        "symbol": symbol,
+        "chunk": chunk,
+        "combinations": len(combos),
+        "elapsed": round(result.elapsed, 3),
+        "top": result.top(top_k, min_trades),
+    }
+
+
+def walk_forward_windows(sample_ts: np.ndarray, train: float, test: float,
+                         step: Optional[float] = None) -> List[Tuple[int, int, int]]:
+    """Rollierende Fenster als Sample-Indizes (train_start, test_start, test_end); Zeiten in Sekunden."""
+    step = step or test
+    windows = []
+    if not len(sample_ts):
+        return windows
+    t, last = float(sample_ts[0]), float(sample_ts[-1])
+    while t + train < last:
+        train_lo, test_lo, test_hi = np.searchsorted(sample_ts, [t, t + train, t + train + test], side="left")
+        if test_hi - test_lo >= 3 and test_lo - train_lo >= 3:
+            windows.append((int(train_lo), int(test_lo), int(test_hi)))
+        t += step
+    return windows
+
+
+def walk_forward_symbol(symbol: str, data: SharedArraysRef, digest: str, combos: np.ndarray,
+                        windows: List[Tuple[int, int, int]], folder: str, min_trades: int, notional: float,
+                        fee_rate: float, use_cache: bool = True) -> dict:
+    """
+    Worker-Auftrag: alle Walk-Forward-Fenster eines Symbols über einer gemeinsamen SweepFeatures-Instanz
+    (Renditen, ATR, Berührungsindizes werden einmal berechnet). Je Fenster: Sieger im Training,
+    Out-of-Sample-Kennzahlen aller Kombinationen im Test; jedes Fenster wird sofort als Checkpoint geschrieben.
+    """
+    started = time.perf_counter()
+    features = _features(data, digest)
+    sample_ts = features.sample_ts
+    computed = 0
+    for w, (train_lo, test_lo, test_hi) in enumerate(windows):
+        path = os.path.join(folder, f"window_{w:04d}.json")
+        if os.path.exists(path):
+            continue
+        train = cached_sweep(symbol, features, combos, notional, fee_rate, train_lo, test_lo, use_cache)
+        best = int(train.ranking(min_trades)[0])
+        test = cached_sweep(symbol, features, combos, notional, fee_rate, test_lo, test_hi, use_cache)
+        _write_json_atomic(path, {
+            "window": w,
+            "train": [float(sample_ts[train_lo]), float(sample_ts[test_lo - 1])],
+            "test": [float(sample_ts[test_lo]), float(sample_ts[test_hi - 1])],
+            "best": best,
+            "eligible": bool(train.trades[best] >= min_trades),
+            "train_pnl": round(float(train.pnl[best]), 6),
+            "train_trades": int(train.trades[best]),
+            "oos": {key: np.round(getattr(test, key), 6).tolist()
+                    for key in ("pnl", "trades", "wins", "fees", "max_drawdown")},
+        })
+        computed += 1
+    return {"symbol": symbol, "windows": computed, "elapsed": round(time.perf_counter() - started, 3)}
+
+
+def parameter_stability(combos: np.ndarray, chosen: List[int], oos_pnl: np.ndarray) -> Dict[str, dict]:
+    """
+    Je Parameter: wie oft der häufigste Trainings-Sieger-Wert gewählt wurde (share) und wie viele
+    verschiedene Werte vorkamen. Gleichstand → Wert mit höherem mittleren Out-of-Sample-PnL.
+    """
+    stability = {}
+    for j, key in enumerate(SWEEP_KEYS):
+        values = [float(combos[i, j]) for i in chosen]
+        counts = Counter(values)
+        if not counts:
+            continue
+        top = max(counts.values())
+        candidates = [v for v, count in counts.items() if count == top]
+        mode = max(candidates, key=lambda v: np.mean([oos_pnl[w] for w, x in enumerate(values) if x == v]))
+        stability[key] = {"value": mode, "share": round(top / len(values), 3), "distinct": len(counts)}
+    return stability
+
+
+def latest_run(checkpoint_dir: str = CHECKPOINT_DIR) -> Optional[str]:
+    """Run-ID des zuletzt begonnenen Laufs mit Manifest (für --resume ohne ID)."""
+    if not os.path.isdir(checkpoint_dir):
+        return None
+    runs = [name for name in os.listdir(checkpoint_dir)
+            if os.path.isfile(os.path.join(checkpoint_dir, name, MANIFEST_FILE))]
+    if not runs:
+        return None
+    return max(runs, key=lambda name: os.path.getmtime(os.path.join(checkpoint_dir, name, MANIFEST_FILE)))
+
+
+class ParamOptimizer:
+    """
+    Verteilt die Parametersuche je Symbol in Kombinations-Blöcken auf einen ProcessPoolExecutor.
+    Jeder fertige Block landet sofort als JSON unter data/checkpoints/<run_id>/<SYMBOL>/; ein
+    abgebrochener Lauf setzt mit derselben Konfiguration (--resume) bei den fehlenden Blöcken fort.
+    Die Run-ID hängt nur an der Konfiguration (Zeitraum, Grid, Quelle, Code-Version), nicht an den Symbolen.
+    Im Walk-Forward-Modus ist ein Auftrag ein ganzes Symbol (alle Fenster teilen dieselben Features),
+    Checkpoint-Einheit ist das einzelne Fenster.
+    """
+
+    def __init__(self, config: dict, workers: int = OPT_WORKERS, checkpoint_dir: str = CHECKPOINT_DIR,
+                 use_cache: bool = True):
+        self.config = {
+            "start": float(config["start"]),
+            "end": float(config["end"]),
+            "source": config.get("source", "ticks"),
+            "interval": config.get("interval", "1min"),
+            "grid": config.get("grid") or {},
+            "chunk_size": int(config.get("chunk_size", OPT_CHUNK_SIZE)),
+            "min_trades": int(config.get("min_trades", SWEEP_MIN_TRADES)),
+            "sample_interval": float(config.get("sample_interval", ENGINE_LOOP_INTERVAL)),
+            "notional": float(config.get("notional", SWEEP_NOTIONAL)),
+            "fee_rate": float(config.get("fee_rate", TAKER_FEE)),
+            "code_version": config.get("code_version") or code_version(),
+            # {"train": s, "test": s, "step": s} oder None (ein In-Sample-Lauf über den ganzen Zeitraum)
+            "walk_forward": config.get("walk_forward"),
+        }
+        self.symbols = [s.upper() for s in config["symbols"]]
+        self.workers = workers or os.cpu_count() or 1
+        # Ergebnis-Cache (strategies.result_cache) – beeinflusst nur die Laufzeit, nicht die Run-ID
+        self.use_cache = use_cache
+        self.combos = expand_sweep_grid(self.config["grid"])
+        canonical = json.dumps(self.config, sort_keys=True, separators=(",", ":"))
+        self.run_id = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+        self.run_dir = os.path.join(checkpoint_dir, self.run_id)
+
+    @classmethod
+    def resume(cls, run_id: Optional[str] = None, workers: int = OPT_WORKERS,
+               checkpoint_dir: str = CHECKPOINT_DIR, use_cache: bool = True) -> "ParamOptimizer":
+        run_id = run_id or latest_run(checkpoint_dir)
+        if not run_id:
+            raise FileNotFoundError(f"Kein fortsetzbarer Lauf in {checkpoint_dir}")
+        with open(os.path.join(checkpoint_dir, run_id, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+        config = dict(manifest["config"], symbols=manifest["symbols"])
+        if config["code_version"] != code_version():
+            logger.warning(f"⚠️ Strategie-Code hat sich seit Beginn von Lauf {run_id} geändert – "
+                           f"Ergebnisse beziehen sich auf Version {config['code_version']}")
+        return cls(config, workers, checkpoint_dir, use_cache)
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-len(self.combos) // self.config["chunk_size"])
+
+    def _chunk_path(self, symbol: str, chunk: int) -> str:
+        return os.path.join(self.run_dir, symbol, f"chunk_{chunk:05d}.json")
+
+    def _manifest(self) -> dict:
+        path = os.path.join(self.run_dir, MANIFEST_FILE)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"run_id": self.run_id, "config": self.config, "symbols": [], "fingerprints": {},
+                    "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+    def prepare(self, symbol: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Lädt Ticks/Kerzen des Zeitraums und berechnet Sampling + ATR einmal je Symbol."""
+        from strategies.backtest import load_events
+
+        cfg = self.config
+        timestamps, prices = load_events(symbol, cfg["start"], cfg["end"], cfg["source"], cfg["interval"])
+        if not len(timestamps):
+            return None
+        sample_ts, sample_px = sample_series(timestamps, prices, cfg["sample_interval"])
+        return sample_ts, sample_px, atr_series(timestamps, prices, sample_ts)
+
+    def _pending(self, manifest: dict, symbol: str, fingerprint: str) -> List[int]:
+        folder = os.path.join(self.run_dir, symbol)
+        if manifest["fingerprints"].get(symbol) not in (None, fingerprint) and os.path.isdir(folder):
+            logger.warning(f"⚠️ Daten für {symbol} haben sich geändert – verwerfe {len(os.listdir(folder))} Checkpoints")
+            shutil.rmtree(folder)
+        os.makedirs(folder, exist_ok=True)
+        return [i for i in range(self.n_chunks) if not os.path.exists(self._chunk_path(symbol, i))]
+
+    def run(self) -> Dict[str, dict]:
+        """Rechnet alle fehlenden Blöcke bzw. Fenster und gibt je Symbol das zusammengeführte Ergebnis zurück."""
+        cfg = self.config
+        os.makedirs(self.run_dir, exist_ok=True)
+        manifest = self._manifest()
+        manifest["symbols"] = sorted(set(manifest["symbols"]) | set(self.symbols))
+
+        # Gesampelte Reihen je Symbol einmal in Shared Memory; Aufträge tragen nur den Deskriptor
+        with SharedMarketData() as shared:
+            samples, tasks = {}, []
+            for symbol in self.symbols:
+                prepared = self.prepare(symbol)
+                if prepared is None:
+                    logger.warning(f"⚠️ Keine Daten für {symbol} im Zeitraum – übersprungen")
+                    continue
+                fingerprint = data_digest(*prepared)
+                manifest["fingerprints"][symbol] = fingerprint
+                samples[symbol] = n = len(prepared[0])
+                pending = self._pending(manifest, symbol, fingerprint)
+                if self.walk_forward:
+                    windows = self.windows(prepared[0])
+                    folder = os.path.join(self.run_dir, symbol)
+                    missing = sum(not os.path.exists(os.path.join(folder, f"window_{w:04d}.json")) for w in range(len(windows)))
+                    if missing:
+                        ref = shared.put(symbol, sample_ts=prepared[0], prices=prepared[1], atr=prepared[2])
+                        tasks.append((walk_forward_symbol, (symbol, ref, fingerprint, self.combos, windows, folder,
+                                                            cfg["min_trades"], cfg["notional"], cfg["fee_rate"],
+                                                            self.use_cache)))
+                    logger.info(f"🧮 {symbol}: {n} Samples, {len(windows)} Walk-Forward-Fenster, "
+                                f"{len(windows) - missing}/{len(windows)} aus Checkpoint")
+                    continue
+                if pending:
+                    ref = shared.put(symbol, sample_ts=prepared[0], prices=prepared[1], atr=prepared[2])
+                    size = cfg["chunk_size"]
+                    tasks.extend((search_chunk, (symbol, chunk, ref, fingerprint, self.combos[chunk * size:(chunk + 1) * size],
+                                                 cfg["min_trades"], OPT_TOP_K, cfg["notional"], cfg["fee_rate"],
+                                                 self.use_cache))
+                                 for chunk in pending)
+                logger.info(f"🧮 {symbol}: {n} Samples, {len(self.combos)} Kombinationen, "
+                            f"{self.n_chunks - len(pending)}/{self.n_chunks} Blöcke aus Checkpoint")
+                del prepared
+            _write_json_atomic(os.path.join(self.run_dir, MANIFEST_FILE), manifest)
+
+            if tasks:
+                logger.info(f"🔗 {shared.nbytes / 1e6:.1f} MB Marktdaten in Shared Memory")
+                self._execute(tasks, self._store_chunk)
+        if self.walk_forward:
+            return {symbol: self.merge_walk_forward(symbol, n) for symbol, n in samples.items()}
+        return {symbol: self.merge(symbol, n) for symbol, n in samples.items()}
+
+    @property
+    def walk_forward(self) -> Optional[dict]:
+        return self.config["walk_forward"]
+
+    def windows(self, sample_ts: np.ndarray) -> List[Tuple[int, int, int]]:
+        wf = self.walk_forward
+        return walk_forward_windows(sample_ts, wf["train"], wf["test"], wf.get("step"))
+
+    def _store_chunk(self, result: dict) -> None:
+        # Walk-Forward-Worker schreiben ihre Fenster selbst; nur Grid-Blöcke kommen als Ergebnis zurück
+        if "chunk" in result:
+            _write_json_atomic(self._chunk_path(result["symbol"], result["chunk"]), result)
+
+    def _execute(self, tasks: List[Tuple[Callable, tuple]], on_result: Callable[[dict], None]) -> None:
+        started = time.time()
+        done = 0
+        logger.info(f"🚀 Optimierung {self.run_id}: {len(tasks)} Aufträge auf {min(self.workers, len(tasks))} Prozessen")
+        pool = ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)))
+        try:
+            futures = {pool.submit(fn, *args) for fn, args in tasks}
+            while futures:
+                finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    on_result(future.result())
+                    done += 1
+                elapsed = time.time() - started
+                eta = elapsed / done * (len(tasks) - done)
+                logger.info(f"⏳ {done}/{len(tasks)} Aufträge fertig – {elapsed:.0f}s, Rest ~{eta:.0f}s")
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.warning(f"🛑 Optimierung unterbrochen nach {done}/{len(tasks)} Aufträgen – "
+                           f"fortsetzen mit: python -m strategies.optimizer --resume {self.run_id}")
+            raise
+        pool.shutdown()
+
+    def merge(self, symbol: str, samples: int = 0) -> dict:
+        """Führt die Chunk-Checkpoints eines Symbols zur Gesamt-Rangliste zusammen."""
+        min_trades = self.config["min_trades"]
+        rows, combinations, elapsed = [], 0, 0.0
+        folder = os.path.join(self.run_dir, symbol)
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(folder, name), "r") as f:
+                chunk = json.load(f)
+            rows.extend(chunk["top"])
+            combinations += chunk["combinations"]
+            elapsed += chunk["elapsed"]
+        rows.sort(key=lambda row: _rank_key(row, min_trades))
+        return {"samples": samples, "combinations": combinations, "cpu_seconds": round(elapsed, 3),
+                "top": rows[:OPT_TOP_K]}
+
+    def merge_walk_forward(self, symbol: str, samples: int = 0) -> dict:
+        """
+        Fasst die Fenster eines Symbols zusammen: Out-of-Sample-Ergebnis der jeweiligen Trainings-Sieger
+        (das eigentliche Walk-Forward-Ergebnis), Stabilität je Parameter und die "stabile" Kombination
+        aus den häufigsten Siegerwerten, bewertet über alle Testfenster. Fenster, deren Trainings-Sieger
+        zu wenige Trades hatte, zählen nicht für die Stabilität.
+        """
+        folder = os.path.join(self.run_dir, symbol)
+        names = sorted(name for name in os.listdir(folder) if name.startswith("window_") and name.endswith(".json"))
+        windows = []
+        for name in names:
+            with open(os.path.join(folder, name), "r") as f:
+                windows.append(json.load(f))
+        if not windows:
+            return {"samples": samples, "combinations": len(self.combos), "windows": [], "stability": {}, "top": []}
+        oos = {key: np.array([w["oos"][key] for w in windows]) for key in ("pnl", "trades", "wins", "fees", "max_drawdown")}
+        rows = np.arange(len(windows))
+        chosen = np.array([w["best"] for w in windows])
+        eligible = [i for i, w in enumerate(windows) if w["eligible"]]
+        wf_pnl = oos["pnl"][rows, chosen]
+
+        stability = parameter_stability(self.combos, [int(chosen[i]) for i in eligible], wf_pnl[eligible])
+        top = []
+        if len(stability) == len(SWEEP_KEYS):
+            target = np.array([stability[key]["value"] for key in SWEEP_KEYS])
+            idx = int(np.flatnonzero((self.combos == target).all(axis=1))[0])
+            pnl = oos["pnl"][:, idx]
+            trades = int(oos["trades"][:, idx].sum())
+            # Drawdown über die Fenster: größter Einzel-Drawdown bzw. Rückgang der kumulierten Fenster-PnL
+            equity = np.cumsum(pnl)
+            drawdown = max(float(oos["max_drawdown"][:, idx].max()), float((np.maximum.accumulate(np.r_[0.0, equity]) - np.r_[0.0, equity]).max()))
+            top.append({
+                "params": {key: float(self.combos[idx, j]) for j, key in enumerate(SWEEP_KEYS)},
+                "pnl": round(float(pnl.sum()), 6),
+                "trades": trades,
+                "win_rate": round(float(oos["wins"][:, idx].sum()) / trades * 100, 2) if trades else 0.0,
+                "fees": round(float(oos["fees"][:, idx].sum()), 6),
+                "max_drawdown": round(drawdown, 6),
+                "positive_windows": int((pnl > 0).sum()),
+            })
+        return {
+            "samples": samples,
+            "combinations": len(self.combos),
+            "walk_forward_pnl": round(float(wf_pnl.sum()), 6),
+            "windows": [{
+                "test_start": datetime.fromtimestamp(w["test"][0], tz=timezone.utc).isoformat(timespec="seconds"),
+                "params": {key: float(self.combos[w["best"], j]) for j, key in enumerate(SWEEP_KEYS)},
+                "train_pnl": w["train_pnl"],
+                "train_trades": w["train_trades"],
+                "oos_pnl": round(float(wf_pnl[i]), 6),
+                "oos_trades": int(oos["trades"][i, w["best"]]),
+            } for i, w in enumerate(windows)],
+            "stability": stability,
+            "top": top,
+        }
+
+    def publish(self, results: Dict[str, dict], path: str = BOT_PARAMS_FILE,
+                min_pnl: float = OPT_MIN_PNL) -> Optional[str]:
+        """
+        Übernimmt je Symbol den Sieger (mit genug Trades und PnL > min_pnl) in bot_params.json – bestehende
+        Einträge anderer Symbole und nicht optimierte Felder (Scale-Out, max_concurrent_positions) bleiben erhalten.
+        """
+        try:
+            bot_params, _ = load_bot_params(path)
+        except FileNotFoundError:
+            bot_params = {}
+        cfg = self.config
+        winners = {}
+        for symbol, merged in results.items():
+            best = merged["top"][0] if merged["top"] else None
+            if best is None or best["trades"] < cfg["min_trades"]:
+                logger.warning(f"⚠️ {symbol}: keine Kombination mit ≥{cfg['min_trades']} Trades – Eintrag bleibt unverändert")
+                continue
+            if best["pnl"] <= min_pnl:
+                scope = "out-of-sample" if self.walk_forward else "in-sample"
+                logger.warning(f"⚠️ {symbol}: bester Kandidat {scope} nicht profitabel genug "
+                               f"(PnL {best['pnl']:.2f} ≤ {min_pnl:.2f} USDT) – Eintrag bleibt unverändert")
+                continue
+            base = bot_params.get(symbol) or {}
+            entry = variant_to_bot_params({**best["params"], "scale_out": 0.0}, base)
+            # Scale-Out wird nicht optimiert – bestehende Einstellung übernehmen
+            if "scale_out" in base:
+                entry["scale_out"] = base["scale_out"]
+            else:
+                del entry["scale_out"]
+            bot_params[symbol] = entry
+            winners[symbol] = {**best, "samples": merged["samples"], "combinations": merged["combinations"]}
+            if self.walk_forward:
+                winners[symbol].update(windows=len(merged["windows"]), walk_forward_pnl=merged["walk_forward_pnl"],
+                                       stability=merged["stability"])
+        if not winners:
+            logger.warning(f"⚠️ Kein Symbol erfüllt die Kriterien (≥{cfg['min_trades']} Trades, PnL > {min_pnl:.2f} USDT) – "
+                           f"{path} bleibt unverändert")
+            return None
+
+        provenance = {
+            "tool": "strategies.optimizer",
+            "run_id": self.run_id,
+            "period": {
+                "start": datetime.fromtimestamp(cfg["start"], tz=timezone.utc).isoformat(timespec="seconds"),
+                "end": datetime.fromtimestamp(cfg["end"], tz=timezone.utc).isoformat(timespec="seconds"),
+            },
+            "source": cfg["source"] if cfg["source"] == "ticks" else f"candles:{cfg['interval']}",
+            "grid": {key: sorted({float(v) for v in self.combos[:, j]}) for j, key in enumerate(SWEEP_KEYS)},
+            "min_trades": cfg["min_trades"],
+            "min_pnl": min_pnl,
+            "notional": cfg["notional"],
+            "fee_rate": cfg["fee_rate"],
+            "code_version": cfg["code_version"],
+            "walk_forward": self.walk_forward,
+            "git_commit": _git_commit(),
+            "host": socket.gethostname(),
+            "results": winners,
+        }
+        return publish_bot_params(bot_params, provenance, path)
+
+    def cleanup(self) -> None:
+        """Löscht die Checkpoints dieses Laufs (nach erfolgreicher Veröffentlichung)."""
+        try:
+            shutil.rmtree(self.run_dir, ignore_errors=False)
+            parent = os.path.dirname(self.run_dir)
+            if os.path.isdir(parent) and not os.listdir(parent):
+                os.rmdir(parent)
+            logger.info(f"🧹 Checkpoints von Lauf {self.run_id} gelöscht")
+        except OSError as e:
+            logger.error(f"Fehler beim Löschen der Checkpoints: {e}")
+
+
+def main(argv=None):
+    from strategies.backtest import _parse_time
+
+    parser = argparse.ArgumentParser(description="Parallele Parameter-Optimierung mit Checkpoints")
+    parser.add_argument("symbols", nargs="*", help="z.B. ETH-USDT BTC-USDT (entfällt bei --resume)")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--source", choices=["ticks", "candles"], default="ticks")
+    parser.add_argument("--interval", default="1min", help="Kerzen-Intervall bei --source candles")
+    parser.add_argument("--grid", default=SWEEP_GRID_FILE)
+    parser.add_argument("--min-trades", type=int, default=SWEEP_MIN_TRADES)
+    parser.add_argument("--min-pnl", type=float, default=OPT_MIN_PNL,
+                        help="Nur Sieger mit PnL (USDT) darüber veröffentlichen (walk-forward: out-of-sample)")
+    parser.add_argument("--chunk-size", type=int, default=OPT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=OPT_WORKERS)
+    parser.add_argument("--walk-forward", action="store_true",
+                        help="Rollierende Trainings-/Testfenster statt eines In-Sample-Laufs")
+    parser.add_argument("--train-days", type=float, default=WF_TRAIN_DAYS)
+    parser.add_argument("--test-days", type=float, default=WF_TEST_DAYS)
+    parser.add_argument("--step-days", type=float, help="Standard: --test-days")
+    parser.add_argument("--resume", nargs="?", const="", metavar="RUN_ID",
+                        help="Abgebrochenen Lauf fortsetzen (ohne ID: zuletzt begonnener)")
+    parser.add_argument("--dry-run", action="store_true", help=f"Nur berichten, {BOT_PARAMS_FILE} nicht ändern")
+    parser.add_argument("--keep-checkpoints", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="Ergebnis-Cache weder lesen noch schreiben")
+    args = parser.parse_args(argv)
+
+    if args.resume is not None:
+        optimizer = ParamOptimizer.resume(args.resume or None, args.workers, use_cache=not args.no_cache)
+    else:
+        if not args.symbols:
+            parser.error("Symbole angeben oder --resume verwenden")
+        end = _parse_time(args.end) if args.end else time.time()
+        start = _parse_time(args.start) if args.start else end - args.days * 86400
+        try:
+            with open(args.grid, "r") as f:
+                grid = json.load(f)
+        except FileNotFoundError:
+            grid = {}
+        optimizer = ParamOptimizer({
+            "symbols": args.symbols, "start": start, "end": end, "source": args.source,
+            "interval": args.interval, "grid": grid, "chunk_size": args.chunk_size, "min_trades": args.min_trades,
+            "walk_forward": {
+                "train": args.train_days * 86400,
+                "test": args.test_days * 86400,
+                "step": (args.step_days or args.test_days) * 86400,
+            } if args.walk_forward else None,
+        }, args.workers, use_cache=not args.no_cache)
+
+    results = optimizer.run()
+    if optimizer.walk_forward:
+        report = {symbol: {key: merged[key] for key in ("walk_forward_pnl", "windows", "stability", "top") if key in merged}
+                  for symbol, merged in results.items()}
+    else:
+        report = {symbol: merged["top"][:5] for symbol, merged in results.items()}
+    print(json.dumps(report, indent=2))
+    if args.dry_run:
+        return results
+    digest = optimizer.publish(results, min_pnl=args.min_pnl)
+    if digest and not args.keep_checkpoints:
+        optimizer.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    main()
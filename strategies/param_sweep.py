@@ -0,0 +1,469 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+from strategies.bot_params import BOT_PARAMS_FILE, load_bot_params, publish_bot_params
+from strategies.impulse_logic import BOT_PARAMS_FIXED_OFFSETS, fixed_offsets
+from strategies.result_cache import data_digest, result_cache
+from strategies.shadow_eval import variant_to_bot_params
+
+logger = setup_logger(__name__)
+
+SWEEP_GRID_FILE = os.getenv("SWEEP_GRID_FILE", "data/sweep_grid.json")
+# Kombinationen mit weniger Trades kommen nicht in die Auswahl (Zufallstreffer)
+SWEEP_MIN_TRADES = int(os.getenv("SWEEP_MIN_TRADES", "5"))
+SWEEP_NOTIONAL = float(os.getenv("SWEEP_NOTIONAL", "100"))
+
+ENGINE_LOOP_INTERVAL = float(os.getenv("ENGINE_LOOP_INTERVAL", 10))
+TAKER_FEE = float(os.getenv("TAKER_FEE", 0.001))
+ATR_MULTIPLIER_SL = float(os.getenv("ATR_MULTIPLIER_SL", 1.5))
+ATR_MULTIPLIER_TP = float(os.getenv("ATR_MULTIPLIER_TP", 3.0))
+ATR_BAR_SEC = 900
+ATR_PERIOD = 14
+
+# Parameter, die der Sweep variiert (Reihenfolge = Spalten in SweepResult.params)
+SWEEP_KEYS = ("impulse_threshold", "tp", "sl", "atr_sl_mult", "atr_tp_mult", "reentry_cooldown")
+DEFAULT_GRID = {
+    "impulse_threshold": [0.0005, 0.001, 0.0015, 0.002, 0.003],
+    "tp": [0.005, 0.01, 0.02],
+    "sl": [0.003, 0.005, 0.01],
+    "atr_sl_mult": [1.0, 1.5, 2.0],
+    "atr_tp_mult": [2.0, 3.0, 4.0],
+    "reentry_cooldown": [30, 60, 120, 300],
+}
+
+
+def sample_series(timestamps: Sequence[float], prices: Sequence[float],
+                  interval: float = ENGINE_LOOP_INTERVAL) -> Tuple[np.ndarray, np.ndarray]:
+    """Erster Tick je `interval`-Fenster – nähert die Taktung der Engine (ENGINE_LOOP_INTERVAL) an."""
+    ts = np.asarray(timestamps, dtype=np.float64)
+    px = np.asarray(prices, dtype=np.float64)
+    if not len(ts) or interval <= 0:
+        return ts, px
+    _, first = np.unique(np.floor(ts / interval), return_index=True)
+    return ts[first], px[first]
+
+
+def atr_series(timestamps: Sequence[float], prices: Sequence[float], sample_ts: np.ndarray,
+               bar_sec: int = ATR_BAR_SEC, period: int = ATR_PERIOD) -> np.ndarray:
+    """
+    ATR(period) aus den abgeschlossenen `bar_sec`-Kerzen vor jedem Sample-Zeitpunkt
+    (EWM mit span=period wie strategies.atr); 0.0, solange zu wenige Kerzen vorliegen.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    px = np.asarray(prices, dtype=np.float64)
+    out = np.zeros(len(sample_ts))
+    if not len(ts):
+        return out
+    buckets = np.floor(ts / bar_sec).astype(np.int64)
+    bar_ids, starts = np.unique(buckets, return_index=True)
+    high = np.maximum.reduceat(px, starts)
+    low = np.minimum.reduceat(px, starts)
+    close = px[np.r_[starts[1:] - 1, len(px) - 1]]
+    prev_close = np.r_[np.nan, close[:-1]]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    # EWM (adjust=True): gewichtete Summe / Gewichtssumme, rekursiv über die Kerzen
+    decay = 1.0 - 2.0 / (period + 1)
+    atr_closed = np.zeros(len(tr))
+    num = den = 0.0
+    for i, value in enumerate(tr):
+        num = num * decay + value
+        den = den * decay + 1.0
+        if i >= period:
+            atr_closed[i] = num / den
+    # Sample in Kerze k sieht den ATR nach Kerze k-1
+    pos = np.searchsorted(bar_ids, np.floor(sample_ts / bar_sec).astype(np.int64), side="left")
+    valid = pos >= 1
+    out[valid] = atr_closed[pos[valid] - 1]
+    return out
+
+
+class _RangeTable:
+    """Sparse Table über die Preise: Minimum/Maximum jedes Fensters [i, i + 2^k) in O(1) Lookups."""
+
+    def __init__(self, prices: np.ndarray):
+        n = len(prices)
+        self.n = n
+        self.levels = max(1, int(np.ceil(np.log2(n + 1))))
+        lo = np.r_[prices, np.inf]
+        hi = np.r_[prices, -np.inf]
+        self.mins, self.maxs = [lo], [hi]
+        for k in range(1, self.levels):
+            step = 1 << (k - 1)
+            idx = np.minimum(np.arange(n + 1) + step, n)
+            lo = np.minimum(lo, lo[idx])
+            hi = np.maximum(hi, hi[idx])
+            self.mins.append(lo)
+            self.maxs.append(hi)
+
+    def first_touch(self, level: np.ndarray, below: bool) -> np.ndarray:
+        """
+        Für jedes i: erster Index j > i mit prices[j] <= level[i] (below) bzw. >= level[i];
+        n, wenn der Level nie berührt wird. Binary Lifting über die Sparse Table, vektorisiert über alle i.
+        """
+        n = self.n
+        pos = np.arange(n)
+        table = self.mins if below else self.maxs
+        for k in range(self.levels - 1, -1, -1):
+            nxt = np.minimum(pos + 1, n)
+            window = table[k][nxt]
+            clear = window > level if below else window < level
+            pos = np.where(clear, np.minimum(pos + (1 << k), n), pos)
+        return np.minimum(pos + 1, n)
+
+
+class SweepFeatures:
+    """
+    Je Symbol einmal berechnete Grundlagen des Sweeps: Renditen, ATR-Maske, Sparse Table sowie
+    die Berührungsindizes je (Multiplikator, Offset)-Paar und die Entry-Indizes je Schwelle.
+    Alles bezieht sich auf die gesamte Reihe und wird zwischen Parameter-Blöcken und
+    Walk-Forward-Fenstern geteilt (ein Fenster kappt die Indizes nur bei seinem Ende).
+    """
+
+    def __init__(self, sample_ts: np.ndarray, prices: np.ndarray, atr: np.ndarray, digest: Optional[str] = None):
+        self.sample_ts = np.asarray(sample_ts, dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.atr = np.asarray(atr, dtype=np.float64)
+        self.n = len(self.prices)
+        self.has_atr = self.atr > 0
+        self.change = np.r_[-np.inf, self.prices[1:] / self.prices[:-1] - 1.0] if self.n else np.zeros(0)
+        self._table: Optional[_RangeTable] = None
+        self._touches: Dict[Tuple[bool, float, float], np.ndarray] = {}
+        self._matrices: Dict[Tuple, np.ndarray] = {}
+        self._entries: Dict[float, np.ndarray] = {}
+        # Vom Aufrufer bereits berechneter data_digest(sample_ts, prices, atr) spart das erneute Hashen
+        self._digest = digest
+
+    @property
+    def digest(self) -> str:
+        """Inhalts-Hash der Reihen (Schlüsselteil für den Ergebnis-Cache)."""
+        if self._digest is None:
+            self._digest = data_digest(self.sample_ts, self.prices, self.atr)
+        return self._digest
+
+    @property
+    def table(self) -> _RangeTable:
+        if self._table is None:
+            self._table = _RangeTable(self.prices)
+        return self._table
+
+    def touches(self, mult: float, pct: float, below: bool) -> np.ndarray:
+        key = (below, float(mult), float(pct))
+        touch = self._touches.get(key)
+        if touch is None:
+            if below:
+                level = np.where(self.has_atr, self.prices - self.atr * mult, self.prices * (1 - pct))
+            else:
+                level = np.where(self.has_atr, self.prices + self.atr * mult, self.prices * (1 + pct))
+            touch = self._touches[key] = self.table.first_touch(level, below)
+        return touch
+
+    def barrier_ids(self, mult: np.ndarray, pct: np.ndarray, below: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """(Berührungsmatrix je eindeutigem Paar, Paar-Index je Kombination)."""
+        pairs, ids = np.unique(np.stack([mult, pct], axis=1), axis=0, return_inverse=True)
+        key = (below, pairs.tobytes())
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            matrix = self._matrices[key] = np.stack([self.touches(m, p, below) for m, p in pairs])
+        return matrix, ids.reshape(-1)
+
+    def entries(self, threshold: float) -> np.ndarray:
+        idx = self._entries.get(float(threshold))
+        if idx is None:
+            idx = self._entries[float(threshold)] = np.flatnonzero(self.change >= threshold)
+        return idx
+
+
+@dataclass
+class SweepResult:
+    symbol: str
+    keys: Tuple[str, ...]
+    params: np.ndarray
+    pnl: np.ndarray
+    trades: np.ndarray
+    wins: np.ndarray
+    fees: np.ndarray
+    max_drawdown: np.ndarray
+    samples: int
+    elapsed: float
+
+    def ranking(self, min_trades: int = SWEEP_MIN_TRADES) -> np.ndarray:
+        """Indizes absteigend nach PnL (Gleichstand: geringerer Drawdown); zu wenige Trades ans Ende."""
+        eligible = self.trades >= min_trades
+        return np.lexsort((self.max_drawdown, -self.pnl, ~eligible))
+
+    def params_of(self, i: int) -> Dict[str, float]:
+        return {key: float(self.params[i, j]) for j, key in enumerate(self.keys)}
+
+    def top(self, k: int = 10, min_trades: int = SWEEP_MIN_TRADES) -> List[dict]:
+        rows = []
+        for i in self.ranking(min_trades)[:k]:
+            trades = int(self.trades[i])
+            rows.append({
+                "params": self.params_of(int(i)),
+                "pnl": round(float(self.pnl[i]), 6),
+                "trades": trades,
+                "win_rate": round(float(self.wins[i]) / trades * 100, 2) if trades else 0.0,
+                "fees": round(float(self.fees[i]), 6),
+                "max_drawdown": round(float(self.max_drawdown[i]), 6),
+            })
+        return rows
+
+    def best_bot_params(self, base: Optional[dict] = None, min_trades: int = SWEEP_MIN_TRADES) -> Optional[dict]:
+        """
+        Beste Kombination als bot_params.json-Eintrag; None, wenn keine `min_trades` erreicht.
+        Scale-Out nur, wenn mitsimuliert (sweep_exact) – sonst bleibt der Wert aus `base` erhalten.
+        """
+        best = int(self.ranking(min_trades)[0]) if len(self.trades) else None
+        if best is None or self.trades[best] < min_trades:
+            return None
+        entry = variant_to_bot_params({"scale_out": 0.0, **self.params_of(best)}, base)
+        if "scale_out" not in self.keys:
+            if base and "scale_out" in base:
+                entry["scale_out"] = base["scale_out"]
+            else:
+                del entry["scale_out"]
+        return entry
+
+
+def expand_sweep_grid(grid: dict) -> np.ndarray:
+    """
+    Kartesisches Produkt des Grids als (Kombinationen × len(SWEEP_KEYS))-Matrix. Ohne
+    BOT_PARAMS_FIXED_OFFSETS nutzt die Engine die ENV-Offsets – tp/sl werden dann darauf festgelegt.
+    """
+    sl, tp = fixed_offsets()
+    pinned = {} if BOT_PARAMS_FIXED_OFFSETS else {"sl": [sl], "tp": [tp]}
+    axes = [sorted({float(v) for v in pinned.get(key) or grid.get(key, DEFAULT_GRID[key])}) for key in SWEEP_KEYS]
+    return np.array(list(itertools.product(*axes)), dtype=np.float64)
+
+
+def sweep(symbol: str, sample_ts: np.ndarray, prices: np.ndarray, atr: np.ndarray, combos: np.ndarray,
+          notional: float = SWEEP_NOTIONAL, fee_rate: float = TAKER_FEE,
+          features: Optional[SweepFeatures] = None, start: int = 0, stop: Optional[int] = None) -> SweepResult:
+    """
+    Wertet alle Kombinationen über einer (auf Engine-Taktung gesampelten) Preisreihe aus:
+      - Entry-Maske je Impulsschwelle: Rendite zum vorherigen Sample >= Schwelle
+      - SL/TP beim Entry fixiert: ATR × Multiplikator (< 0.1 → ENV-Default wie resolve_params),
+        ohne ATR (Warm-up) die festen Offsets tp/sl; Exit beim ersten Sample, das einen der Level berührt (SL vor TP)
+      - Re-Entry frühestens `reentry_cooldown` Sekunden nach dem Exit, eine Position je Kombination
+    Die Berührungsindizes werden je eindeutigem (Multiplikator, Offset)-Paar einmal für alle
+    Entry-Zeitpunkte berechnet; danach laufen alle Kombinationen Trade für Trade gemeinsam als
+    Array-Operationen. Trailing und Scale-Out sind pfadabhängig und hier nicht enthalten.
+    Mit `features` + [start, stop) wird nur ein Fenster der Reihe bewertet (Walk-Forward); offene
+    Positionen werden am Fensterende zum letzten Preis geschlossen.
+    """
+    started = time.perf_counter()
+    if features is None:
+        features = SweepFeatures(sample_ts, prices, atr)
+    sample_ts, prices = features.sample_ts, features.prices
+    stop = features.n if stop is None else min(stop, features.n)
+    start = max(start, 0)
+    n = features.n
+    c = len(combos)
+    pnl = np.zeros(c)
+    trades = np.zeros(c, dtype=np.int64)
+    wins = np.zeros(c, dtype=np.int64)
+    fees = np.zeros(c)
+    peak = np.zeros(c)
+    max_dd = np.zeros(c)
+    if stop - start < 3 or c == 0:
+        return SweepResult(symbol, SWEEP_KEYS, combos, pnl, trades, wins, fees, max_dd, max(stop - start, 0), 0.0)
+
+    thr, tp, sl, m_sl, m_tp, cooldown = (combos[:, j] for j in range(len(SWEEP_KEYS)))
+    m_sl = np.where(m_sl < 0.1, ATR_MULTIPLIER_SL, m_sl)
+    m_tp = np.where(m_tp < 0.1, ATR_MULTIPLIER_TP, m_tp)
+    sl_touch, sl_id = features.barrier_ids(m_sl, sl, below=True)
+    tp_touch, tp_id = features.barrier_ids(m_tp, tp, below=False)
+
+    # Entry-Kandidaten je Schwelle als ein sortiertes Schlüssel-Array (Schwelle-Block × (n + 1) + Index)
+    thresholds, thr_id = np.unique(thr, return_inverse=True)
+    thr_id = thr_id.reshape(-1)
+    keys = np.concatenate([k * (n + 1) + features.entries(t) for k, t in enumerate(thresholds)])
+    base = thr_id * (n + 1)
+
+    cursor = np.full(c, max(start, 1), dtype=np.int64)
+    active = np.ones(c, dtype=bool)
+    cost = notional * fee_rate
+    while True:
+        a = np.flatnonzero(active)
+        if not len(a) or not len(keys):
+            break
+        hit = np.searchsorted(keys, base[a] + cursor[a])
+        entry = keys[np.minimum(hit, len(keys) - 1)] - base[a]
+        found = (hit < len(keys)) & (entry >= 0) & (entry < stop)
+        active[a[~found]] = False
+        a, entry = a[found], entry[found]
+        if not len(a):
+            break
+        exit_idx = np.minimum(sl_touch[sl_id[a], entry], tp_touch[tp_id[a], entry])
+        # Nie (im Fenster) berührt → zum letzten Preis des Fensters bewertet, Kombination endet
+        open_end = exit_idx >= stop
+        exit_idx = np.minimum(exit_idx, stop - 1)
+        ratio = prices[exit_idx] / prices[entry]
+        fee = cost * (1.0 + ratio)
+        trade_pnl = notional * (ratio - 1.0) - fee
+        pnl[a] += trade_pnl
+        fees[a] += fee
+        trades[a] += 1
+        wins[a] += trade_pnl > 0
+        peak[a] = np.maximum(peak[a], pnl[a])
+        max_dd[a] = np.maximum(max_dd[a], peak[a] - pnl[a])
+        ready = np.searchsorted(sample_ts, sample_ts[exit_idx] + cooldown[a], side="left")
+        cursor[a] = np.maximum(exit_idx + 1, ready)
+        active[a[open_end | (cursor[a] >= stop)]] = False
+
+    return SweepResult(symbol, SWEEP_KEYS, combos, pnl, trades, wins, fees, max_dd, stop - start,
+                       time.perf_counter() - started)
+
+
+def cached_sweep(symbol: str, features: SweepFeatures, combos: np.ndarray, notional: float = SWEEP_NOTIONAL,
+                 fee_rate: float = TAKER_FEE, start: int = 0, stop: Optional[int] = None,
+                 use_cache: bool = True) -> SweepResult:
+    """sweep() über `features` mit vorherigem Blick in den Ergebnis-Cache (Kennzahlen je Kombination als .npz)."""
+    stop = features.n if stop is None else min(stop, features.n)
+    key = result_cache.key("sweep", features.digest, {
+        "combos": combos, "notional": notional, "fee_rate": fee_rate, "start": start, "stop": stop,
+        "atr_defaults": [ATR_MULTIPLIER_SL, ATR_MULTIPLIER_TP],
+    })
+    hit = result_cache.get_arrays(key) if use_cache else None
+    if hit is not None:
+        return SweepResult(symbol, SWEEP_KEYS, combos, hit["pnl"], hit["trades"], hit["wins"], hit["fees"],
+                           hit["max_drawdown"], int(hit["samples"]), 0.0)
+    result = sweep(symbol, None, None, None, combos, notional, fee_rate, features, start, stop)
+    if use_cache:
+        result_cache.put_arrays(key, pnl=result.pnl, trades=result.trades, wins=result.wins, fees=result.fees,
+                                max_drawdown=result.max_drawdown, samples=np.array(result.samples))
+    return result
+
+
+def sweep_exact(symbol: str, timestamps: Sequence[float], prices: Sequence[float], combos: np.ndarray,
+                keys: Tuple[str, ...] = SWEEP_KEYS, use_trailing: bool = False,
+                trailing_cooldown: float = 600, notional: float = SWEEP_NOTIONAL, fee_rate: float = TAKER_FEE,
+                loop_interval: float = ENGINE_LOOP_INTERVAL, use_cache: bool = True) -> SweepResult:
+    """
+    Pfadabhängiger Sweep über die Roh-Ticks mit dem Simulations-Kernel (strategies.kernels, mit Numba
+    kompiliert, sonst reines Python): Trailing, Scale-Out (Spalte "scale_out" in `keys`) und die
+    Positions-/Cooldown-Sperre wie on_new_price (max_concurrent_positions aus `keys`, sonst wie
+    resolve_params).
+    """
+    from strategies import kernels
+    from strategies.impulse_logic import resolve_params
+
+    started = time.perf_counter()
+    ts = np.ascontiguousarray(timestamps, dtype=np.float64)
+    px = np.ascontiguousarray(prices, dtype=np.float64)
+    key = result_cache.key("sweep_exact", data_digest(ts, px), {
+        "combos": combos, "keys": list(keys), "use_trailing": use_trailing,
+        "trailing_cooldown": trailing_cooldown, "notional": notional, "fee_rate": fee_rate,
+        "loop_interval": loop_interval, "atr_defaults": [ATR_MULTIPLIER_SL, ATR_MULTIPLIER_TP],
+    })
+    hit = result_cache.get_arrays(key) if use_cache else None
+    if hit is not None:
+        return SweepResult(symbol, tuple(keys), combos, hit["pnl"], hit["trades"], hit["wins"], hit["fees"],
+                           hit["max_drawdown"], len(ts), 0.0)
+    column = {key: j for j, key in enumerate(keys)}
+    rows = np.zeros((len(combos), kernels.N_PARAMS))
+    rows[:, kernels.P_THRESHOLD] = combos[:, column["impulse_threshold"]]
+    rows[:, kernels.P_COOLDOWN] = combos[:, column["reentry_cooldown"]]
+    rows[:, kernels.P_MAX_POS] = (combos[:, column["max_concurrent_positions"]] if "max_concurrent_positions" in column
+                                  else resolve_params().max_concurrent_positions)
+    rows[:, kernels.P_ATR_SL] = np.where(combos[:, column["atr_sl_mult"]] < 0.1, ATR_MULTIPLIER_SL, combos[:, column["atr_sl_mult"]])
+    rows[:, kernels.P_ATR_TP] = np.where(combos[:, column["atr_tp_mult"]] < 0.1, ATR_MULTIPLIER_TP, combos[:, column["atr_tp_mult"]])
+    rows[:, kernels.P_SL] = combos[:, column["sl"]]
+    rows[:, kernels.P_TP] = combos[:, column["tp"]]
+    if "scale_out" in column:
+        rows[:, kernels.P_SELL_PCT] = combos[:, column["scale_out"]]
+    stats = np.zeros((len(combos), kernels.N_STATS))
+    kernels.simulate_grid_kernel(ts, px, rows, float(loop_interval), bool(use_trailing), float(trailing_cooldown),
+                                 float(notional), float(fee_rate), 0.0, stats)
+    result = SweepResult(symbol, tuple(keys), combos, stats[:, kernels.S_PNL], stats[:, kernels.S_EXITS].astype(np.int64),
+                         stats[:, kernels.S_WINS].astype(np.int64), stats[:, kernels.S_FEES], stats[:, kernels.S_MAX_DD],
+                         len(ts), time.perf_counter() - started)
+    if use_cache:
+        result_cache.put_arrays(key, pnl=result.pnl, trades=result.trades, wins=result.wins, fees=result.fees,
+                                max_drawdown=result.max_drawdown)
+    return result
+
+
+def sweep_symbol(symbol: str, timestamps: Sequence[float], prices: Sequence[float], grid: Optional[dict] = None,
+                 interval: float = ENGINE_LOOP_INTERVAL, **kwargs) -> SweepResult:
+    """Sampling + ATR + Sweep für eine Tick- oder Event-Reihe."""
+    sample_ts, sample_px = sample_series(timestamps, prices, interval)
+    atr = atr_series(timestamps, prices, sample_ts)
+    return cached_sweep(symbol, SweepFeatures(sample_ts, sample_px, atr), expand_sweep_grid(grid or {}), **kwargs)
+
+
+def main(argv=None):
+    from strategies.backtest import load_events, _parse_time
+
+    parser = argparse.ArgumentParser(description="Vektorisierter Parameter-Sweep der Impuls-Strategie")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--source", choices=["ticks", "candles"], default="ticks")
+    parser.add_argument("--interval", default="1min", help="Kerzen-Intervall bei --source candles")
+    parser.add_argument("--grid", default=SWEEP_GRID_FILE)
+    parser.add_argument("--min-trades", type=int, default=SWEEP_MIN_TRADES)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--exact", action="store_true",
+                        help="Pfadabhängig über die Roh-Ticks (Kernel, Scale-Out aus dem Grid) statt vektorisiert")
+    parser.add_argument("--no-cache", action="store_true", help="Ergebnis-Cache weder lesen noch schreiben")
+    parser.add_argument("--write", action="store_true", help=f"Beste Parameter nach {BOT_PARAMS_FILE} schreiben")
+    args = parser.parse_args(argv)
+
+    end = _parse_time(args.end) if args.end else time.time()
+    start = _parse_time(args.start) if args.start else end - args.days * 86400
+    try:
+        with open(args.grid, "r") as f:
+            grid = json.load(f)
+    except FileNotFoundError:
+        grid = {}
+    try:
+        bot_params, _ = load_bot_params()
+    except FileNotFoundError:
+        bot_params = {}
+
+    report = {}
+    written = []
+    for symbol in args.symbols:
+        timestamps, prices = load_events(symbol, start, end, args.source, args.interval)
+        if not len(timestamps):
+            logger.warning(f"⚠️ Keine Daten für {symbol} im Zeitraum")
+            continue
+        if args.exact:
+            keys = SWEEP_KEYS + ("scale_out",)
+            axes = [sorted({float(v) for v in grid.get(key, DEFAULT_GRID.get(key, [0.0]))}) for key in keys]
+            result = sweep_exact(symbol, timestamps, prices, np.array(list(itertools.product(*axes))), keys,
+                                 use_cache=not args.no_cache)
+        else:
+            result = sweep_symbol(symbol, timestamps, prices, grid, use_cache=not args.no_cache)
+        logger.info(f"🧮 {symbol}: {len(result.params)} Kombinationen über {result.samples} Samples in {result.elapsed:.2f}s")
+        report[symbol] = result.top(args.top, args.min_trades)
+        best = result.best_bot_params(bot_params.get(symbol), args.min_trades)
+        if best is None:
+            logger.warning(f"⚠️ {symbol}: keine Kombination mit ≥{args.min_trades} Trades – Eintrag bleibt unverändert")
+            continue
+        bot_params[symbol] = best
+        written.append(symbol)
+
+    print(json.dumps(report, indent=2))
+    if args.write and written:
+        publish_bot_params(bot_params, {
+            "tool": "strategies.param_sweep",
+            "period": {"start": start, "end": end},
+            "source": args.source,
+            "symbols": sorted(written),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    main()
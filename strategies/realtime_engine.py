@@ -2,6 +2,7 @@
 import os
 import pandas as pd
 import collections
+import queue
 import time
 import json
 import math
@@ -11,11 +12,17 @@ from core.logger import log
 from core.position import PositionManager
 from core.telegram_utils import notify_live_balance, send_telegram_message
 from core.kucoin_api import kucoin_client
-from core.order import record_order, send_order_prepared
+from core.order import record_order, send_order_prepared, send_orders_batch
+from core.exec_algo import should_slice, submit_parent_order, symbol_busy
+from core.passive_entry import ENTRY_EXECUTION, submit_passive_entry
 from core.wallet import get_dynamic_position_size, calculate_position_size
-from core.paper_wallet import PaperWallet
+from core.paper_wallet import get_paper_wallet
 from core.paper_order import PaperOrderHandler
 from strategies.atr import calculate_atr
+from strategies.impulse_logic import (
+    ImpulseParams, resolve_params, price_change as impulse_change, entry_gate, is_impulse,
+    initial_levels, trailing_levels, exit_action, recovery_needed, recovery_levels,
+)
 
 # ENV-Konfiguration
 ENGINE_LOOP_INTERVAL = float(os.getenv("ENGINE_LOOP_INTERVAL", 10))
@@ -62,11 +69,15 @@ last_analysis_log_time = 0
 last_ticker_log_time = 0
 last_position_log_time = 0
 entry_counts = {}
+# Antworten aus Hintergrund-Ausführungen (Passiv-Entry, TWAP/POV) laufen auf Executor-Threads ein;
+# verbucht werden sie im Engine-Thread (on_new_price), damit der State nur dort verändert wird
+pending_entry_responses = queue.Queue()
 
 # Load optimized params
 try:
-    with open("data/bot_params.json", "r") as f:
-        OPTIMIZED_PARAMS = json.load(f)
+    from strategies.bot_params import load_bot_params
+    # _meta (Prüfsumme/Herkunft aus strategies.optimizer) ist kein Symbol
+    OPTIMIZED_PARAMS, _params_meta = load_bot_params("data/bot_params.json")
     import hashlib
     with open("data/bot_params.json", "rb") as pf:
         params_bytes = pf.read()
@@ -128,9 +139,127 @@ def init_symbol(symbol: str, maxlen: int = 100):
         price_buffers[symbol] = collections.deque(maxlen=maxlen)
         log.debug(f"🆕 Symbol initialisiert: {symbol}")
 
+def warm_price_buffers(symbols: list) -> int:
+    """
+    Befüllt die Preis-Buffer vor dem ersten WS-Tick mit einem allTickers-Snapshot (ein REST-Request).
+    Gibt die Anzahl vorbelegter Symbole zurück.
+    """
+    try:
+        snapshot = kucoin_client.get_all_tickers()
+    except Exception as e:
+        log.warning(f"⚠️ Preis-Buffer konnten nicht vorbelegt werden: {e}")
+        return 0
+    seeded = 0
+    for symbol in symbols:
+        price = snapshot.get(symbol)
+        if not price:
+            continue
+        init_symbol(symbol)
+        if not price_buffers[symbol]:
+            price_buffers[symbol].append(float(price))
+            seeded += 1
+    log.info(f"🔥 Preis-Buffer vorbelegt für {seeded}/{len(symbols)} Symbole")
+    return seeded
+
+def handle_entry_response(symbol: str, price: float, response, params: ImpulseParams):
+    """Verbucht einen BUY-Entry (Cooldown, entry_counts, SL/TP, Telegram), sofern die Order angenommen wurde."""
+    if response and isinstance(response, dict):
+        status = str(response.get("status", "")).lower()
+        exch_id = response.get("orderId") or response.get("order_id") or response.get("exch_order_id") or response.get("kucoin_order_id")
+        # Nur wenn Order wirklich an die Börse gesendet/akzeptiert wurde
+        if status in {"sent", "ack", "filled", "partial", "open"} or exch_id:
+            last_entry_times[symbol] = time.time()
+            # === entry_counts erhöhen ===
+            entry_counts[symbol] = entry_counts.get(symbol, 0) + 1
+            entry_price = float(response.get("price", price))
+            try:
+                kline_data = safe_get_candles(symbol, interval="15min", limit=50)
+                atr_val = calculate_atr(kline_data)
+                log.info(f"📏 ATR-Berechnung für {symbol}: ATR={atr_val}, SL-Mult={params.atr_sl_mult}, TP-Mult={params.atr_tp_mult}")
+            except Exception as e:
+                log.error(f"❌ ATR-Berechnung fehlgeschlagen, fallback auf feste Offsets: {e}")
+                atr_val = None
+            new_sl, new_tp = initial_levels(entry_price, atr_val, params)
+            position_manager.update_sl(symbol, new_sl)
+            position_manager.update_tp(symbol, new_tp)
+            if mode.upper() == "LIVE":
+                notify_live_balance()
+                send_telegram_message(
+                    f"📥 BUY durch Preisimpuls!\n"
+                    f"Symbol: {symbol}\nPreis: {entry_price:.5f}\n"
+                    f"SL: {new_sl:.5f} | TP: {new_tp:.5f}",
+                    to_private=True,
+                    to_channel=True
+                )
+        else:
+            log.info(f"🧯 BUY-Signal verworfen oder dupliziert – status={status}, response={response}")
+
+def drain_entry_responses():
+    """Verbucht alle inzwischen eingetroffenen Hintergrund-Entries im aufrufenden (Engine-)Thread."""
+    while True:
+        try:
+            symbol, price, response, params = pending_entry_responses.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            handle_entry_response(symbol, price, response, params)
+        except Exception as e:
+            log.error(f"❌ Verbuchen des Entries für {symbol} fehlgeschlagen: {e}")
+
+def sweep_exits(prices: dict) -> int:
+    """
+    Prüft SL/TP aller offenen LIVE-Positionen gegen einen Preis-Snapshot {symbol: Preis} (z.B. allTickers
+    nach einem WebSocket-Reconnect, wenn während der Lücke keine Ticks kamen) und sendet die fälligen
+    Voll-Exits gemeinsam über send_orders_batch. Scale-Outs bleiben dem nächsten Tick (on_new_price).
+    Muss im Engine-Thread laufen. Rückgabe: Anzahl gefüllter Exits.
+    """
+    if IS_PAPER or not prices:
+        return 0
+    drain_entry_responses()
+    exits = []
+    for position in position_manager.get_open_positions():
+        symbol = position.get("symbol")
+        price = prices.get(symbol)
+        if not symbol or not price or not position.get("quantity"):
+            continue
+        action = exit_action(price, position.get("sl"), position.get("tp"), resolve_params(OPTIMIZED_PARAMS.get(symbol)))
+        if action and action[0] in ("stop_loss", "take_profit"):
+            exits.append((symbol, price, action[0], float(position["quantity"])))
+    if not exits:
+        return 0
+    log.info(f"🧺 Exit-Sweep: {len(exits)} fällige Exits – " + ", ".join(f"{s} {reason}" for s, _, reason, _ in exits))
+    results = send_orders_batch(kucoin_client, [
+        {"symbol": symbol, "side": "sell", "price": price, "qty": qty, "order_type": "market"}
+        for symbol, price, _, qty in exits
+    ], strategy="impulse")
+    booked = 0
+    for (symbol, price, reason, qty), result in zip(exits, results):
+        filled = float((result or {}).get("filledSize") or 0)
+        if filled <= 0:
+            log.info(f"🧯 Sweep-Exit {symbol} ({reason}) ohne Fill – status={(result or {}).get('status')}")
+            continue
+        booked += 1
+        last_exit_times[symbol] = time.time()
+        # === entry_counts zurücksetzen ===
+        entry_counts[symbol] = 0
+        if result.get("status") == "filled":
+            position_manager.close_position(symbol)
+        else:
+            position_manager.reduce_position(symbol, filled)
+        notify_live_balance()
+        send_telegram_message(
+            f"🔔 Auto-Exit (Sweep) ausgelöst!\n"
+            f"Symbol: {symbol}\nPreis: {price:.5f}\n"
+            f"{'Stop-Loss' if reason == 'stop_loss' else 'Take-Profit'} erreicht.\nPNL: Berechnung folgt.",
+            to_private=True,
+            to_channel=True
+        )
+    return booked
+
 def on_new_price(symbol: str, price: float, *_):
     global last_analysis_log_time, last_ticker_log_time, last_rsi_log_time, last_position_log_time
     init_symbol(symbol)
+    drain_entry_responses()
 
     # Logge die geladenen bot_params für das Symbol – aber nur einmal
     if symbol not in last_price_time:
@@ -181,32 +310,23 @@ def on_new_price(symbol: str, price: float, *_):
     else:
         price_buffers[symbol].append(price)
 
+    # Symbol-spezifische Settings (Impulsschwelle, Cooldown, ATR, Scale-Out) aus bot_params, sonst .env
+    params = resolve_params(OPTIMIZED_PARAMS.get(symbol))
+
     # Impuls-basierter Entry
     if len(price_buffers[symbol]) >= 2:
         last_price = price_buffers[symbol][-2]
-        price_change = (price - last_price) / last_price
+        price_change = impulse_change(last_price, price)
         log.debug(f"📊 Preisänderung für {symbol}: {price_change:.4%}")
-        # --- Symbol-spezifische Settings laden ---
-        pair_settings = OPTIMIZED_PARAMS.get(symbol, {})
-        symbol_reentry_cd = pair_settings.get("reentry_cooldown", REENTRY_COOLDOWN)
-        symbol_max_conc = pair_settings.get("max_concurrent_positions", 1)
-        # --- Max concurrent positions check ---
-        if entry_counts.get(symbol, 0) >= symbol_max_conc:
-            log.info(f"🚫 Max concurrent positions erreicht für {symbol} (Limit: {symbol_max_conc})")
-            return
-        # --- Re-Entry Cooldown check ---
-        now_ts = time.time()
-        last_entry_ts = last_entry_times.get(symbol, 0)
-        last_exit_ts = last_exit_times.get(symbol, 0)
-        last_activity_ts = max(last_entry_ts, last_exit_ts)
-        if now_ts - last_activity_ts < symbol_reentry_cd:
-            wait_left = int(symbol_reentry_cd - (now_ts - last_activity_ts))
-            log.info(f"⏳ Re-Entry Cooldown aktiv für {symbol}: noch {wait_left}s")
-            return
-        # Impulsschwelle für BUY (z. B. 0.0005 = 0.05 %) – konfigurierbar über .env
-        IMPULSE_THRESHOLD = float(os.getenv("IMPULSE_THRESHOLD", 0.001))
-
-        if price_change >= IMPULSE_THRESHOLD and not position_manager.has_open_position(symbol):
+        # --- Max concurrent positions / Re-Entry Cooldown check ---
+        blocked, wait_left = entry_gate(params, time.time(), entry_counts.get(symbol, 0),
+                                        last_entry_times.get(symbol, 0), last_exit_times.get(symbol, 0))
+        # Sperren gelten nur für den Entry – Trailing, SL/TP und Recovery laufen weiter
+        if blocked == "max_positions":
+            log.info(f"🚫 Max concurrent positions erreicht für {symbol} (Limit: {params.max_concurrent_positions})")
+        elif blocked == "cooldown":
+            log.info(f"⏳ Re-Entry Cooldown aktiv für {symbol}: noch {int(wait_left)}s")
+        elif is_impulse(price_change, params) and not position_manager.has_open_position(symbol):
             log.info(f"📥 Impuls-BUY für {symbol}: Preisveränderung {price_change:.4%}")
             # Positionsgrößenberechnung
             if DYNAMIC_POSITION_SIZING:
@@ -217,7 +337,7 @@ def on_new_price(symbol: str, price: float, *_):
                             base, quote = symbol.split("-")
                         except ValueError:
                             base, quote = symbol, "USDT"
-                        pw = PaperWallet()
+                        pw = get_paper_wallet()
                         bal = pw.load_balance()
                         available_quote = float(bal.get(quote, 0.0))
                         log.info(f"💰 PAPER Sizing: verfügbarer {quote}: {available_quote:.8f}")
@@ -272,52 +392,23 @@ def on_new_price(symbol: str, price: float, *_):
                 log.warning(f"⚠️ Positionsgröße = 0. Fallback auf {fallback_qty:.8f}.")
                 trade_quantity = fallback_qty
 
-            # ATR-Parameter ggf. laden
-            atr_sl_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_sl_mult")
-            atr_tp_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_tp_mult")
-            # Validierung der ATR-Parameter
-            if atr_sl_mult is None or atr_sl_mult < 0.1:
-                atr_sl_mult = ATR_MULTIPLIER_SL
-            if atr_tp_mult is None or atr_tp_mult < 0.1:
-                atr_tp_mult = ATR_MULTIPLIER_TP
             if IS_PAPER and PAPER_HANDLER is not None:
                 response = PAPER_HANDLER.place_order(symbol, "buy", trade_quantity, price, entry_reason="impulse")
+            elif ENTRY_EXECUTION == "passive" or should_slice(symbol, price, trade_quantity):
+                # Passiver Entry (Post-Only am Best Bid) bzw. TWAP/POV-Parent-Order für größere Orders;
+                # läuft im Hintergrund, verbucht wird erst nach dem Fill (on_done → Queue → Engine-Thread)
+                response = None
+                on_done = lambda resp: pending_entry_responses.put((symbol, price, resp, params))
+                if symbol_busy(symbol) or not pending_entry_responses.empty():
+                    # noch nicht verbuchter Entry → Gate-Zähler wären veraltet, erst beim nächsten Tick
+                    log.info(f"⏳ Entry-Ausführung für {symbol} läuft bereits – Signal übersprungen")
+                elif should_slice(symbol, price, trade_quantity):
+                    submit_parent_order(kucoin_client, symbol, "buy", trade_quantity, price, strategy="impulse", on_done=on_done)
+                else:
+                    submit_passive_entry(kucoin_client, symbol, trade_quantity, price, strategy="impulse", on_done=on_done)
             else:
                 response = send_order_prepared(kucoin_client, symbol, "buy", price, trade_quantity, strategy="impulse", order_type="limit")
-            if response and isinstance(response, dict):
-                status = str(response.get("status", "")).lower()
-                exch_id = response.get("orderId") or response.get("order_id") or response.get("exch_order_id") or response.get("kucoin_order_id")
-                # Nur wenn Order wirklich an die Börse gesendet/akzeptiert wurde
-                if status in {"sent", "ack", "filled", "open"} or exch_id:
-                    last_entry_times[symbol] = time.time()
-                    # === entry_counts erhöhen ===
-                    entry_counts[symbol] = entry_counts.get(symbol, 0) + 1
-                    entry_price = float(response.get("price", price))
-                    sl_offset = float(os.getenv("TRAILING_SL_OFFSET", 0.005))
-                    tp_offset = float(os.getenv("TRAILING_TP_OFFSET", 0.02))
-                    try:
-                        kline_data = safe_get_candles(symbol, interval="15min", limit=50)
-                        atr_val = calculate_atr(kline_data)
-                        new_sl = entry_price - atr_val * atr_sl_mult if atr_val is not None and atr_sl_mult is not None else entry_price * (1 - sl_offset)
-                        new_tp = entry_price + atr_val * atr_tp_mult if atr_val is not None and atr_tp_mult is not None else entry_price * (1 + tp_offset)
-                        log.info(f"📏 ATR-Berechnung für {symbol}: ATR={atr_val}, SL-Mult={atr_sl_mult}, TP-Mult={atr_tp_mult}")
-                    except Exception as e:
-                        log.error(f"❌ ATR-Berechnung fehlgeschlagen, fallback auf feste Offsets: {e}")
-                        new_sl = entry_price * (1 - sl_offset)
-                        new_tp = entry_price * (1 + tp_offset)
-                    position_manager.update_sl(symbol, new_sl)
-                    position_manager.update_tp(symbol, new_tp)
-                    if mode.upper() == "LIVE":
-                        notify_live_balance()
-                        send_telegram_message(
-                            f"📥 BUY durch Preisimpuls!\n"
-                            f"Symbol: {symbol}\nPreis: {entry_price:.5f}\n"
-                            f"SL: {new_sl:.5f} | TP: {new_tp:.5f}",
-                            to_private=True,
-                            to_channel=True
-                        )
-                else:
-                    log.info(f"🧯 BUY-Signal verworfen oder dupliziert – status={status}, response={response}")
+            handle_entry_response(symbol, price, response, params)
 
     # === Trailing Stop-Loss / Take-Profit ===
     if USE_TRAILING_SL and position_manager.has_open_position(symbol):
@@ -327,18 +418,6 @@ def on_new_price(symbol: str, price: float, *_):
         current_sl = position.get("stop_loss") or position.get("sl")
         current_tp = position.get("take_profit") or position.get("tp")
 
-        trailing_sl_offset = float(os.getenv("TRAILING_SL_OFFSET", 0.005))  # 0.5 %
-        trailing_tp_offset = float(os.getenv("TRAILING_TP_OFFSET", 0.02))   # 2.0 %
-
-        # ATR-Parameter laden für trailing (wie im BUY)
-        atr_sl_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_sl_mult")
-        atr_tp_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_tp_mult")
-        # Validierung der ATR-Parameter
-        if atr_sl_mult is None or atr_sl_mult < 0.1:
-            atr_sl_mult = ATR_MULTIPLIER_SL
-        if atr_tp_mult is None or atr_tp_mult < 0.1:
-            atr_tp_mult = ATR_MULTIPLIER_TP
-
         # Nur updaten, wenn ausreichend Zeit vergangen ist
         cooldown = TRAILING_UPDATE_COOLDOWN
         last_update = last_trailing_update_time.get(symbol, 0)
@@ -358,12 +437,7 @@ def on_new_price(symbol: str, price: float, *_):
                 atr_val = calculate_atr(kline_data)
             except Exception:
                 atr_val = None
-            if atr_val:
-                new_sl = max(current_sl or 0, price - atr_val * atr_sl_mult)
-                new_tp = max(current_tp or 0, price + atr_val * atr_tp_mult)
-            else:
-                new_sl = max(current_sl or 0, price - price * trailing_sl_offset)
-                new_tp = max(current_tp or 0, price + price * trailing_tp_offset)
+            new_sl, new_tp = trailing_levels(price, atr_val, current_sl, current_tp, params)
 
             log.info(
                 f"🔢 Berechnete neue Werte für {symbol}: new_sl={new_sl} (alt: {current_sl}), new_tp={new_tp} (alt: {current_tp})"
@@ -400,8 +474,9 @@ def on_new_price(symbol: str, price: float, *_):
         tp = position.get("take_profit") or position.get("tp")
         quantity = position.get("quantity")
         log.debug(f"🔎 Exit-Check {symbol} | price={price:.6f} sl={sl} tp={tp} qty={quantity}")
+        action = exit_action(price, sl, tp, params)
 
-        if sl and price <= sl:
+        if action and action[0] == "stop_loss":
             log.info(f"🛑 Stop-Loss ausgelöst bei {price:.5f} für {symbol}")
             if IS_PAPER and PAPER_HANDLER is not None:
                 response = PAPER_HANDLER.place_order(symbol, "sell", quantity, price, entry_reason="stop_loss")
@@ -410,7 +485,7 @@ def on_new_price(symbol: str, price: float, *_):
             if response and isinstance(response, dict):
                 status = str(response.get("status", "")).lower()
                 exch_id = response.get("orderId") or response.get("order_id") or response.get("exch_order_id") or response.get("kucoin_order_id")
-                if status in {"sent", "ack", "filled", "open"} or exch_id:
+                if status in {"sent", "ack", "filled", "partial", "open"} or exch_id:
                     last_exit_times[symbol] = time.time()
                     # === entry_counts zurücksetzen ===
                     entry_counts[symbol] = 0
@@ -428,13 +503,11 @@ def on_new_price(symbol: str, price: float, *_):
                 else:
                     log.info(f"🧯 SL-Exit nicht bestätigt – status={status}, response={response}")
 
-        elif tp and price >= tp:
+        elif action:
             log.info(f"🎯 Take-Profit erreicht bei {price:.5f} für {symbol}")
             # === SCALE OUT ===
-            scale_out_enabled = OPTIMIZED_PARAMS.get(symbol, {}).get("scale_out", {}).get("active", False)
-            sell_percent = OPTIMIZED_PARAMS.get(symbol, {}).get("scale_out", {}).get("sell_percent", 0)
-
-            if scale_out_enabled and sell_percent > 0:
+            if action[0] == "scale_out":
+                sell_percent = action[1]
                 partial_qty = quantity * sell_percent
                 log.info(f"📉 Scale-Out aktiviert – Verkaufe {sell_percent:.0%} ({partial_qty:.4f}) von {symbol}")
                 if IS_PAPER and PAPER_HANDLER is not None:
@@ -465,7 +538,7 @@ def on_new_price(symbol: str, price: float, *_):
             if response and isinstance(response, dict):
                 status = str(response.get("status", "")).lower()
                 exch_id = response.get("orderId") or response.get("order_id") or response.get("exch_order_id") or response.get("kucoin_order_id")
-                if status in {"sent", "ack", "filled", "open"} or exch_id:
+                if status in {"sent", "ack", "filled", "partial", "open"} or exch_id:
                     last_exit_times[symbol] = time.time()
                     # === entry_counts zurücksetzen ===
                     entry_counts[symbol] = 0
@@ -489,42 +562,20 @@ def on_new_price(symbol: str, price: float, *_):
         entry_price = position.get("entry_price")
         current_sl = position.get("stop_loss") or position.get("sl")
         current_tp = position.get("take_profit") or position.get("tp")
-        # ATR-Parameter laden
-        atr_sl_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_sl_mult")
-        atr_tp_mult = OPTIMIZED_PARAMS.get(symbol, {}).get("atr_tp_mult")
-        if atr_sl_mult is None or atr_sl_mult < 0.1:
-            atr_sl_mult = ATR_MULTIPLIER_SL
-        if atr_tp_mult is None or atr_tp_mult < 0.1:
-            atr_tp_mult = ATR_MULTIPLIER_TP
-        # ATR Wert holen
-        try:
-            kline_data = safe_get_candles(symbol, interval="15min", limit=50)
-            atr_val = calculate_atr(kline_data)
-        except Exception:
-            atr_val = None
-        sl_offset = float(os.getenv("TRAILING_SL_OFFSET", 0.005))
-        tp_offset = float(os.getenv("TRAILING_TP_OFFSET", 0.02))
-        # SL/TP zu weit entfernt (>10%) oder fehlt?
-        sl_should_update = False
-        tp_should_update = False
-        if current_sl is None or (entry_price and current_sl < entry_price and abs(current_sl - entry_price) / entry_price > 0.1):
-            sl_should_update = True
-        if current_tp is None or (entry_price and current_tp > entry_price and abs(current_tp - entry_price) / entry_price > 0.1):
-            tp_should_update = True
-        if sl_should_update:
-            if atr_val:
-                new_sl = entry_price - atr_val * atr_sl_mult
-            else:
-                new_sl = entry_price * (1 - sl_offset)
-            position_manager.update_sl(symbol, new_sl)
-            log.info(f"♻️ Recovery: SL für {symbol} neu gesetzt auf {new_sl}")
-        if tp_should_update:
-            if atr_val:
-                new_tp = entry_price + atr_val * atr_tp_mult
-            else:
-                new_tp = entry_price * (1 + tp_offset)
-            position_manager.update_tp(symbol, new_tp)
-            log.info(f"♻️ Recovery: TP für {symbol} neu gesetzt auf {new_tp}")
+        # SL/TP zu weit entfernt (>10%) oder fehlt? Nur dann ATR-Wert holen
+        if any(recovery_needed(entry_price, current_sl, current_tp)):
+            try:
+                kline_data = safe_get_candles(symbol, interval="15min", limit=50)
+                atr_val = calculate_atr(kline_data)
+            except Exception:
+                atr_val = None
+            new_sl, new_tp = recovery_levels(entry_price, current_sl, current_tp, atr_val, params)
+            if new_sl is not None:
+                position_manager.update_sl(symbol, new_sl)
+                log.info(f"♻️ Recovery: SL für {symbol} neu gesetzt auf {new_sl}")
+            if new_tp is not None:
+                position_manager.update_tp(symbol, new_tp)
+                log.info(f"♻️ Recovery: TP für {symbol} neu gesetzt auf {new_tp}")
 
     import shutil
 def cleanup_checkpoints():
@@ -537,4 +588,4 @@ def cleanup_checkpoints():
     except Exception as e:
         log.error(f"Fehler beim Löschen des Checkpoints-Ordners: {e}")
 
-__all__ = ["get_last_ws_price", "cleanup_checkpoints"]
\ No newline at end of file
+__all__ = ["get_last_ws_price", "cleanup_checkpoints", "warm_price_buffers"]
\ No newline at end of file
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+RESULT_CACHE = os.getenv("RESULT_CACHE", "true").lower() == "true"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "data/cache/results")
+# Obergrenze auf der Platte; bei Überschreitung werden die am längsten nicht genutzten Einträge gelöscht
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+# Nach der Eviction bleibt dieser Anteil der Obergrenze belegt (Puffer gegen ständiges Aufräumen)
+EVICT_TARGET = 0.8
+# Alle N Schreibvorgänge wird die Größe neu vermessen (mehrere Prozesse schreiben parallel)
+RESCAN_EVERY = 64
+
+# Quelltexte, deren Änderung gespeicherte Ergebnisse ungültig macht
+STRATEGY_SOURCES = ("impulse_logic.py", "param_sweep.py", "kernels.py", "backtest.py")
+
+
+def code_version(sources=STRATEGY_SOURCES) -> str:
+    """Kurz-Hash über die Strategie-/Simulations-Quelltexte (unabhängig von git)."""
+    digest = hashlib.sha256()
+    base = os.path.dirname(os.path.abspath(__file__))
+    for name in sources:
+        with open(os.path.join(base, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def data_digest(*arrays) -> str:
+    """SHA256 über Länge und Bytes der Eingangsreihen (Zeit, Preis, ATR …) – identifiziert den Datenausschnitt."""
+    digest = hashlib.sha256()
+    for values in arrays:
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        digest.update(str(len(values)).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def normalize_params(value):
+    """
+    Kanonische Form für den Schlüssel: Dicts sortiert, None entfernt, Zahlen als float auf 12
+    signifikante Stellen (30 == 30.0, Rundungsrauschen aus JSON/Grids fällt weg), Arrays als Hash.
+    """
+    if isinstance(value, dict):
+        return {str(k): normalize_params(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_params(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"sha256": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest(),
+                "shape": list(value.shape), "dtype": value.dtype.str}
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(f"{float(value):.12g}")
+    return value
+
+
+class ResultCache:
+    """
+    Inhaltsadressierter Ergebnis-Cache auf der Platte: Schlüssel = SHA256(Art, Datenausschnitt,
+    normalisierte Parameter, Code-Version). Einträge sind entweder kompakte Kennzahlen (JSON, optional
+    mit Trade-Liste) oder Arrays (.npz, z.B. Sweep-Kennzahlen je Kombination). Schreiben ist atomar,
+    Treffer aktualisieren die mtime (LRU-Reihenfolge für die größenbasierte Eviction).
+    """
+
+    def __init__(self, root: str = RESULT_CACHE_DIR, max_bytes: float = RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 enabled: bool = RESULT_CACHE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._code_version: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        if self._code_version is None:
+            self._code_version = code_version()
+        return self._code_version
+
+    def key(self, kind: str, data_hash: str, params: dict, code: Optional[str] = None) -> str:
+        payload = {"kind": kind, "data": data_hash, "params": normalize_params(params), "code": code or self.version}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    # --- Lesen ---
+    def _hit(self, path: str) -> bool:
+        if not self.enabled or not os.path.exists(path):
+            self.misses += 1
+            return False
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return True
+
+    def get(self, key: str, with_trades: bool = False) -> Optional[dict]:
+        """{"metrics": …, "trades": […] oder None}; mit with_trades nur Treffer, die Trades enthalten."""
+        path = self._path(key, ".json")
+        if not self._hit(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.hits -= 1
+            self.misses += 1
+            return None
+        if with_trades and entry.get("trades") is None:
+            self.hits -= 1
+            self.misses += 1
+            return None
+        return entry
+
+    def get_arrays(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key, ".npz")
+        if not self._hit(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    # --- Schreiben ---
+    def put(self, key: str, metrics: dict, trades: Optional[List[dict]] = None) -> None:
+        if not self.enabled:
+            return
+        payload = json.dumps({"metrics": metrics, "trades": trades, "created": time.time()}, default=str)
+        self._write(self._path(key, ".json"), lambda f: f.write(payload.encode()))
+
+    def put_arrays(self, key: str, **arrays: np.ndarray) -> None:
+        if not self.enabled:
+            return
+        self._write(self._path(key, ".npz"), lambda f: np.savez_compressed(f, **arrays))
+
+    def _write(self, path: str, write) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Ergebnis-Cache konnte nicht schreiben: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            if self._size is None or self._writes % RESCAN_EVERY == 0:
+                self._size = self._scan_size()
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    # --- Größe / Eviction ---
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for folder in os.scandir(self.root):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith((".json", ".npz")):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(s for _, s, _ in entries)
+        target = self.max_bytes * EVICT_TARGET
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+        self._size = size
+        if removed:
+            logger.info(f"🧹 Ergebnis-Cache: {removed} Einträge entfernt, {size / 1e6:.1f} MB belegt")
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {"entries": len(entries), "bytes": sum(s for _, s, _ in entries),
+                "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+
+result_cache = ResultCache()
@@ -0,0 +1,370 @@
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.logger_setup import setup_logger
+from strategies.impulse_logic import fixed_offsets
+
+logger = setup_logger(__name__)
+
+# Schatten-Auswertung vieler Parameter-Varianten auf dem Live-Feed (läuft neben PAPER/LIVE, handelt nie)
+SHADOW_EVAL = os.getenv("SHADOW_EVAL", "false").lower() == "true"
+SHADOW_GRID_FILE = os.getenv("SHADOW_GRID_FILE", "data/shadow_grid.json")
+SHADOW_REPORT_FILE = os.getenv("SHADOW_REPORT_FILE", "data/shadow_report.json")
+SHADOW_REPORT_INTERVAL = float(os.getenv("SHADOW_REPORT_INTERVAL", "300"))
+SHADOW_REPORT_TOP = int(os.getenv("SHADOW_REPORT_TOP", "20"))
+# Obergrenze je Symbol; größere Grids werden gekürzt (Kosten pro Tick wachsen linear mit N)
+SHADOW_MAX_VARIANTS = int(os.getenv("SHADOW_MAX_VARIANTS", "1000"))
+# Warnschwelle für die Rechenzeit eines Schritts (alle Varianten eines Symbols)
+SHADOW_CPU_BUDGET_MS = float(os.getenv("SHADOW_CPU_BUDGET_MS", "2"))
+# Simuliertes Notional je Entry (USDT), damit PnL über Varianten vergleichbar ist
+SHADOW_NOTIONAL = float(os.getenv("SHADOW_NOTIONAL", "100"))
+SHADOW_ATR_REFRESH_SEC = float(os.getenv("SHADOW_ATR_REFRESH_SEC", "900"))
+
+# Engine-Defaults (wie strategies/realtime_engine)
+ENGINE_LOOP_INTERVAL = float(os.getenv("ENGINE_LOOP_INTERVAL", 10))
+TAKER_FEE = float(os.getenv("TAKER_FEE", 0.001))
+IMPULSE_THRESHOLD = float(os.getenv("IMPULSE_THRESHOLD", 0.001))
+ATR_MULTIPLIER_SL = float(os.getenv("ATR_MULTIPLIER_SL", 1.5))
+ATR_MULTIPLIER_TP = float(os.getenv("ATR_MULTIPLIER_TP", 3.0))
+TRAILING_UPDATE_COOLDOWN = int(os.getenv("TRAILING_UPDATE_COOLDOWN", 600))
+USE_TRAILING_SL = os.getenv("USE_TRAILING_SL", "false").lower() == "true"
+REENTRY_COOLDOWN = int(os.getenv("REENTRY_COOLDOWN", 120))
+
+# Reihenfolge der Parameter-Spalten; scale_out = Verkaufsanteil beim ersten TP (0 = aus)
+PARAM_KEYS = ("impulse_threshold", "tp", "sl", "atr_sl_mult", "atr_tp_mult", "reentry_cooldown", "scale_out")
+
+
+def variant_from_bot_params(settings: Optional[dict]) -> Dict[str, float]:
+    """Parameter-Satz aus einem bot_params.json-Eintrag; fehlende Werte aus den Engine-Defaults."""
+    settings = settings or {}
+    scale_out = settings.get("scale_out") or {}
+    # Wie resolve_params: bot_params sl/tp nur mit BOT_PARAMS_FIXED_OFFSETS
+    sl, tp = fixed_offsets(settings)
+    return {
+        "impulse_threshold": float(settings.get("impulse_threshold", IMPULSE_THRESHOLD)),
+        "tp": tp,
+        "sl": sl,
+        "atr_sl_mult": float(settings.get("atr_sl_mult") or ATR_MULTIPLIER_SL),
+        "atr_tp_mult": float(settings.get("atr_tp_mult") or ATR_MULTIPLIER_TP),
+        "reentry_cooldown": float(settings.get("reentry_cooldown", REENTRY_COOLDOWN)),
+        "scale_out": float(scale_out.get("sell_percent", 0.0)) if scale_out.get("active") else 0.0,
+    }
+
+
+def variant_to_bot_params(variant: dict, base: Optional[dict] = None) -> dict:
+    """Umkehrung von variant_from_bot_params: Eintrag im bot_params.json-Format (übrige Felder aus `base`)."""
+    entry = dict(base or {})
+    entry.update({
+        "impulse_threshold": round(float(variant["impulse_threshold"]), 8),
+        "tp": round(float(variant["tp"]), 8),
+        "sl": round(float(variant["sl"]), 8),
+        "atr_sl_mult": round(float(variant["atr_sl_mult"]), 6),
+        "atr_tp_mult": round(float(variant["atr_tp_mult"]), 6),
+        "reentry_cooldown": int(variant["reentry_cooldown"]),
+        "scale_out": {"active": float(variant["scale_out"]) > 0, "sell_percent": round(float(variant["scale_out"]), 6)},
+    })
+    return entry
+
+
+def expand_grid(grid: dict, base: Dict[str, float]) -> List[Dict[str, float]]:
+    """Kartesisches Produkt der Listen in `grid`; nicht angegebene Parameter bleiben auf `base`."""
+    axes = [[float(v) for v in grid.get(key, [base[key]])] or [base[key]] for key in PARAM_KEYS]
+    return [dict(zip(PARAM_KEYS, combo)) for combo in itertools.product(*axes)]
+
+
+class SymbolShadow:
+    """
+    Zustand aller Varianten eines Symbols als Spalten-Arrays (ein Eintrag je Variante).
+    Ein Schritt wertet Entry-Impuls, Cooldown, Trailing, Scale-Out und SL/TP für alle Varianten
+    gleichzeitig aus – wie on_new_price, aber ohne Orders und mit höchstens einer Position je Variante.
+    Wie im Live-Pfad gilt der Cooldown nur für Entries (Exits werden immer geprüft); abweichend
+    greift Scale-Out einmal je Position, danach schließt der nächste TP-Treffer den Rest.
+    """
+
+    def __init__(self, symbol: str, variants: List[Dict[str, float]], notional: float = SHADOW_NOTIONAL,
+                 fee_rate: float = TAKER_FEE):
+        self.symbol = symbol
+        self.variants = variants
+        self.notional = notional
+        self.fee_rate = fee_rate
+        n = len(variants)
+        cols = np.array([[v[key] for key in PARAM_KEYS] for v in variants], dtype=np.float64).reshape(n, len(PARAM_KEYS))
+        (self.threshold, self.tp_pct, self.sl_pct, self.atr_sl_mult, self.atr_tp_mult,
+         self.cooldown, self.scale_out) = (cols[:, i].copy() for i in range(len(PARAM_KEYS)))
+        # ATR-Multiplikatoren < 0.1 werden wie in resolve_params durch die ENV-Defaults ersetzt
+        self.atr_sl_mult = np.where(self.atr_sl_mult < 0.1, ATR_MULTIPLIER_SL, self.atr_sl_mult)
+        self.atr_tp_mult = np.where(self.atr_tp_mult < 0.1, ATR_MULTIPLIER_TP, self.atr_tp_mult)
+
+        self.in_pos = np.zeros(n, dtype=bool)
+        self.scaled = np.zeros(n, dtype=bool)
+        self.entry = np.zeros(n)
+        self.units = np.zeros(n)
+        self.sl = np.zeros(n)
+        self.tp = np.zeros(n)
+        self.last_activity = np.full(n, -np.inf)
+        self.last_trail = np.full(n, -np.inf)
+        self.pos_pnl = np.zeros(n)
+        self.realized = np.zeros(n)
+        self.fees = np.zeros(n)
+        self.trades = np.zeros(n, dtype=np.int64)
+        self.wins = np.zeros(n, dtype=np.int64)
+        self.peak = np.zeros(n)
+        self.max_dd = np.zeros(n)
+
+        self.last_price: Optional[float] = None
+        self.last_step_ts = 0.0
+        self.steps = 0
+        self.step_time = 0.0
+        self.max_step_time = 0.0
+
+    def _levels(self, price: float, atr: float):
+        """(SL, TP) je Variante relativ zu `price`: ATR-basiert, ohne ATR feste Offsets."""
+        if atr:
+            return price - atr * self.atr_sl_mult, price + atr * self.atr_tp_mult
+        return price * (1 - self.sl_pct), price * (1 + self.tp_pct)
+
+    def _close(self, mask: np.ndarray, price: float, fraction, now: float) -> None:
+        """Realisiert `fraction` der Restmenge der Varianten in `mask` zu `price`."""
+        qty = self.units * fraction
+        proceeds = qty * price
+        cost = qty * self.entry
+        fee = proceeds * self.fee_rate
+        pnl = np.where(mask, proceeds - cost - fee, 0.0)
+        self.realized += pnl
+        self.pos_pnl += pnl
+        self.fees += np.where(mask, fee, 0.0)
+        self.units = np.where(mask, self.units - qty, self.units)
+
+    def step(self, price: float, now: float, atr: Optional[float] = None) -> None:
+        started = time.perf_counter()
+        prev = self.last_price
+        self.last_price = price
+        self.last_step_ts = now
+
+        # Impuls-Entry (Cooldown ab letztem Entry/Exit, je Variante)
+        if prev:
+            change = (price - prev) / prev
+            enter = ~self.in_pos & (change >= self.threshold) & (now - self.last_activity >= self.cooldown)
+            if enter.any():
+                sl, tp = self._levels(price, atr)
+                fee = self.notional * self.fee_rate
+                self.in_pos |= enter
+                self.scaled &= ~enter
+                self.entry = np.where(enter, price, self.entry)
+                self.units = np.where(enter, self.notional / price, self.units)
+                self.sl = np.where(enter, sl, self.sl)
+                self.tp = np.where(enter, tp, self.tp)
+                self.pos_pnl = np.where(enter, -fee, self.pos_pnl)
+                self.realized -= np.where(enter, fee, 0.0)
+                self.fees += np.where(enter, fee, 0.0)
+                self.last_activity = np.where(enter, now, self.last_activity)
+
+        # Trailing SL/TP nur nach oben
+        if USE_TRAILING_SL:
+            due = self.in_pos & (now - self.last_trail >= TRAILING_UPDATE_COOLDOWN)
+            if due.any():
+                sl, tp = self._levels(price, atr)
+                self.sl = np.where(due, np.maximum(self.sl, sl), self.sl)
+                self.tp = np.where(due, np.maximum(self.tp, tp), self.tp)
+                self.last_trail = np.where(due, now, self.last_trail)
+
+        # Exits: SL hat Vorrang; erster TP-Treffer mit Scale-Out verkauft nur den Anteil
+        hit_sl = self.in_pos & (price <= self.sl)
+        hit_tp = self.in_pos & ~hit_sl & (price >= self.tp)
+        if hit_tp.any():
+            partial = hit_tp & ~self.scaled & (self.scale_out > 0)
+            if partial.any():
+                self._close(partial, price, np.where(partial, self.scale_out, 0.0), now)
+                self.scaled |= partial
+                hit_tp &= ~partial
+        done = hit_sl | hit_tp
+        if done.any():
+            self._close(done, price, np.where(done, 1.0, 0.0), now)
+            self.trades += done
+            self.wins += done & (self.pos_pnl > 0)
+            self.in_pos &= ~done
+            self.last_activity = np.where(done, now, self.last_activity)
+
+        equity = self.realized + np.where(self.in_pos, self.units * price, 0.0) - np.where(
+            self.in_pos, self.units * self.entry, 0.0)
+        np.maximum(self.peak, equity, out=self.peak)
+        np.maximum(self.max_dd, self.peak - equity, out=self.max_dd)
+
+        elapsed = time.perf_counter() - started
+        self.steps += 1
+        self.step_time += elapsed
+        self.max_step_time = max(self.max_step_time, elapsed)
+
+    def equity(self) -> np.ndarray:
+        """Realisierter plus unrealisierter PnL je Variante zum letzten Preis."""
+        if self.last_price is None:
+            return self.realized.copy()
+        return self.realized + np.where(self.in_pos, self.units * (self.last_price - self.entry), 0.0)
+
+    def ranking(self, top: int = SHADOW_REPORT_TOP) -> dict:
+        equity = self.equity()
+        # Absteigend nach PnL, bei Gleichstand geringerer Drawdown zuerst
+        order = np.lexsort((self.max_dd, -equity))
+        rank_of = np.empty(len(order), dtype=np.int64)
+        rank_of[order] = np.arange(1, len(order) + 1)
+        rows = []
+        for i in order[:top]:
+            trades = int(self.trades[i])
+            rows.append({
+                "rank": int(rank_of[i]),
+                "variant": int(i),
+                "params": self.variants[i],
+                "pnl": round(float(equity[i]), 6),
+                "realized_pnl": round(float(self.realized[i]), 6),
+                "fees": round(float(self.fees[i]), 6),
+                "trades": trades,
+                "win_rate": round(float(self.wins[i]) / trades * 100, 2) if trades else 0.0,
+                "max_drawdown": round(float(self.max_dd[i]), 6),
+                "open": bool(self.in_pos[i]),
+            })
+        return {
+            "variants": len(self.variants),
+            "steps": self.steps,
+            "avg_step_ms": round(self.step_time / self.steps * 1000, 4) if self.steps else 0.0,
+            "max_step_ms": round(self.max_step_time * 1000, 4),
+            # Variante 0 = aktive bot_params des Symbols
+            "baseline_rank": int(rank_of[0]) if len(order) else None,
+            "baseline_pnl": round(float(equity[0]), 6) if len(order) else None,
+            "top": rows,
+        }
+
+
+def _fetch_atr(symbol: str) -> Optional[float]:
+    from core.kucoin_api import kucoin_client
+    from strategies.atr import calculate_atr
+    return calculate_atr(kucoin_client.get_candles(symbol=symbol, interval="15min", limit=50))
+
+
+class ShadowEvaluator:
+    """
+    Treibt je Symbol N Parameter-Varianten mit demselben Ticker-Feed, in derselben Taktung wie die
+    Engine (ENGINE_LOOP_INTERVAL). Der ATR (15min) wird je Symbol geteilt und gecacht.
+    Schreibt periodisch einen Ranking-Report nach SHADOW_REPORT_FILE.
+    """
+
+    def __init__(self, variants_by_symbol: Dict[str, List[Dict[str, float]]],
+                 loop_interval: float = ENGINE_LOOP_INTERVAL,
+                 atr_fn: Callable[[str], Optional[float]] = _fetch_atr,
+                 report_file: str = SHADOW_REPORT_FILE,
+                 report_interval: float = SHADOW_REPORT_INTERVAL):
+        self.loop_interval = loop_interval
+        self.atr_fn = atr_fn
+        self.report_file = report_file
+        self.report_interval = report_interval
+        self._shadows = {sym: SymbolShadow(sym, variants) for sym, variants in variants_by_symbol.items() if variants}
+        self._atr: Dict[str, tuple] = {}
+        self._last_report = time.time()
+        self._budget_warned = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_files(cls, symbols: List[str], optimized_params: Optional[dict] = None,
+                   grid_file: str = SHADOW_GRID_FILE, **kwargs) -> "ShadowEvaluator":
+        """
+        Baut die Varianten aus dem Grid (JSON: {"param": [werte, ...], "symbols": {"SYM": {...}}}).
+        Variante 0 je Symbol sind immer die aktiven bot_params; Duplikate entfallen.
+        """
+        try:
+            with open(grid_file, "r") as f:
+                grid = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Kein Schatten-Grid unter {grid_file} – nur aktive bot_params werden ausgewertet.")
+            grid = {}
+        optimized_params = optimized_params or {}
+        per_symbol = grid.pop("symbols", {}) or {}
+        variants_by_symbol = {}
+        for symbol in symbols:
+            base = variant_from_bot_params(optimized_params.get(symbol))
+            variants = [base]
+            seen = {tuple(base[k] for k in PARAM_KEYS)}
+            for v in expand_grid({**grid, **per_symbol.get(symbol, {})}, base):
+                key = tuple(v[k] for k in PARAM_KEYS)
+                if key not in seen:
+                    seen.add(key)
+                    variants.append(v)
+            if len(variants) > SHADOW_MAX_VARIANTS:
+                logger.warning(f"⚠️ Schatten-Grid {symbol}: {len(variants)} Varianten, gekürzt auf {SHADOW_MAX_VARIANTS}")
+                variants = variants[:SHADOW_MAX_VARIANTS]
+            variants_by_symbol[symbol] = variants
+            logger.info(f"👥 Schatten-Auswertung {symbol}: {len(variants)} Varianten")
+        return cls(variants_by_symbol, **kwargs)
+
+    def _atr_for(self, symbol: str, now: float) -> Optional[float]:
+        cached = self._atr.get(symbol)
+        if cached is not None and now - cached[1] < SHADOW_ATR_REFRESH_SEC:
+            return cached[0]
+        try:
+            atr = self.atr_fn(symbol)
+        except Exception as e:
+            logger.debug(f"Schatten-ATR für {symbol} nicht verfügbar: {e}")
+            atr = cached[0] if cached else None
+        self._atr[symbol] = (atr, now)
+        return atr
+
+    def on_price(self, symbol: str, price: float, ts: Optional[float] = None) -> None:
+        shadow = self._shadows.get(symbol)
+        if shadow is None:
+            return
+        now = time.time() if ts is None else float(ts)
+        if shadow.steps and now - shadow.last_step_ts < self.loop_interval:
+            return
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        if price <= 0:
+            return
+        with self._lock:
+            shadow.step(price, now, self._atr_for(symbol, now))
+        avg_ms = shadow.step_time / shadow.steps * 1000
+        if avg_ms > SHADOW_CPU_BUDGET_MS and symbol not in self._budget_warned:
+            self._budget_warned.add(symbol)
+            logger.warning(f"⚠️ Schatten-Auswertung {symbol}: {avg_ms:.2f} ms/Schritt über Budget "
+                           f"({SHADOW_CPU_BUDGET_MS} ms) – SHADOW_MAX_VARIANTS senken")
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            self.write_report()
+
+    def report(self, top: int = SHADOW_REPORT_TOP) -> dict:
+        with self._lock:
+            return {
+                "generated": int(time.time()),
+                "notional": SHADOW_NOTIONAL,
+                "symbols": {sym: shadow.ranking(top) for sym, shadow in self._shadows.items()},
+            }
+
+    def best_params(self, optimized_params: Optional[dict] = None) -> dict:
+        """Bestplatzierte Variante je Symbol im bot_params.json-Format."""
+        optimized_params = optimized_params or {}
+        out = {}
+        for sym, data in self.report(top=1)["symbols"].items():
+            if data["top"]:
+                out[sym] = variant_to_bot_params(data["top"][0]["params"], optimized_params.get(sym))
+        return out
+
+    def write_report(self) -> None:
+        try:
+            report = self.report()
+            os.makedirs(os.path.dirname(self.report_file) or ".", exist_ok=True)
+            tmp_path = self.report_file + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp_path, self.report_file)
+            for sym, data in report["symbols"].items():
+                if data["top"]:
+                    best = data["top"][0]
+                    logger.info(f"👥 Schatten {sym}: beste Variante #{best['variant']} PnL={best['pnl']:.4f} "
+                                f"({best['trades']} Trades), bot_params auf Rang {data['baseline_rank']}/{data['variants']}")
+        except Exception as e:
+            logger.warning(f"⚠️ Schatten-Report konnte nicht geschrieben werden: {e}")
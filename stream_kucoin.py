@@ -6,6 +6,7 @@ import hmac
 import base64
 import json
 import hashlib
+import threading
 from config.config import get_symbol_config
 
 from core.logger import ticker_logger
@@ -13,12 +14,19 @@ from core.logger import ticker_logger
 SYMBOL_CONFIG = get_symbol_config()
 from dotenv import load_dotenv
 import os
-from strategies.realtime_engine import on_new_price
+from strategies.realtime_engine import on_new_price, sweep_exits
 from core.position import PositionManager
 from core.logger_setup import setup_logger
 from core.logger import log_price
 from core.telegram_utils import send_telegram_message
 from core.utils import update_price_cache
+from core.price_service import price_service
+from core.order_tracker import order_tracker
+from core.kucoin_api import kucoin_client
+from core.exec_algo import EXEC_ALGO, volume_tracker
+from core.paper_matching import PAPER_FILL_MODEL, paper_engine
+from strategies.shadow_eval import SHADOW_EVAL, ShadowEvaluator
+from core.tick_store import RECORD_TICKS, tick_recorder
 
 load_dotenv()
 
@@ -29,8 +37,14 @@ API_SECRET = os.getenv("KUCOIN_API_SECRET")
 API_PASSPHRASE = os.getenv("KUCOIN_API_PASSPHRASE")
 API_BASE_URL = "https://api.kucoin.com"
 KUCOIN_WS_ENDPOINT = "wss://ws-api.kucoin.com"
+# Paper-Fills gegen Orderbuch/Trades (PAPER_FILL_MODEL=book) brauchen Tiefe und Match-Stream
+PAPER_BOOK_SIM = os.getenv("MODE", "PAPER").upper() == "PAPER" and PAPER_FILL_MODEL == "book"
+# Match-Stream (gehandelte Größen) abonnieren – für POV-Slicing und Paper-Matching automatisch aktiv
+STREAM_MATCHES = os.getenv("STREAM_MATCHES", "true" if EXEC_ALGO == "pov" or PAPER_BOOK_SIM else "false").lower() == "true"
 
 logger = setup_logger(__name__)
+# Schatten-Auswertung (SHADOW_EVAL=true): viele Parameter-Varianten auf demselben Feed, ohne Orders
+shadow_evaluator = None
 send_telegram_message("📡 HF Bot gestartet – empfange Live-Daten von KuCoin ...")
 
 async def get_ws_token():
@@ -40,6 +54,68 @@ async def get_ws_token():
             data = await response.json()
             return data['data']['instanceServers'][0]['endpoint'], data['data']['token']
 
+def _signed_headers(method: str, endpoint: str, body: str = "") -> dict:
+    now = str(int(time.time() * 1000))
+    sign = base64.b64encode(
+        hmac.new(API_SECRET.encode(), (now + method + endpoint + body).encode(), hashlib.sha256).digest()
+    ).decode()
+    passphrase = base64.b64encode(
+        hmac.new(API_SECRET.encode(), API_PASSPHRASE.encode(), hashlib.sha256).digest()
+    ).decode()
+    return {
+        "KC-API-KEY": API_KEY,
+        "KC-API-SIGN": sign,
+        "KC-API-TIMESTAMP": now,
+        "KC-API-PASSPHRASE": passphrase,
+        "KC-API-KEY-VERSION": "2",
+        "Content-Type": "application/json",
+    }
+
+async def get_private_ws_token():
+    endpoint = "/api/v1/bullet-private"
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{API_BASE_URL}{endpoint}", headers=_signed_headers("POST", endpoint)) as response:
+            data = await response.json()
+            return data['data']['instanceServers'][0]['endpoint'], data['data']['token']
+
+async def stream_private_orders():
+    """Privater Order-Feed (/spotMarket/tradeOrdersV2) → OrderTracker."""
+    while True:
+        try:
+            endpoint, token = await get_private_ws_token()
+            async with websockets.connect(f"{endpoint}?token={token}", ping_interval=20, ping_timeout=10) as ws:
+                await ws.send(json.dumps({
+                    "id": str(int(time.time() * 1000)),
+                    "type": "subscribe",
+                    "topic": "/spotMarket/tradeOrdersV2",
+                    "privateChannel": True,
+                    "response": True
+                }))
+                logger.info("✅ Subscribed to /spotMarket/tradeOrdersV2")
+                while True:
+                    data = json.loads(await ws.recv())
+                    msg_type = data.get("type")
+                    if msg_type == "ack":
+                        order_tracker.set_feed_active(True)
+                    elif msg_type == "message" and isinstance(data.get("data"), dict):
+                        order_tracker.on_event(data["data"])
+        except Exception as e:
+            order_tracker.set_feed_active(False)
+            logger.warning(f"⚠️ Privater Order-Feed getrennt: {e}. Versuche Reconnect in 5s ...")
+            await asyncio.sleep(5)
+
+def start_private_order_stream():
+    """
+    Startet den Order-Feed in einem eigenen Thread mit eigener Event-Loop, damit Fill-Events
+    auch dann ankommen, während send_order_prepared im Ticker-Loop auf den Fill wartet.
+    """
+    if not (API_KEY and API_SECRET and API_PASSPHRASE):
+        logger.warning("⚠️ Keine API-Credentials – privater Order-Feed deaktiviert (REST-Abgleich).")
+        return None
+    thread = threading.Thread(target=lambda: asyncio.run(stream_private_orders()), daemon=True, name="private-order-feed")
+    thread.start()
+    return thread
+
 async def subscribe_ticker(ws, symbol):
     topic = f"/market/ticker:{symbol}"
     sub_msg = {
@@ -52,6 +128,32 @@ async def subscribe_ticker(ws, symbol):
     await ws.send(json.dumps(sub_msg))
     logger.info(f"✅ Subscribed to {topic}")
 
+async def subscribe_matches(ws, symbol):
+    """Trade-Stream (Match-Größen) für POV-Slicing."""
+    topic = f"/market/match:{symbol}"
+    sub_msg = {
+        "id": str(int(time.time() * 1000)),
+        "type": "subscribe",
+        "topic": topic,
+        "privateChannel": False,
+        "response": True
+    }
+    await ws.send(json.dumps(sub_msg))
+    logger.info(f"✅ Subscribed to {topic}")
+
+async def subscribe_depth(ws, symbol):
+    """Top-5-Orderbuch für das Paper-Matching."""
+    topic = f"/spotMarket/level2Depth5:{symbol}"
+    sub_msg = {
+        "id": str(int(time.time() * 1000)),
+        "type": "subscribe",
+        "topic": topic,
+        "privateChannel": False,
+        "response": True
+    }
+    await ws.send(json.dumps(sub_msg))
+    logger.info(f"✅ Subscribed to {topic}")
+
 async def handle_message(msg, optimized_params=None):
     try:
         data = json.loads(msg)
@@ -63,13 +165,30 @@ async def handle_message(msg, optimized_params=None):
                 logger.warning(f"⚠️ Ungültige Datenstruktur: {type(data['data'])} – Inhalt: {data['data']}")
                 return
             symbol = data['topic'].split(':')[-1]
+            if data['topic'].startswith("/market/match:"):
+                volume_tracker.on_match(symbol, data['data'])
+                if PAPER_BOOK_SIM:
+                    paper_engine.on_trade(symbol, data['data'].get('price'), data['data'].get('size'), data['data'].get('side'))
+                return
+            if data['topic'].startswith("/spotMarket/level2Depth5:"):
+                paper_engine.on_depth(symbol, data['data'].get('bids') or [], data['data'].get('asks') or [])
+                return
             price_str = data['data'].get('price')
             if price_str:
                 price = float(price_str)
                 ticker_logger.log(symbol, price)
+                if RECORD_TICKS:
+                    tick_recorder.record(symbol, price, data['data'].get('size'))
                 # Log-Eintrag wird gesammelt (Ticker-Logging alle 5 Sekunden in logger.py)
                 update_price_cache(symbol, price)
+                # Top-of-Book für passive Entries (Post-Only am Best Bid)
+                price_service.update_book(symbol, data['data'].get('bestBid'), data['data'].get('bestAsk'))
+                if PAPER_BOOK_SIM:
+                    paper_engine.on_ticker(symbol, data['data'].get('bestBid'), data['data'].get('bestBidSize'),
+                                           data['data'].get('bestAsk'), data['data'].get('bestAskSize'))
                 on_new_price(symbol, price, optimized_params)
+                if shadow_evaluator is not None:
+                    shadow_evaluator.on_price(symbol, price)
         else:
             logger.warning(f"⚠️ Unerwartetes Format: {type(data)} – Inhalt: {data}")
     except Exception as e:
@@ -84,6 +203,16 @@ async def stream_prices(pairs=None, optimized_params=None):
             async with websockets.connect(ws_url, ping_interval=20, ping_timeout=10) as ws:
                 for symbol in pairs or SYMBOL_CONFIG:
                     await subscribe_ticker(ws, symbol)
+                    if STREAM_MATCHES:
+                        await subscribe_matches(ws, symbol)
+                    if PAPER_BOOK_SIM:
+                        await subscribe_depth(ws, symbol)
+                # Während der Verbindungslücke kamen keine Ticks: fällige Exits aller Paare gemeinsam nachholen
+                if os.getenv("MODE", "PAPER").upper() == "LIVE":
+                    try:
+                        sweep_exits(kucoin_client.get_all_tickers())
+                    except Exception as e:
+                        logger.warning(f"⚠️ Exit-Sweep nach Verbindungsaufbau fehlgeschlagen: {e}")
 
                 while True:
                     msg = await ws.recv()
@@ -94,6 +223,11 @@ async def stream_prices(pairs=None, optimized_params=None):
 
 
 def run_kucoin_stream(pairs=None, optimized_params=None):
+    global shadow_evaluator
+    if os.getenv("MODE", "PAPER").upper() == "LIVE":
+        start_private_order_stream()
+    if SHADOW_EVAL:
+        shadow_evaluator = ShadowEvaluator.from_files(list(pairs or SYMBOL_CONFIG), optimized_params)
     asyncio.run(stream_prices(pairs, optimized_params))
 
 if __name__ == "__main__":
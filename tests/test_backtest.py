@@ -0,0 +1,45 @@
+from strategies.backtest import ImpulseBacktest, SimBroker, SimClock
+
+
+def _ticks(path):
+    """(Dauer in s, Preis)-Abschnitte → 1s-Ticks."""
+    timestamps, prices, now = [], [], 1_700_000_000.0
+    for seconds, price in path:
+        for _ in range(seconds):
+            timestamps.append(now)
+            prices.append(price)
+            now += 1.0
+    return timestamps, prices
+
+
+def _run(path, settings=None):
+    clock = SimClock()
+    broker = SimBroker(clock, fee_rate=0.0, slippage_bps=0)
+    backtest = ImpulseBacktest("TEST-USDT", settings or {}, clock=clock, broker=broker, notional=100,
+                               loop_interval=10, use_trailing=False)
+    return backtest.run(*_ticks(path)), broker.trades
+
+
+def test_default_params_position_hits_take_profit():
+    # Impuls +1 % öffnet die Position (max_concurrent_positions=1), danach +3 % über den TP (+2 %)
+    result, trades = _run([(60, 100.0), (60, 101.0), (60, 104.0)])
+    assert result["entries"] == 1
+    assert result["exits"] == 1
+    assert trades[-1]["reason"] == "take_profit"
+    assert result["blocked"]["max_positions"] > 0
+    assert result["open_position"] is None
+
+
+def test_default_params_position_hits_stop_loss():
+    # Nach dem Entry fällt der Kurs unter den SL (-0,5 %)
+    result, trades = _run([(60, 100.0), (60, 101.0), (60, 100.0)])
+    assert result["exits"] == 1
+    assert trades[-1]["reason"] == "stop_loss"
+    assert result["pnl_usdt"] < 0
+
+
+def test_reentry_after_exit():
+    # Nach dem Exit setzt der Zähler zurück; nach Ablauf des Cooldowns ist ein neuer Entry möglich
+    result, _ = _run([(60, 100.0), (60, 101.0), (60, 104.0), (300, 104.0), (60, 105.0), (60, 108.0)])
+    assert result["entries"] == 2
+    assert result["exits"] == 2
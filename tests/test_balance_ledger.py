@@ -0,0 +1,38 @@
+import pytest
+
+import core.orders_db as orders_db
+from core.balance_ledger import BalanceLedger
+from core.order_tracker import order_tracker
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(orders_db, "db_singleton", orders_db.OrdersDB(str(tmp_path / "orders.db")))
+
+
+def _accounts(usdt):
+    return [{"type": "trade", "currency": "USDT", "available": str(usdt)}]
+
+
+def test_ack_during_fetch_is_not_treated_as_reflected():
+    ledger = BalanceLedger()
+    assert ledger.sync(_accounts(100))
+    order_tracker.register("ledger-early", "ETH-USDT", "buy", 1)
+    order_tracker.register("ledger-late", "ETH-USDT", "buy", 1)
+    assert ledger.reserve("ledger-early", "USDT", 30)
+    assert ledger.reserve("ledger-late", "USDT", 20)
+    order_tracker.ack("ledger-early", "ex-early")
+
+    def fetch():
+        # Snapshot wurde vor diesem Ack erstellt: die 20 USDT sind darin noch frei
+        order_tracker.ack("ledger-late", "ex-late")
+        return _accounts(70)
+
+    ledger.set_fetcher(fetch)
+    assert ledger.sync()
+    assert ledger.available("USDT") == pytest.approx(50)
+
+    # Beim nächsten Abgleich ist der Ack älter als der Abruf und zählt als enthalten
+    ledger.set_fetcher(lambda: _accounts(50))
+    assert ledger.sync()
+    assert ledger.available("USDT") == pytest.approx(50)
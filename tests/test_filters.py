@@ -0,0 +1,65 @@
+import random
+from decimal import Decimal, ROUND_DOWN
+
+from core.filters import FilterBook, SymbolFilters
+
+INCREMENTS = ("0.01", "0.0001", "0.00000001", "0.010", "0.5", "1", "10", "1E+1", "0.00025")
+
+
+def reference(f, px, qty):
+    """Ursprüngliche Rundung/Validierung (vor dem Snapshot-Umbau) als Vergleichsmaßstab."""
+    qpx = (Decimal(str(px)) / f.price_increment).to_integral_value(rounding=ROUND_DOWN) * f.price_increment
+    qqty = (Decimal(str(qty)) / f.base_increment).to_integral_value(rounding=ROUND_DOWN) * f.base_increment
+    notional = qpx * qqty
+    if f.min_funds and notional < f.min_funds:
+        return qpx, qqty, f"below_min_funds: {notional} < {f.min_funds}", notional
+    if f.min_qty and qqty < f.min_qty:
+        return qpx, qqty, f"below_min_qty: {qqty} < {f.min_qty}", notional
+    if f.max_qty and qqty > f.max_qty:
+        return qpx, qqty, f"above_max_qty: {qqty} > {f.max_qty}", notional
+    return qpx, qqty, None, notional
+
+
+def random_value(rnd):
+    kind = rnd.randrange(5)
+    if kind == 0:
+        return rnd.uniform(0, 1e5)
+    if kind == 1:
+        return round(rnd.uniform(0, 1e4), rnd.randint(0, 10))
+    if kind == 2:
+        return 10 ** rnd.uniform(-10, 12)
+    if kind == 3:
+        return f"{rnd.randint(0, 10**6)}.{rnd.randint(0, 10**6):0{rnd.randint(1, 8)}d}"
+    return Decimal(rnd.randint(0, 10**8)).scaleb(rnd.randint(-12, 4))
+
+
+def test_prepare_matches_decimal_reference():
+    rnd = random.Random(37)
+    book = FilterBook()
+    filters = {}
+    for i in range(40):
+        filters[f"S{i}-USDT"] = SymbolFilters(
+            price_increment=Decimal(rnd.choice(INCREMENTS)),
+            base_increment=Decimal(rnd.choice(INCREMENTS)),
+            min_funds=rnd.choice([None, Decimal("0.1"), Decimal("5")]),
+            min_qty=rnd.choice([None, Decimal("0.001"), Decimal("10")]),
+            max_qty=rnd.choice([None, Decimal("10000"), Decimal("1E+6")]),
+        )
+    book.set_all(filters)
+    symbols = sorted(filters)
+    orders = [(rnd.choice(symbols), "buy", random_value(rnd), random_value(rnd)) for _ in range(20000)]
+
+    expected = [reference(filters[symbol], px, qty) for symbol, _side, px, qty in orders]
+    single = [book.prepare(symbol, px, qty) for symbol, _side, px, qty in orders]
+    batch = book.prepare_many(orders)
+
+    # Bit-identisch: gleicher Wert UND gleiche Darstellung (Exponent), da str() an die Börse geht
+    as_text = lambda rows: [tuple(str(x) for x in row) for row in rows]
+    assert as_text(single) == as_text(expected)
+    assert as_text(batch) == as_text(expected)
+    assert any(row[2] for row in expected) and any(row[2] is None for row in expected)
+
+
+def test_prepare_without_filters_passes_through():
+    book = FilterBook()
+    assert book.prepare_many([("X-USDT", "buy", 1.5, "2")]) == [(Decimal("1.5"), Decimal("2"), None, Decimal("3.0"))]
@@ -0,0 +1,30 @@
+from strategies.backtest import ImpulseBacktest, SimBroker, SimClock
+from strategies.kernels import simulate, synthetic_ticks
+
+KEYS = ("evaluations", "entries", "exits", "wins", "pnl_usdt", "fees", "blocked")
+
+
+def test_kernel_matches_backtest_with_default_params():
+    timestamps, prices = synthetic_ticks(days=2)
+    clock = SimClock()
+    broker = SimBroker(clock)
+    reference = ImpulseBacktest("TEST-USDT", {}, clock=clock, broker=broker).run(timestamps.tolist(), prices.tolist())
+    result, trades = simulate("TEST-USDT", timestamps, prices, {})
+    assert reference["exits"] > 0
+    assert {key: result[key] for key in KEYS} == {key: reference[key] for key in KEYS}
+    assert [(t["side"], t["reason"]) for t in trades] == [(t["side"], t["reason"]) for t in broker.trades]
+
+
+def test_cache_hit_has_engine_independent_shape(tmp_path, monkeypatch):
+    from strategies.backtest import CACHED_RESULT_KEYS, run_symbol
+    from strategies.result_cache import result_cache
+
+    monkeypatch.setattr(result_cache, "root", str(tmp_path))
+    monkeypatch.setattr(result_cache, "enabled", True)
+    timestamps, prices = synthetic_ticks(days=1)
+    fresh, _ = run_symbol("TEST-USDT", timestamps, prices, {}, kernel=True)
+    hit, _ = run_symbol("TEST-USDT", timestamps, prices, {}, kernel=False)
+    assert "jit" in fresh and fresh["elapsed_sec"] > 0
+    assert hit["cached"] and hit["elapsed_sec"] == 0.0 and hit["events_per_sec"] is None
+    assert set(hit) == set(CACHED_RESULT_KEYS) | {"symbol", "cached", "elapsed_sec", "events_per_sec"}
+    assert {key: hit[key] for key in KEYS} == {key: fresh[key] for key in KEYS}
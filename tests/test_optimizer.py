@@ -0,0 +1,23 @@
+import os
+
+from strategies.optimizer import ParamOptimizer
+
+PARAMS = {"impulse_threshold": 0.001, "tp": 0.01, "sl": 0.005, "atr_sl_mult": 1.5, "atr_tp_mult": 3.0,
+          "reentry_cooldown": 120}
+
+
+def _results(pnl):
+    return {"ETH-USDT": {"top": [{"params": PARAMS, "pnl": pnl, "trades": 50, "wins": 20, "fees": 1.0,
+                                  "max_drawdown": 5.0}],
+                         "samples": 1000, "combinations": 1}}
+
+
+def test_publish_skips_unprofitable_in_sample_winner(tmp_path):
+    optimizer = ParamOptimizer({"symbols": ["ETH-USDT"], "start": 0, "end": 86400, "min_trades": 10},
+                               checkpoint_dir=str(tmp_path / "checkpoints"))
+    path = str(tmp_path / "bot_params.json")
+    assert optimizer.publish(_results(-15.64), path) is None
+    assert not os.path.exists(path)
+    assert optimizer.publish(_results(3.0), path, min_pnl=5.0) is None
+    assert optimizer.publish(_results(3.0), path) is not None
+    assert os.path.exists(path)
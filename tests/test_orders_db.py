@@ -0,0 +1,24 @@
+import sqlite3
+
+import pytest
+
+from core.orders_db import OrdersDB
+
+
+def test_failed_upsert_sent_raises_and_leaves_other_writes_intact(tmp_path):
+    path = str(tmp_path / "orders.db")
+    db = OrdersDB(path)
+    con = sqlite3.connect(path)
+    con.execute("CREATE TRIGGER reject_bad BEFORE INSERT ON orders WHEN NEW.symbol = 'BAD-USDT' "
+                "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+    con.commit()
+    con.close()
+
+    db.upsert_sent("ok-1", "ETH-USDT", "buy", "2500.1", "0.01")
+    with pytest.raises(sqlite3.DatabaseError):
+        db.upsert_sent("bad-1", "BAD-USDT", "buy", "1", "1")
+    db.set_state("ok-1", "ack", "x1")
+    assert db.flush()
+
+    assert db.get("bad-1") is None
+    assert db.get("ok-1")["state"] == "ack"
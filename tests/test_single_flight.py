@@ -0,0 +1,44 @@
+import threading
+
+from core.single_flight import SingleFlight
+
+
+def test_invalidate_discards_inflight_result():
+    flight = SingleFlight(window=60)
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def stale():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("accounts", stale)))
+    leader.start()
+    started.wait(5)
+    flight.invalidate("accounts")
+    # Nach invalidate() startet ein neuer Aufruf statt sich an den laufenden anzuhängen
+    assert flight.do("accounts", lambda: "fresh") == "fresh"
+    release.set()
+    leader.join(5)
+    assert results == ["stale"]
+    # Das veraltete Ergebnis darf den frischen Cache-Eintrag nicht überschreiben
+    assert flight.do("accounts", lambda: "again") == "fresh"
+
+
+def test_global_invalidate_blocks_caching_of_running_call():
+    flight = SingleFlight(window=60)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    leader = threading.Thread(target=lambda: flight.do("allTickers", slow))
+    leader.start()
+    started.wait(5)
+    flight.invalidate()
+    release.set()
+    leader.join(5)
+    assert flight.do("allTickers", lambda: "fresh") == "fresh"